@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Compara a carga de raw_data e processed_data com pandas to_sql e com bulk_insert
+Execução: python benchmarks/bench_bulk_insert.py [--rows 100000 1000000 10000000] [--tables processed_data raw_data]
+
+Para cada tamanho e tabela, em um subprocesso novo e um banco vazio, gera as
+linhas com src/synthetic_data.py (fora da medição; em raw_data, com a impressão
+digital row_hash/row_occurrence do índice único) e as grava de três formas: o
+caminho anterior (df.to_sql em uma conexão nova, como insert_raw_data e
+insert_processed_data faziam), bulk_insert (executemany em lotes, uma
+transação) e bulk_insert com rebuild_indexes=True. Reporta linhas/s e o pico de
+memória durante a carga acima da linha de base antes dela (VmHWM, zerado
+antes da carga, - VmRSS).
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+LOAD_SCRIPT = """
+import json, sqlite3, sys, time
+sys.path.insert(0, sys.argv[1])
+import pandas as pd
+from src.data_schema import to_raw_data
+from src.database import DATABASE_PATH, bulk_insert, init_database, row_hashes
+from src.synthetic_data import generate_chunks
+
+
+def proc_status(field):
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field):
+                return int(line.split()[1])
+
+
+rows, table, method = int(sys.argv[2]), sys.argv[3], sys.argv[4]
+init_database()
+df = pd.concat(generate_chunks(rows, output="raw_data", workers=1), ignore_index=True)
+if table == "processed_data":
+    df = df.drop(columns="cholcheck")
+else:
+    # Como na ingestão: cada linha tem a impressão digital do índice único
+    df["row_hash"] = row_hashes(df)
+    df["row_occurrence"] = df.groupby("row_hash").cumcount() + 1
+# Zera o VmHWM: o pico da geração dos dados fica fora da medição
+with open("/proc/self/clear_refs", "w") as clear_refs:
+    clear_refs.write("5")
+baseline = proc_status("VmRSS")
+start = time.perf_counter()
+if method == "to_sql":
+    conn = sqlite3.connect(DATABASE_PATH)
+    df.to_sql(table, conn, if_exists="append", index=False)
+    conn.close()
+else:
+    bulk_insert(table, df, rebuild_indexes=method == "bulk_insert + índices")
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "peak_mb": (proc_status("VmHWM") - baseline) / 1024}))
+"""
+
+METHODS = ("to_sql", "bulk_insert", "bulk_insert + índices")
+
+
+def load(rows, table, method):
+    with tempfile.TemporaryDirectory() as workdir:
+        process = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                LOAD_SCRIPT,
+                str(Path(__file__).parent.parent.resolve()),
+                str(rows),
+                table,
+                method,
+            ],
+            cwd=workdir,
+            capture_output=True,
+            text=True,
+        )
+    if process.returncode != 0:
+        return None
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[100000, 1000000, 10000000]
+    )
+    parser.add_argument("--tables", nargs="+", default=["processed_data", "raw_data"])
+    parser.add_argument("--methods", nargs="+", default=list(METHODS))
+    args = parser.parse_args()
+
+    print(
+        f"{'tabela':<15} {'linhas':>10} {'carga':<22} {'tempo (s)':>10} "
+        f"{'linhas/s':>10} {'pico (MB)':>10}"
+    )
+    for table in args.tables:
+        for rows in args.rows:
+            for method in args.methods:
+                result = load(rows, table, method)
+                if result is None:
+                    print(f"{table:<15} {rows:>10} {method:<22} {'falhou':>10}")
+                    continue
+                print(
+                    f"{table:<15} {rows:>10} {method:<22} {result['seconds']:>10.2f} "
+                    f"{rows / result['seconds']:>10.0f} {result['peak_mb']:>10.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
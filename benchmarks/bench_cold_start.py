@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Mede o tempo até a primeira predição válida após iniciar a API com uvicorn
+Execução: python benchmarks/bench_cold_start.py [--rows 200000] [--runs 3] [--repo caminho/do/checkout]
+
+Treina um modelo com dados sintéticos em um diretório temporário e, a cada rodada,
+sobe `uvicorn src.api.main:app` em um subprocesso e envia /predict até receber 200.
+Reporta o tempo desde o início do processo até essa resposta e a latência da primeira
+e da segunda predição. --repo permite medir outro checkout (ex.: um `git worktree`
+de uma versão anterior) para comparar antes e depois.
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.common import SAMPLE_PATIENT, make_training_data
+
+TRAIN_SCRIPT = """
+import pandas as pd
+from src.database import init_database, insert_processed_data
+from src.ml.diabetes_model import DiabetesMLModel
+
+init_database()
+insert_processed_data(pd.read_csv("training.csv"))
+DiabetesMLModel().train_model()
+"""
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def post_predict(port, timeout=30):
+    """Envia uma predição e retorna a duração, ou None se a API não respondeu 200"""
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/predict",
+        data=json.dumps(SAMPLE_PATIENT).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            body = json.loads(response.read())
+    except (urllib.error.URLError, ConnectionError):
+        return None
+    elapsed = time.perf_counter() - start
+    return elapsed if "prediction" in body else None
+
+
+def measure_run(repo, workdir, env):
+    """Sobe a API e retorna (tempo até a 1ª predição, latência da 1ª, latência da 2ª)"""
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "src.api.main:app",
+            "--port",
+            str(port),
+            "--app-dir",
+            str(repo),
+        ],
+        cwd=workdir,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            first_latency = post_predict(port)
+            if first_latency is not None:
+                time_to_first = time.perf_counter() - start
+                break
+            if server.poll() is not None:
+                raise RuntimeError("A API encerrou antes de responder")
+            time.sleep(0.01)
+        second_latency = post_predict(port)
+    finally:
+        server.terminate()
+        server.wait()
+    return time_to_first, first_latency, second_latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--repo", type=Path, default=Path(__file__).parent.parent)
+    args = parser.parse_args()
+
+    repo = args.repo.resolve()
+    env = {**os.environ, "PYTHONPATH": str(repo)}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        Path(workdir, "data").mkdir()
+        X, y = make_training_data(args.rows)
+        X.assign(diabetes=y).to_csv(Path(workdir, "training.csv"), index=False)
+        subprocess.run(
+            [sys.executable, "-c", TRAIN_SCRIPT],
+            cwd=workdir,
+            env=env,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+
+        runs = [measure_run(repo, workdir, env) for _ in range(args.runs)]
+
+    time_to_first, first, second = (np.median(values) for values in zip(*runs))
+    print(f"Checkout: {repo}")
+    print(f"Tempo até a primeira predição válida: {time_to_first:.2f} s")
+    print(f"Latência da 1ª predição: {first * 1e3:.1f} ms")
+    print(f"Latência da 2ª predição: {second * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark da inferência compilada (arrays NumPy) contra o predict_proba do sklearn
+Execução: python benchmarks/bench_compiled_forest.py [--rows 20000] [--repeats 2000]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.ml.diabetes_model import DiabetesMLModel
+from src.ml.compiled_forest import CompiledForest
+from benchmarks.common import make_training_data, latency_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    X, y = make_training_data(args.rows)
+    model = DiabetesMLModel().model
+    model.fit(X, y)
+    compiled = CompiledForest.from_estimator(model)
+
+    X_eval = X.sample(args.batch_size, replace=True, random_state=0)
+    X_eval_np = X_eval.to_numpy(dtype=np.float64)
+
+    max_diff = np.abs(
+        model.predict_proba(X_eval) - compiled.predict_proba(X_eval_np)
+    ).max()
+    print(f"Diferença máxima de probabilidade vs sklearn: {max_diff:.2e}")
+
+    single_row_df = X_eval.iloc[[0]]
+    single_row_np = X_eval_np[:1]
+
+    results = {
+        "sklearn (1 linha, DataFrame)": latency_stats(
+            lambda: model.predict_proba(single_row_df), args.repeats
+        ),
+        "compiled (1 linha)": latency_stats(
+            lambda: compiled.predict_proba(single_row_np), args.repeats
+        ),
+        f"sklearn ({args.batch_size} linhas)": latency_stats(
+            lambda: model.predict_proba(X_eval), max(args.repeats // 100, 5)
+        ),
+        f"compiled ({args.batch_size} linhas)": latency_stats(
+            lambda: compiled.predict_proba(X_eval_np), max(args.repeats // 100, 5)
+        ),
+    }
+
+    print(f"{'caminho':<32} {'p50 (µs)':>12} {'p99 (µs)':>12}")
+    for name, (p50, p99) in results.items():
+        print(f"{name:<32} {p50:>12.1f} {p99:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
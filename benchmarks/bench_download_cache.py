@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Exercita o download condicional e retomável do dataset contra um servidor HTTP local
+Execução: python benchmarks/bench_download_cache.py [--rows 500000] [--chunk-sizes 8192 1048576]
+
+Sobe um servidor HTTP local que imita o endpoint de download (ETag, Last-Modified,
+If-None-Match, Range/If-Range e uma queda de conexão opcional no meio do arquivo)
+servindo um ZIP com um CSV sintético. Em seguida roda download_dataset +
+extract_csv do DataCollector com o cache vazio, com o servidor inalterado e com o
+arquivo alterado no servidor e a conexão caindo no meio da transferência. Por fim
+compara o tempo do download completo com cada tamanho de bloco.
+"""
+
+import argparse
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.bench_ingestion import write_csv
+from src.download_cache import DownloadCache
+
+
+class DatasetHandler(BaseHTTPRequestHandler):
+    """Serve server.content com validadores e suporte a Range"""
+
+    def do_GET(self):
+        server = self.server
+        self.server.requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == server.etag:
+            self.send_response(304)
+            self.send_header("ETag", server.etag)
+            self.end_headers()
+            return
+
+        content = server.content
+        start = 0
+        range_header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if range_header and if_range in (None, server.etag, server.last_modified):
+            start = int(range_header.split("=")[1].split("-")[0])
+            if start >= len(content):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(content)}")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {start}-{len(content) - 1}/{len(content)}"
+            )
+        else:
+            self.send_response(200)
+
+        body = content[start:]
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", server.etag)
+        self.send_header("Last-Modified", server.last_modified)
+        self.end_headers()
+
+        if server.cut_after is not None:
+            # Derruba a conexão uma única vez, no meio da transferência
+            body, server.cut_after = body[: server.cut_after], None
+            self.close_connection = True
+        self.wfile.write(body)
+        server.bytes_sent += len(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(content):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), DatasetHandler)
+    server.requests = []
+    server.bytes_sent = 0
+    server.cut_after = None
+    set_content(server, content)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def set_content(server, content):
+    server.content = content
+    server.etag = f'"{hashlib.sha256(content).hexdigest()[:16]}"'
+    server.last_modified = formatdate(time.time(), usegmt=True)
+
+
+def make_archive(n_rows, seed=42):
+    """ZIP em memória com um CSV sintético de n_rows linhas"""
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "diabetes_health_indicators.csv"
+        write_csv(csv_path, n_rows, seed=seed)
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.write(csv_path, csv_path.name)
+    return buffer.getvalue()
+
+
+def collect(server, chunk_size=None):
+    """Roda download + extração e retorna (segundos, bytes servidos, requisições)"""
+    from src.data_collector import DataCollector
+
+    collector = DataCollector()
+    collector.dataset_url = f"http://127.0.0.1:{server.server_port}/dataset.zip"
+    if chunk_size is not None:
+        collector.download_cache.chunk_size = chunk_size
+
+    server.bytes_sent = 0
+    server.requests.clear()
+    start = time.perf_counter()
+    collector.extract_csv(collector.download_dataset())
+    return time.perf_counter() - start, server.bytes_sent, len(server.requests)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[8192, 1048576])
+    args = parser.parse_args()
+
+    content = make_archive(args.rows)
+    server = start_server(content)
+    print(f"Arquivo servido: {len(content) / 1e6:.1f} MB\n")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        scenarios = []
+        scenarios.append(("cache vazio", collect(server)))
+        scenarios.append(("servidor inalterado", collect(server)))
+
+        set_content(server, make_archive(args.rows, seed=7))
+        server.cut_after = len(server.content) // 2
+        scenarios.append(("alterado + queda na metade", collect(server)))
+        scenarios.append(("servidor inalterado", collect(server)))
+
+        print(
+            f"{'cenário':<28} {'tempo (s)':>10} {'bytes servidos':>15} "
+            f"{'requisições':>12}"
+        )
+        for name, (seconds, sent, n_requests) in scenarios:
+            print(f"{name:<28} {seconds:>10.3f} {sent:>15} {n_requests:>12}")
+
+    print(f"\n{'bloco (bytes)':>14} {'download (s)':>13} {'MB/s':>8}")
+    for chunk_size in args.chunk_sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            os.chdir(workdir)
+            cache = DownloadCache("cache", chunk_size=chunk_size)
+            url = f"http://127.0.0.1:{server.server_port}/dataset.zip"
+            start = time.perf_counter()
+            cache.fetch(url, ".zip")
+            seconds = time.perf_counter() - start
+            size_mb = len(server.content) / 1e6
+            print(f"{chunk_size:>14} {seconds:>13.3f} {size_mb / seconds:>8.1f}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
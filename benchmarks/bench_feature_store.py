@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Mede a leitura dos dados de treino pela tabela processed_data versus pelo feature store
+Execução: python benchmarks/bench_feature_store.py [--rows 1000000 3000000] [--schema diagnosed_diabetes]
+
+Para cada tamanho, em um diretório de trabalho próprio, insere um dataset
+sintético em raw_data (src/synthetic_data.py) e roda DataProcessor.process_data,
+que grava processed_data e uma versão do feature store. Depois, em um
+subprocesso novo por medição, roda DiabetesMLModel.prepare_data lendo a tabela
+(read_sql_query) ou o feature store (np.load com mmap). Reporta o tempo e o pico
+de memória do subprocesso acima da linha de base após os imports (VmHWM - VmRSS).
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+SETUP_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+from src.data_processor import DataProcessor
+from src.synthetic_data import write_raw_data
+
+write_raw_data(int(sys.argv[2]), schema=sys.argv[3], workers=1)
+start = time.perf_counter()
+DataProcessor().process_data()
+print(json.dumps({"process_seconds": time.perf_counter() - start}))
+"""
+
+PREPARE_SCRIPT = """
+import json, sys, time
+from pathlib import Path
+sys.path.insert(0, sys.argv[1])
+import sklearn.model_selection
+from src.feature_store import FeatureStore
+from src.ml.diabetes_model import DiabetesMLModel
+
+
+def proc_status(field):
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field):
+                return int(line.split()[1])
+
+
+store = FeatureStore() if sys.argv[2] == "feature store" else FeatureStore("sem-versoes")
+model = DiabetesMLModel(feature_store=store)
+baseline = proc_status("VmRSS")
+start = time.perf_counter()
+X_train, X_test, y_train, y_test = model.prepare_data()
+seconds = time.perf_counter() - start
+print(json.dumps({
+    "seconds": seconds,
+    "peak_mb": (proc_status("VmHWM") - baseline) / 1024,
+    "store_mb": sum(p.stat().st_size for p in Path(store.root).rglob("*.npy")) / 1e6,
+}))
+"""
+
+
+def run(script, workdir, *args):
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            script,
+            str(Path(__file__).parent.parent.resolve()),
+            *map(str, args),
+        ],
+        cwd=workdir,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000000, 3000000])
+    parser.add_argument("--schema", default="diagnosed_diabetes")
+    args = parser.parse_args()
+
+    print(
+        f"{'linhas':>10} {'leitura':<14} {'tempo (s)':>10} {'pico (MB)':>10} "
+        f"{'arquivos (MB)':>14}"
+    )
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as workdir:
+            setup = run(SETUP_SCRIPT, workdir, rows, args.schema)
+            for mode in ("processed_data", "feature store"):
+                result = run(PREPARE_SCRIPT, workdir, mode)
+                size = f"{result['store_mb']:.1f}" if mode == "feature store" else "-"
+                print(
+                    f"{rows:>10} {mode:<14} {result['seconds']:>10.2f} "
+                    f"{result['peak_mb']:>10.1f} {size:>14}"
+                )
+            print(f"{'':>10} (process_data: {setup['process_seconds']:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
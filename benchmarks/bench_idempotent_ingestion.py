@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Mede a ingestão idempotente: coleta repetida do mesmo arquivo e de um arquivo alterado
+Execução: python benchmarks/bench_idempotent_ingestion.py [--rows 1000000] [--changed 0.01] [--repo caminho/do/checkout]
+
+Gera um CSV sintético no formato original do dataset e uma versão alterada
+(a última fração --changed das linhas trocada por linhas novas e a mesma
+quantidade acrescentada no final). Em um mesmo diretório de trabalho, roda
+load_and_store_data em subprocessos novos: primeira carga, o mesmo arquivo de
+novo, o arquivo alterado e o alterado de novo. Reporta tempo, linhas inseridas
+e o total de raw_data após cada coleta. Com --repo, mede outro checkout (ex.: um
+`git worktree` anterior à deduplicação, em que raw_data cresce a cada coleta).
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.bench_ingestion import write_csv
+
+COLLECT_SCRIPT = """
+import json, sqlite3, sys, time
+sys.path.insert(0, sys.argv[1])
+from src.data_collector import DataCollector
+
+collector = DataCollector()
+collector.download_dataset = lambda: sys.argv[2]
+start = time.perf_counter()
+collector.load_and_store_data()
+elapsed = time.perf_counter() - start
+conn = sqlite3.connect("data/diabetes_db.sqlite")
+print(json.dumps({
+    "seconds": elapsed,
+    "raw_rows": conn.execute("SELECT COUNT(*) FROM raw_data").fetchone()[0],
+}))
+"""
+
+
+def collect(repo, workdir, csv_path):
+    output = subprocess.run(
+        [sys.executable, "-c", COLLECT_SCRIPT, str(repo), str(csv_path)],
+        cwd=workdir,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--changed", type=float, default=0.01)
+    parser.add_argument("--repo", type=Path, default=Path(__file__).parent.parent)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as datadir:
+        original = Path(datadir) / "diabetes.csv"
+        write_csv(original, args.rows)
+        n_changed = int(args.rows * args.changed)
+        fresh = Path(datadir) / "fresh.csv"
+        write_csv(fresh, 2 * n_changed, seed=7)
+        changed = Path(datadir) / "diabetes_changed.csv"
+        pd.concat(
+            [
+                pd.read_csv(original).iloc[: args.rows - n_changed],
+                pd.read_csv(fresh),
+            ]
+        ).to_csv(changed, index=False)
+
+        print(
+            f"{args.rows} linhas; arquivo alterado com {n_changed} linhas trocadas "
+            f"e {n_changed} acrescentadas\n"
+        )
+        print(f"{'coleta':<22} {'tempo (s)':>10} {'inseridas':>10} {'raw_data':>10}")
+        with tempfile.TemporaryDirectory() as workdir:
+            raw_rows = 0
+            for name, csv_path in (
+                ("primeira carga", original),
+                ("mesmo arquivo", original),
+                ("arquivo alterado", changed),
+                ("alterado de novo", changed),
+            ):
+                result = collect(args.repo.resolve(), workdir, csv_path)
+                inserted = result["raw_rows"] - raw_rows
+                raw_rows = result["raw_rows"]
+                print(
+                    f"{name:<22} {result['seconds']:>10.2f} {inserted:>10} "
+                    f"{raw_rows:>10}"
+                )
+
+
+if __name__ == "__main__":
+    main()
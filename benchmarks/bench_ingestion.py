@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Mede pico de memória e vazão da ingestão do CSV em raw_data (DataCollector)
+Execução: python benchmarks/bench_ingestion.py [--rows 200000 1000000] [--chunk-sizes 0 50000] [--repo caminho/do/checkout]
+
+Gera CSVs sintéticos no formato original do dataset (Diabetes_012, HighBP, ...) e
+roda load_and_store_data em um subprocesso novo para cada combinação de tamanho
+de arquivo e de bloco, com o download substituído pelo arquivo gerado. O pico
+de memória é o VmHWM do subprocesso (Linux). --chunk-sizes 0 lê o arquivo inteiro
+de uma vez; -1 usa o construtor padrão, o que permite medir outro checkout com
+--repo (ex.: um `git worktree` de uma versão anterior).
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+INGEST_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+from src.data_collector import DataCollector
+
+chunk_size = int(sys.argv[3])
+collector = DataCollector() if chunk_size < 0 else DataCollector(chunk_size=chunk_size)
+collector.download_dataset = lambda: sys.argv[2]
+start = time.perf_counter()
+collector.load_and_store_data()
+elapsed = time.perf_counter() - start
+# VmHWM e não ru_maxrss, que no Linux herda o pico do processo pai
+with open("/proc/self/status") as status:
+    max_rss = next(int(line.split()[1]) for line in status if line.startswith("VmHWM"))
+print(json.dumps({"seconds": elapsed, "max_rss_mb": max_rss / 1024}))
+"""
+
+
+def write_csv(path, n_rows, block_size=200000, seed=42):
+    """Grava um CSV sintético no formato original do dataset, em blocos"""
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_rows, block_size):
+        n = min(block_size, n_rows - start)
+        block = pd.DataFrame(
+            {
+                "Diabetes_012": rng.choice([0, 1, 2], n, p=[0.7, 0.2, 0.1]),
+                "HighBP": rng.integers(0, 2, n),
+                "HighChol": rng.integers(0, 2, n),
+                "CholCheck": rng.integers(0, 2, n),
+                "BMI": rng.normal(28, 6, n).clip(12, 60).round(1),
+                "Smoker": rng.integers(0, 2, n),
+                "Stroke": rng.integers(0, 2, n),
+                "HeartDiseaseorAttack": rng.integers(0, 2, n),
+                "PhysActivity": rng.integers(0, 2, n),
+                "Fruits": rng.integers(0, 2, n),
+                "Veggies": rng.integers(0, 2, n),
+                "HvyAlcoholConsump": rng.integers(0, 2, n),
+                "AnyHealthcare": rng.integers(0, 2, n),
+                "NoDocbcCost": rng.integers(0, 2, n),
+                "GenHlth": rng.integers(1, 6, n),
+                "MentHlth": rng.integers(0, 31, n),
+                "PhysHlth": rng.integers(0, 31, n),
+                "DiffWalk": rng.integers(0, 2, n),
+                "Sex": rng.integers(0, 2, n),
+                "Age": rng.integers(1, 14, n),
+                "Education": rng.integers(1, 7, n),
+                "Income": rng.integers(1, 9, n),
+            }
+        )
+        block.to_csv(path, mode="a", header=start == 0, index=False)
+
+
+def measure(repo, csv_path, chunk_size):
+    """Roda a ingestão em um subprocesso e retorna segundos e pico de RSS (MB)"""
+    with tempfile.TemporaryDirectory() as workdir:
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                INGEST_SCRIPT,
+                str(repo),
+                str(csv_path),
+                str(chunk_size),
+            ],
+            cwd=workdir,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[200000, 1000000])
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[0, 50000])
+    parser.add_argument("--repo", type=Path, default=Path(__file__).parent.parent)
+    args = parser.parse_args()
+
+    print(
+        f"{'linhas':>9} {'bloco':>8} {'CSV (MB)':>9} {'tempo (s)':>10} "
+        f"{'linhas/s':>10} {'pico RSS (MB)':>14}"
+    )
+    with tempfile.TemporaryDirectory() as datadir:
+        for n_rows in args.rows:
+            csv_path = Path(datadir) / f"diabetes_{n_rows}.csv"
+            write_csv(csv_path, n_rows)
+            csv_mb = csv_path.stat().st_size / 1e6
+            for chunk_size in args.chunk_sizes:
+                result = measure(args.repo.resolve(), csv_path, chunk_size)
+                label = "arquivo" if chunk_size == 0 else str(chunk_size)
+                if chunk_size < 0:
+                    label = "padrão"
+                print(
+                    f"{n_rows:>9} {label:>8} {csv_mb:>9.1f} "
+                    f"{result['seconds']:>10.2f} {n_rows / result['seconds']:>10.0f} "
+                    f"{result['max_rss_mb']:>14.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
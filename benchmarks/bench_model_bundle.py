@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Mede tamanho em disco e tempo de carga do bundle do modelo por nível de compressão
+Execução: python benchmarks/bench_model_bundle.py [--rows 300000] [--levels 0 1 3 6 9]
+
+Compara com o formato anterior (três pickles joblib sem compressão: modelo, scaler e
+feature_names) e mede a leitura só do cabeçalho, que não desserializa a floresta.
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.common import make_training_data
+from src.ml.model_bundle import save_bundle, load_bundle, read_bundle_header
+
+
+def median_seconds(fn, repeats):
+    """Executa fn `repeats` vezes e retorna a mediana da duração em segundos"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=300000)
+    parser.add_argument("--levels", type=int, nargs="+", default=[0, 1, 3, 6, 9])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    X, y = make_training_data(args.rows)
+    model = RandomForestClassifier(
+        n_estimators=100,
+        max_depth=10,
+        min_samples_split=5,
+        min_samples_leaf=2,
+        random_state=42,
+    ).fit(X, y)
+    feature_names = list(X.columns)
+    header = {"feature_names": feature_names, "metadata": {}, "metrics": {}}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        workdir = Path(workdir)
+
+        legacy_files = [
+            workdir / "diabetes_model.joblib",
+            workdir / "scaler.joblib",
+            workdir / "feature_names.joblib",
+        ]
+        start = time.perf_counter()
+        joblib.dump(model, legacy_files[0])
+        joblib.dump(StandardScaler().fit(X), legacy_files[1])
+        joblib.dump(feature_names, legacy_files[2])
+        legacy_save = time.perf_counter() - start
+        legacy_load = median_seconds(
+            lambda: [joblib.load(path) for path in legacy_files], args.repeats
+        )
+        legacy_size = sum(path.stat().st_size for path in legacy_files)
+
+        print(
+            f"{'formato':<18} {'tamanho (MB)':>13} {'gravação (s)':>13} "
+            f"{'carga (ms)':>11} {'cabeçalho (µs)':>15}"
+        )
+        print(
+            f"{'joblib (3 arq.)':<18} {legacy_size / 1e6:>13.2f} {legacy_save:>13.2f} "
+            f"{legacy_load * 1e3:>11.1f} {'-':>15}"
+        )
+
+        for level in args.levels:
+            bundle_file = workdir / f"model_{level}.bundle"
+            start = time.perf_counter()
+            save_bundle(bundle_file, header, model, compress=level)
+            save_seconds = time.perf_counter() - start
+
+            load_seconds = median_seconds(
+                lambda: load_bundle(bundle_file), args.repeats
+            )
+            header_seconds = median_seconds(
+                lambda: read_bundle_header(bundle_file), args.repeats * 20
+            )
+            print(
+                f"{f'bundle nível {level}':<18} "
+                f"{bundle_file.stat().st_size / 1e6:>13.2f} {save_seconds:>13.2f} "
+                f"{load_seconds * 1e3:>11.1f} {header_seconds * 1e6:>15.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Mede a latência de /predict com a API ociosa e durante um /train-model concorrente
+Execução: python benchmarks/bench_predict_during_training.py [--rows 200000] [--max-ratio 3]
+
+Roda a aplicação FastAPI no próprio processo (via ASGI), em um diretório temporário
+com dados sintéticos e com o cache de predições desligado, para que os dois cenários
+passem pelo modelo. A razão entre os p99 depende da máquina (com 1 CPU o treinamento
+disputa o mesmo núcleo), então o script só falha (exit code 1) se --max-ratio for
+informado. A garantia de que /predict responde durante o treinamento fica no teste
+tests/test_predict_during_training.py.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.common import SAMPLE_PATIENT, make_training_data, percentiles_ms
+
+
+async def measure_predict(client, n_requests=None, until=None):
+    """Faz chamadas sequenciais a /predict e retorna as durações"""
+    timings = []
+    while True:
+        if n_requests is not None and len(timings) >= n_requests:
+            break
+        if until is not None and until.done():
+            break
+        start = time.perf_counter()
+        response = await client.post("/predict", json=SAMPLE_PATIENT)
+        timings.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return timings
+
+
+async def wait_for_job(client, job_id, poll_interval=0.5):
+    """Aguarda um job em segundo plano terminar e retorna seu estado final"""
+    while True:
+        response = await client.get(f"/jobs/{job_id}")
+        response.raise_for_status()
+        job = response.json()
+        if job["state"] not in ("queued", "running"):
+            return job
+        await asyncio.sleep(poll_interval)
+
+
+async def run(args):
+    import httpx
+    from src.api.main import app, model_holder
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        await asyncio.to_thread(model_holder.refresh)
+        await measure_predict(client, n_requests=20)
+
+        idle = await measure_predict(client, n_requests=args.requests)
+
+        response = await client.post("/train-model")
+        response.raise_for_status()
+        training = asyncio.create_task(wait_for_job(client, response.json()["job_id"]))
+        # Garante que o treinamento já começou antes de medir
+        await asyncio.sleep(0.5)
+        during_training = await measure_predict(client, until=training)
+        job = await training
+        if job["state"] != "completed":
+            raise RuntimeError(
+                f"Treinamento terminou em '{job['state']}': {job['error']}"
+            )
+
+    idle_stats = percentiles_ms(idle)
+    training_stats = percentiles_ms(during_training)
+
+    print(f"{'cenário':<22} {'n':>6} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    print(
+        f"{'API ociosa':<22} {len(idle):>6} "
+        f"{idle_stats['p50']:>10.2f} {idle_stats['p99']:>10.2f}"
+    )
+    print(
+        f"{'durante treinamento':<22} {len(during_training):>6} "
+        f"{training_stats['p50']:>10.2f} {training_stats['p99']:>10.2f}"
+    )
+
+    ratio = training_stats["p99"] / idle_stats["p99"]
+    print(f"Razão p99 (treinamento / ociosa): {ratio:.2f}")
+    return args.max_ratio is None or ratio <= args.max_ratio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--max-ratio", type=float, default=None)
+    args = parser.parse_args()
+
+    # Lido na importação de src.api.main; com o cache ligado a medição ociosa só veria hits
+    os.environ["PREDICTION_CACHE_SIZE"] = "0"
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        Path("data").mkdir()
+
+        from src.database import init_database, insert_processed_data
+        from src.ml.diabetes_model import DiabetesMLModel
+
+        init_database()
+        X, y = make_training_data(args.rows)
+        insert_processed_data(X.assign(diabetes=y))
+        DiabetesMLModel().train_model()
+
+        ok = asyncio.run(run(args))
+
+    if not ok:
+        print("❌ Latência de /predict degradou durante o treinamento")
+        sys.exit(1)
+    if args.max_ratio is not None:
+        print("✅ Latência de /predict estável durante o treinamento")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Mede tempo de parse e memória do CSV lido inteiro versus lido pelo schema (src/data_schema.py)
+Execução: python benchmarks/bench_read_schema.py [--rows 100000 253680]
+
+Gera um CSV sintético para cada layout de origem, com as mesmas colunas do
+arquivo real: o dataset atual do Kaggle (31 colunas, diagnosed_diabetes) e o
+formato original do BRFSS (22 colunas, Diabetes_012). Em um subprocesso novo
+por medição, lê o arquivo com read_csv padrão (todas as colunas, int64/float64/
+object) e com usecols + dtypes compactos do layout. Reporta o tempo de parse, a
+memória do DataFrame (memory_usage(deep=True)) e o pico de memória do
+subprocesso acima da linha de base após os imports (VmHWM - VmRSS).
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.bench_ingestion import write_csv
+
+READ_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+import pandas as pd
+from src.data_schema import detect_layout, read_options, to_raw_data
+
+
+def proc_status(field):
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field):
+                return int(line.split()[1])
+
+
+path, mode = sys.argv[2], sys.argv[3]
+columns = pd.read_csv(path, nrows=0).columns
+layout = detect_layout(columns)
+options = read_options(layout, columns) if mode == "schema" else {}
+baseline = proc_status("VmRSS")
+start = time.perf_counter()
+df = pd.read_csv(path, **options)
+parse_seconds = time.perf_counter() - start
+if mode == "schema":
+    df = to_raw_data(df, layout)
+print(json.dumps({
+    "parse_seconds": parse_seconds,
+    "frame_mb": df.memory_usage(deep=True).sum() / 1e6,
+    "n_columns": len(options.get("usecols", columns)),
+    "peak_mb": (proc_status("VmHWM") - baseline) / 1024,
+}))
+"""
+
+
+def write_diagnosed_csv(path, n_rows, seed=42):
+    """Grava um CSV sintético no formato atual do dataset (diagnosed_diabetes)"""
+    rng = np.random.default_rng(seed)
+    n = n_rows
+    pd.DataFrame(
+        {
+            "age": rng.integers(18, 90, n),
+            "gender": rng.choice(["male", "female", "other"], n),
+            "ethnicity": rng.choice(["white", "hispanic", "black", "asian"], n),
+            "education_level": rng.choice(["highschool", "graduate", "postgrad"], n),
+            "income_level": rng.choice(["low", "middle", "high"], n),
+            "employment_status": rng.choice(["employed", "unemployed", "retired"], n),
+            "smoking_status": rng.choice(["never", "former", "current_smoker"], n),
+            "alcohol_consumption_per_week": rng.integers(0, 15, n),
+            "physical_activity_minutes_per_week": rng.integers(0, 600, n),
+            "diet_score": rng.uniform(0, 10, n).round(1),
+            "sleep_hours_per_day": rng.uniform(4, 10, n).round(1),
+            "screen_time_hours_per_day": rng.uniform(1, 12, n).round(1),
+            "family_history_diabetes": rng.integers(0, 2, n),
+            "hypertension_history": rng.integers(0, 2, n),
+            "cardiovascular_history": rng.integers(0, 2, n),
+            "bmi": rng.normal(27, 5, n).clip(15, 50).round(1),
+            "waist_to_hip_ratio": rng.uniform(0.7, 1.1, n).round(2),
+            "systolic_bp": rng.integers(90, 180, n),
+            "diastolic_bp": rng.integers(60, 110, n),
+            "heart_rate": rng.integers(50, 100, n),
+            "cholesterol_total": rng.integers(120, 300, n),
+            "hdl_cholesterol": rng.integers(30, 90, n),
+            "ldl_cholesterol": rng.integers(50, 200, n),
+            "triglycerides": rng.integers(50, 300, n),
+            "glucose_fasting": rng.integers(70, 180, n),
+            "glucose_postprandial": rng.integers(90, 250, n),
+            "insulin_level": rng.uniform(2, 30, n).round(2),
+            "hba1c": rng.uniform(4, 10, n).round(2),
+            "diabetes_risk_score": rng.uniform(0, 60, n).round(1),
+            "diabetes_stage": rng.choice(["no_diabetes", "pre-diabetes", "type_2"], n),
+            "diagnosed_diabetes": rng.integers(0, 2, n),
+        }
+    ).to_csv(path, index=False)
+
+
+def measure(csv_path, mode):
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            READ_SCRIPT,
+            str(Path(__file__).parent.parent.resolve()),
+            str(csv_path),
+            mode,
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--rows",
+        type=int,
+        nargs=2,
+        default=[100000, 253680],
+        help="linhas do CSV diagnosed_diabetes e do CSV Diabetes_012",
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'layout':<20} {'leitura':<8} {'colunas':>8} {'parse (s)':>10} "
+        f"{'DataFrame (MB)':>15} {'pico (MB)':>10}"
+    )
+    with tempfile.TemporaryDirectory() as datadir:
+        diagnosed_path = Path(datadir) / "diagnosed_diabetes.csv"
+        write_diagnosed_csv(diagnosed_path, args.rows[0])
+        brfss_path = Path(datadir) / "diabetes_012.csv"
+        write_csv(brfss_path, args.rows[1])
+
+        for layout, csv_path in (
+            ("diagnosed_diabetes", diagnosed_path),
+            ("Diabetes_012", brfss_path),
+        ):
+            for mode in ("padrão", "schema"):
+                result = measure(csv_path, mode)
+                print(
+                    f"{layout:<20} {mode:<8} {result['n_columns']:>8} "
+                    f"{result['parse_seconds']:>10.3f} {result['frame_mb']:>15.1f} "
+                    f"{result['peak_mb']:>10.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Mede bytes trafegados e CPU de serialização da resposta de /predict/batch
+Execução: python benchmarks/bench_response_serialization.py [--rows 10000] [--repeats 20]
+
+Compara o caminho anterior (objetos Pydantic validados pelo response_model e
+JSONResponse) com a camada de src/api/responses.py: dicionários com json da
+biblioteca padrão, dicionários com orjson e o formato colunar. Para cada corpo
+também mede o tamanho e o custo do gzip nos níveis 1, 6 e 9.
+"""
+
+import argparse
+import asyncio
+import gzip
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+
+def cpu_ms(fn, repeats):
+    """Mediana do tempo de CPU (ms) de fn entre as repetições"""
+    timings = []
+    for _ in range(repeats):
+        start = time.process_time()
+        fn()
+        timings.append((time.process_time() - start) * 1e3)
+    return sorted(timings)[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    import numpy as np
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+
+    from src.api import responses
+    from src.api.main import BatchPredictionResponse, PredictionResponse
+    from src.api.scoring import risk_level
+
+    rng = np.random.default_rng(42)
+    prob_yes = rng.random(args.rows)
+    probabilities = np.column_stack([1 - prob_yes, prob_yes])
+    predictions = (prob_yes >= 0.5).astype(np.int64)
+
+    field = create_response_field(name="response", type_=BatchPredictionResponse)
+
+    def previous():
+        # Caminho anterior: um PredictionResponse por linha, revalidado na saída
+        content = BatchPredictionResponse(
+            predictions=[
+                PredictionResponse(
+                    prediction=int(prediction),
+                    probability={
+                        "não_diabético": float(probability[0]),
+                        "diabético": float(probability[1]),
+                    },
+                    risk_level=risk_level(float(probability[1])),
+                )
+                for prediction, probability in zip(predictions, probabilities)
+            ],
+            count=len(predictions),
+        )
+        content = asyncio.run(serialize_response(field=field, response_content=content))
+        return JSONResponse(content).body
+
+    def rows_stdlib():
+        orjson, responses.orjson = responses.orjson, None
+        try:
+            return responses.FastJSONResponse(
+                {
+                    "predictions": responses.prediction_rows(
+                        predictions, probabilities
+                    ),
+                    "count": len(predictions),
+                }
+            ).body
+        finally:
+            responses.orjson = orjson
+
+    def rows_fast():
+        return responses.FastJSONResponse(
+            {
+                "predictions": responses.prediction_rows(predictions, probabilities),
+                "count": len(predictions),
+            }
+        ).body
+
+    def columnar_fast():
+        return responses.FastJSONResponse(
+            {
+                **responses.prediction_columns(predictions, probabilities),
+                "count": len(predictions),
+            }
+        ).body
+
+    variants = [
+        ("pydantic + JSONResponse", previous),
+        ("linhas + json", rows_stdlib),
+        ("linhas + orjson", rows_fast),
+        ("colunar + orjson", columnar_fast),
+    ]
+    if responses.orjson is None:
+        print("orjson não instalado: as variantes 'orjson' usam o json padrão\n")
+
+    scale = 10000 / args.rows
+    print(f"Por 10k linhas ({args.rows} linhas medidas, mediana de {args.repeats}):\n")
+    print(
+        f"{'formato':<24} {'CPU (ms)':>9} {'bytes':>10} "
+        f"{'gzip-1':>9} {'ms':>6} {'gzip-6':>9} {'ms':>6} {'gzip-9':>9} {'ms':>6}"
+    )
+    for name, fn in variants:
+        body = fn()
+        elapsed = cpu_ms(fn, args.repeats)
+        line = f"{name:<24} {elapsed * scale:>9.1f} {len(body) * scale:>10.0f}"
+        for level in (1, 6, 9):
+            compressed = gzip.compress(body, compresslevel=level)
+            elapsed = cpu_ms(
+                lambda: gzip.compress(body, compresslevel=level), args.repeats
+            )
+            line += f" {len(compressed) * scale:>9.0f} {elapsed * scale:>6.1f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Mede leituras e escritas curtas no SQLite enquanto outro processo ingere dados em raw_data
+Execução: python benchmarks/bench_sqlite_concurrency.py [--rows 2000000] [--repo caminho/do/checkout]
+
+Simula os containers que compartilham o banco: um processo insere --rows linhas
+sintéticas em raw_data (write_raw_data, uma transação no final), um processo de
+leitura faz as consultas do dashboard/API em laço (count_rows e get_job) e outro
+atualiza um job a cada 10 ms, como o progresso de um job em segundo plano. Antes
+da ingestão, mede a latência das mesmas chamadas sem concorrência. Reporta
+p50/p99/máximo e os erros "database is locked". Com --repo, mede outro checkout
+(ex.: um `git worktree` anterior ao gerenciador de conexões).
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+LOOP_SCRIPT = """
+import json, sys, time
+from pathlib import Path
+sys.path.insert(0, sys.argv[1])
+from src.database import count_rows, get_job, update_job
+
+mode, stop_file, max_calls = sys.argv[2], Path(sys.argv[3]), int(sys.argv[4])
+latencies, errors = [], 0
+while not stop_file.exists() and len(latencies) + errors < max_calls:
+    start = time.perf_counter()
+    try:
+        if mode == "leitura":
+            count_rows("processed_data")
+            get_job("bench")
+        else:
+            update_job("bench", stage="ingest", rows_processed=len(latencies))
+    except Exception as error:
+        errors += 1
+        print(error, file=sys.stderr)
+        continue
+    latencies.append(time.perf_counter() - start)
+    if mode == "escrita":
+        time.sleep(0.01)
+print(json.dumps({"latencies": latencies, "errors": errors}))
+"""
+
+INGEST_SCRIPT = """
+import json, sys, time
+from pathlib import Path
+sys.path.insert(0, sys.argv[1])
+from src.synthetic_data import write_raw_data
+
+time.sleep(0.5)
+start = time.perf_counter()
+write_raw_data(int(sys.argv[2]), seed=int(time.time()), workers=1)
+print(json.dumps({"seconds": time.perf_counter() - start}))
+Path(sys.argv[3]).touch()
+"""
+
+SETUP_SCRIPT = """
+import sys
+sys.path.insert(0, sys.argv[1])
+from src.database import create_job, init_database
+
+init_database()
+create_job("bench", "collect")
+"""
+
+
+def spawn(script, *args, cwd):
+    return subprocess.Popen(
+        [sys.executable, "-c", script, *map(str, args)],
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+
+
+def result(process):
+    output, _ = process.communicate()
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summary(name, phase, loop):
+    latencies = np.array(loop["latencies"]) * 1000
+    if len(latencies) == 0:
+        latencies = np.array([np.nan])
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(
+        f"{name:<8} {phase:<15} {len(loop['latencies']):>8} {p50:>9.2f} "
+        f"{p99:>9.2f} {latencies.max():>9.1f} {loop['errors']:>6}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2000000)
+    parser.add_argument("--repo", type=Path, default=Path(__file__).parent.parent)
+    args = parser.parse_args()
+    repo = args.repo.resolve()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        subprocess.run(
+            [sys.executable, "-c", SETUP_SCRIPT, str(repo)], cwd=workdir, check=True
+        )
+        stop_file = Path(workdir) / "stop"
+        idle = {
+            mode: result(spawn(LOOP_SCRIPT, repo, mode, stop_file, 2000, cwd=workdir))
+            for mode in ("leitura", "escrita")
+        }
+
+        loops = {
+            mode: spawn(LOOP_SCRIPT, repo, mode, stop_file, 10**9, cwd=workdir)
+            for mode in ("leitura", "escrita")
+        }
+        ingest = result(spawn(INGEST_SCRIPT, repo, args.rows, stop_file, cwd=workdir))
+        busy = {mode: result(process) for mode, process in loops.items()}
+
+    print(f"Ingestão de {args.rows} linhas: {ingest['seconds']:.1f} s\n")
+    print(
+        f"{'chamada':<8} {'fase':<15} {'chamadas':>8} {'p50 (ms)':>9} "
+        f"{'p99 (ms)':>9} {'máx (ms)':>9} {'erros':>6}"
+    )
+    for mode in ("leitura", "escrita"):
+        summary(mode, "sem ingestão", idle[mode])
+        summary(mode, "com ingestão", busy[mode])
+
+
+if __name__ == "__main__":
+    main()
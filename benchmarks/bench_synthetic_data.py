@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Mede o gerador de dados sintéticos (src/synthetic_data.py) por saída e número de processos
+Execução: python benchmarks/bench_synthetic_data.py [--rows 1000000] [--workers 1 2 4]
+
+Para cada layout, saída (CSV, CSV dentro de ZIP e raw_data) e número de
+processos, gera --rows linhas em um subprocesso novo, em um diretório de
+trabalho próprio. Reporta o tempo, as linhas por segundo, o tamanho do arquivo
+e o pico de memória do subprocesso principal acima da linha de base após os
+imports (VmHWM - VmRSS); com mais de um processo, os blocos são gerados nos
+processos do pool e o principal só grava. Mais processos que núcleos não
+aceleram nada.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+GENERATE_SCRIPT = """
+import json, os, sys, time
+sys.path.insert(0, sys.argv[1])
+from src.synthetic_data import write_csv, write_raw_data
+
+
+def proc_status(field):
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field):
+                return int(line.split()[1])
+
+
+if __name__ == "__main__":
+    rows, schema, output, workers = int(sys.argv[2]), sys.argv[3], sys.argv[4], int(sys.argv[5])
+    baseline = proc_status("VmRSS")
+    start = time.perf_counter()
+    if output == "raw_data":
+        write_raw_data(rows, schema=schema, workers=workers)
+        size = os.path.getsize("data/diabetes_db.sqlite")
+    else:
+        size = write_csv(f"data/synthetic.{output}", rows, schema=schema, workers=workers).stat().st_size
+    print(json.dumps({
+        "seconds": time.perf_counter() - start,
+        "size_mb": size / 1e6,
+        "peak_mb": (proc_status("VmHWM") - baseline) / 1024,
+    }))
+"""
+
+
+def generate(rows, schema, output, workers):
+    with tempfile.TemporaryDirectory() as workdir:
+        script = Path(workdir) / "generate.py"
+        script.write_text(GENERATE_SCRIPT)
+        stdout = subprocess.run(
+            [
+                sys.executable,
+                str(script),
+                str(Path(__file__).parent.parent.resolve()),
+                str(rows),
+                schema,
+                output,
+                str(workers),
+            ],
+            cwd=workdir,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    return json.loads(stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument(
+        "--schemas", nargs="+", default=["Diabetes_012", "diagnosed_diabetes"]
+    )
+    parser.add_argument("--outputs", nargs="+", default=["csv", "zip", "raw_data"])
+    args = parser.parse_args()
+
+    print(f"{args.rows} linhas, {os.cpu_count()} núcleo(s)\n")
+    print(
+        f"{'layout':<20} {'saída':<9} {'processos':>9} {'tempo (s)':>10} "
+        f"{'linhas/s':>10} {'tamanho (MB)':>13} {'pico (MB)':>10}"
+    )
+    for schema in args.schemas:
+        for output in args.outputs:
+            for workers in args.workers:
+                result = generate(args.rows, schema, output, workers)
+                print(
+                    f"{schema:<20} {output:<9} {workers:>9} "
+                    f"{result['seconds']:>10.2f} "
+                    f"{args.rows / result['seconds']:>10.0f} "
+                    f"{result['size_mb']:>13.1f} {result['peak_mb']:>10.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
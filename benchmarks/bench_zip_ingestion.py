@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Compara a ingestão do dataset extraindo o CSV do ZIP com a leitura direta do ZIP
+Execução: python benchmarks/bench_zip_ingestion.py [--rows 1000000] [--chunk-size 50000]
+
+Gera um ZIP com um CSV sintético e roda load_and_store_data em um subprocesso
+novo para cada modo (INGEST_FROM_ZIP=0 e 1), com o download substituído pelo ZIP.
+Reporta tempo, bytes lidos e escritos pelo processo (rchar/wchar de
+/proc/self/io, que incluem o SQLite), o tamanho do CSV deixado em data/ e o pico
+de memória (VmHWM).
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.bench_ingestion import write_csv
+
+INGEST_SCRIPT = """
+import json, sys, time
+from pathlib import Path
+sys.path.insert(0, sys.argv[1])
+from src.data_collector import DataCollector
+
+
+def proc_status(path, field):
+    with open(path) as status:
+        for line in status:
+            if line.startswith(field):
+                return int(line.split()[1])
+
+
+collector = DataCollector(chunk_size=int(sys.argv[3]), from_zip=sys.argv[4] == "1")
+collector.download_dataset = lambda: sys.argv[2]
+io_before = {f: proc_status("/proc/self/io", f) for f in ("rchar", "wchar")}
+start = time.perf_counter()
+collector.load_and_store_data()
+elapsed = time.perf_counter() - start
+csv_bytes = sum(path.stat().st_size for path in Path("data").rglob("*.csv"))
+print(json.dumps({
+    "seconds": elapsed,
+    "read_mb": (proc_status("/proc/self/io", "rchar") - io_before["rchar"]) / 1e6,
+    "written_mb": (proc_status("/proc/self/io", "wchar") - io_before["wchar"]) / 1e6,
+    "csv_mb": csv_bytes / 1e6,
+    "db_mb": Path("data/diabetes_db.sqlite").stat().st_size / 1e6,
+    "max_rss_mb": proc_status("/proc/self/status", "VmHWM") / 1024,
+}))
+"""
+
+
+def measure(zip_path, chunk_size, from_zip):
+    with tempfile.TemporaryDirectory() as workdir:
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                INGEST_SCRIPT,
+                str(Path(__file__).parent.parent.resolve()),
+                str(zip_path),
+                str(chunk_size),
+                "1" if from_zip else "0",
+            ],
+            cwd=workdir,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as datadir:
+        csv_path = Path(datadir) / "diabetes_health_indicators.csv"
+        write_csv(csv_path, args.rows)
+        zip_path = Path(datadir) / "dataset.zip"
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.write(csv_path, csv_path.name)
+        print(
+            f"{args.rows} linhas: CSV de {csv_path.stat().st_size / 1e6:.1f} MB, "
+            f"ZIP de {zip_path.stat().st_size / 1e6:.1f} MB\n"
+        )
+        csv_path.unlink()
+
+        print(
+            f"{'modo':<10} {'tempo (s)':>10} {'lido (MB)':>10} {'escrito (MB)':>13} "
+            f"{'banco (MB)':>11} {'CSV em data/ (MB)':>18} {'pico RSS (MB)':>14}"
+        )
+        for name, from_zip in (("extrair", False), ("streaming", True)):
+            result = measure(zip_path, args.chunk_size, from_zip)
+            print(
+                f"{name:<10} {result['seconds']:>10.2f} {result['read_mb']:>10.1f} "
+                f"{result['written_mb']:>13.1f} {result['db_mb']:>11.1f} "
+                f"{result['csv_mb']:>18.1f} {result['max_rss_mb']:>14.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
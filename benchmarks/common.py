@@ -0,0 +1,111 @@
+"""Utilitários compartilhados pelos scripts de benchmark"""
+
+import asyncio
+import time
+
+import numpy as np
+import pandas as pd
+
+FEATURES = [
+    "highbp",
+    "highchol",
+    "bmi",
+    "smoker",
+    "stroke",
+    "heartdiseaseorattack",
+    "physactivity",
+    "genhlth",
+    "age",
+    "sex",
+    "diffwalk",
+]
+
+SAMPLE_PATIENT = {
+    "highbp": 1,
+    "highchol": 1,
+    "bmi": 30.0,
+    "smoker": 0,
+    "stroke": 0,
+    "heartdiseaseorattack": 0,
+    "physactivity": 1,
+    "genhlth": 3,
+    "age": 45,
+    "sex": 1,
+    "diffwalk": 0,
+}
+
+
+def make_training_data(n_rows, seed=42):
+    """Gera dados sintéticos no formato de processed_data"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            "highbp": rng.integers(0, 2, n_rows),
+            "highchol": rng.integers(0, 2, n_rows),
+            "bmi": rng.normal(28, 6, n_rows).clip(12, 50).round(1),
+            "smoker": rng.integers(0, 2, n_rows),
+            "stroke": rng.integers(0, 2, n_rows),
+            "heartdiseaseorattack": rng.integers(0, 2, n_rows),
+            "physactivity": rng.integers(0, 2, n_rows),
+            "genhlth": rng.integers(1, 6, n_rows),
+            "age": rng.integers(1, 14, n_rows),
+            "sex": rng.integers(0, 2, n_rows),
+            "diffwalk": rng.integers(0, 2, n_rows),
+        }
+    )
+    logit = (
+        -4.0
+        + 1.2 * df["highbp"]
+        + 0.6 * df["highchol"]
+        + 0.08 * (df["bmi"] - 25)
+        + 0.5 * df["genhlth"]
+        + 0.15 * df["age"]
+        - 0.4 * df["physactivity"]
+    )
+    y = (rng.random(n_rows) < 1 / (1 + np.exp(-logit))).astype(int)
+    return df[FEATURES], y
+
+
+def percentiles_ms(timings):
+    """Retorna p50/p95/p99 (em ms) de uma lista de durações em segundos"""
+    timings = np.asarray(timings) * 1e3
+    return {
+        "p50": float(np.percentile(timings, 50)),
+        "p95": float(np.percentile(timings, 95)),
+        "p99": float(np.percentile(timings, 99)),
+    }
+
+
+def latency_stats(fn, repeats):
+    """Executa fn repetidas vezes e retorna p50/p99 em microssegundos"""
+    timings = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings[i] = time.perf_counter() - start
+    return np.percentile(timings, 50) * 1e6, np.percentile(timings, 99) * 1e6
+
+
+async def run_concurrent(send_request, concurrency, n_requests):
+    """Executa n_requests chamadas com `concurrency` clientes simultâneos
+
+    send_request recebe o índice da requisição e retorna a resposta httpx.
+    Retorna requisições por segundo, as durações e o número de erros.
+    """
+    timings = []
+    errors = 0
+    queue = iter(range(n_requests))
+
+    async def worker():
+        nonlocal errors
+        for i in queue:
+            start = time.perf_counter()
+            response = await send_request(i)
+            timings.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return n_requests / elapsed, timings, errors
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Teste de carga da API no próprio processo (ASGI), com comparação contra um baseline
+Execução: python benchmarks/load_test.py [--concurrency 1 8 32] [--repeat 3] [--output resultados.json] [--baseline baseline.json]
+
+Monta um ambiente reprodutível em um diretório temporário: os dados de exemplo de
+DataCollector.create_sample_data (semente fixa) passam pela coleta, pelo
+processamento e pelo treinamento. Em seguida /predict, /model-info, /data-stats e
+/health são exercitados em cada nível de concorrência, com RPS e p50/p95/p99
+(mediana de --repeat rodadas, cada uma com o cache de predições limpo).
+
+Com --baseline, cada endpoint/concorrência é comparado com o resultado salvo e o
+script falha (exit code 1) se o RPS cair ou o p99 subir mais que --max-regression.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.common import percentiles_ms, run_concurrent
+
+ENDPOINTS = ["/predict", "/model-info", "/data-stats", "/health"]
+
+# Variáveis de ambiente que mudam o desempenho da API e entram no resultado
+SETTINGS = [
+    "INFERENCE_MODE",
+    "INFERENCE_THREADS",
+    "PREDICTION_CACHE_SIZE",
+    "PREDICTION_TABLE",
+    "PREDICT_BATCHING",
+    "METRICS_ENABLED",
+]
+
+
+def build_environment():
+    """Coleta, processa e treina a partir dos dados de exemplo, sem acesso à rede"""
+    from src.data_collector import DataCollector
+    from src.data_processor import DataProcessor
+    from src.ml.diabetes_model import DiabetesMLModel
+
+    collector = DataCollector()
+    collector.download_dataset = collector.create_sample_data
+    collector.load_and_store_data()
+    DataProcessor().process_data()
+    DiabetesMLModel().train_model()
+
+
+def make_patients(n_patients=500, seed=42):
+    """Gera pacientes determinísticos no formato de DiabetesFeatures"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "highbp": int(rng.integers(0, 2)),
+            "highchol": int(rng.integers(0, 2)),
+            "bmi": round(float(rng.normal(27, 5)), 1),
+            "smoker": int(rng.integers(0, 2)),
+            "stroke": int(rng.integers(0, 2)),
+            "heartdiseaseorattack": int(rng.integers(0, 2)),
+            "physactivity": int(rng.integers(0, 2)),
+            "genhlth": int(rng.integers(1, 6)),
+            "age": int(rng.integers(18, 90)),
+            "sex": int(rng.integers(0, 2)),
+            "diffwalk": int(rng.integers(0, 2)),
+        }
+        for _ in range(n_patients)
+    ]
+
+
+def request_sender(client, endpoint, patients):
+    """Retorna a função que envia a i-ésima requisição do endpoint"""
+    if endpoint == "/predict":
+        return lambda i: client.post(endpoint, json=patients[i % len(patients)])
+    return lambda i: client.get(endpoint)
+
+
+async def run(args):
+    import httpx
+    import numpy as np
+    from src.api.main import app, startup, prediction_cache
+
+    await startup()
+    patients = make_patients()
+    results = {}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=60
+    ) as client:
+        for endpoint in args.endpoints:
+            send_request = request_sender(client, endpoint, patients)
+            await run_concurrent(send_request, 1, args.warmup)
+            results[endpoint] = {}
+            for concurrency in args.concurrency:
+                runs = []
+                for _ in range(args.repeat):
+                    # Cada rodada parte do mesmo estado do cache de predições
+                    if prediction_cache is not None:
+                        prediction_cache.clear()
+                    rps, timings, errors = await run_concurrent(
+                        send_request, concurrency, args.requests
+                    )
+                    runs.append(
+                        {"rps": rps, **percentiles_ms(timings), "errors": errors}
+                    )
+                # Mediana de cada métrica entre as rodadas, para reduzir o ruído
+                results[endpoint][str(concurrency)] = {
+                    name: float(np.median([run[name] for run in runs]))
+                    for name in runs[0]
+                }
+    return results
+
+
+def print_results(results):
+    print(
+        f"{'endpoint':<14} {'conc.':>6} {'req/s':>9} {'p50 (ms)':>10} "
+        f"{'p95 (ms)':>10} {'p99 (ms)':>10} {'erros':>6}"
+    )
+    for endpoint, levels in results.items():
+        for concurrency, stats in levels.items():
+            print(
+                f"{endpoint:<14} {concurrency:>6} {stats['rps']:>9.1f} "
+                f"{stats['p50']:>10.2f} {stats['p95']:>10.2f} {stats['p99']:>10.2f} "
+                f"{stats['errors']:>6.0f}"
+            )
+
+
+def compare_with_baseline(results, baseline, max_regression):
+    """Compara com o baseline e retorna a lista de regressões encontradas"""
+    regressions = []
+    print(
+        f"\n{'endpoint':<14} {'conc.':>6} {'req/s base':>11} {'req/s':>9} "
+        f"{'p99 base':>9} {'p99':>9}"
+    )
+    for endpoint, levels in results.items():
+        for concurrency, stats in levels.items():
+            base = baseline["results"].get(endpoint, {}).get(concurrency)
+            if base is None:
+                continue
+
+            rps_change = stats["rps"] / base["rps"] - 1
+            p99_change = stats["p99"] / base["p99"] - 1
+            flag = ""
+            if rps_change < -max_regression or p99_change > max_regression:
+                flag = "  ❌"
+                regressions.append(
+                    f"{endpoint} (concorrência {concurrency}): "
+                    f"req/s {rps_change:+.0%}, p99 {p99_change:+.0%}"
+                )
+            print(
+                f"{endpoint:<14} {concurrency:>6} {base['rps']:>11.1f} "
+                f"{stats['rps']:>9.1f} {base['p99']:>9.2f} {stats['p99']:>9.2f}{flag}"
+            )
+            if stats["errors"] > base["errors"]:
+                regressions.append(
+                    f"{endpoint} (concorrência {concurrency}): "
+                    f"{stats['errors']:.0f} erros (baseline {base['errors']:.0f})"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--endpoints", nargs="+", default=ENDPOINTS)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--max-regression", type=float, default=0.25)
+    args = parser.parse_args()
+
+    # Caminhos relativos à pasta de onde o script foi chamado
+    output = args.output.resolve() if args.output else None
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        build_environment()
+        results = asyncio.run(run(args))
+
+    print_results(results)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "requests": args.requests,
+            "repeat": args.repeat,
+            "settings": {name: os.getenv(name) for name in SETTINGS},
+        },
+        "results": results,
+    }
+    if output:
+        output.write_text(json.dumps(report, indent=2))
+        print(f"\nResultados salvos em: {output}")
+
+    if baseline is not None:
+        regressions = compare_with_baseline(results, baseline, args.max_regression)
+        if regressions:
+            print("\n❌ Regressões de desempenho:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print("\n✅ Sem regressões em relação ao baseline")
+
+
+if __name__ == "__main__":
+    main()
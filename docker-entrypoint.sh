@@ -9,8 +9,8 @@ init_pipeline() {
 
 # Função para iniciar API
 start_api() {
-    echo "Iniciando API FastAPI..."
-    exec uvicorn src.api.main:app --host 0.0.0.0 --port 8000
+    echo "Iniciando API FastAPI com ${API_WORKERS:-1} worker(s)..."
+    exec uvicorn src.api.main:app --host 0.0.0.0 --port 8000 --workers "${API_WORKERS:-1}"
 }
 
 # Função para iniciar Dashboard
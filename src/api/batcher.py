@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+from src.api.execution import run_in_thread
+from src.metrics import MICRO_BATCH_QUEUE_SECONDS, MICRO_BATCH_SIZE
+
+
+class MicroBatcher:
+    """Agrupa chamadas concorrentes de /predict em uma única predição vetorizada
+
+    Com o batcher ocioso a requisição é despachada na hora, então sob baixa carga
+    não há espera extra. Enquanto um lote está em execução as novas requisições
+    se acumulam e saem juntas quando o lote termina, quando a janela max_wait_ms
+    expira ou quando max_batch_size é atingido, o que ocorrer primeiro. O tamanho
+    de cada lote e a espera de cada requisição na fila vão para /metrics.
+    """
+
+    def __init__(self, predict_one, predict_batch, max_batch_size=32, max_wait_ms=2.0):
+        self.predict_one = predict_one
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending = []
+        self._timer = None
+        self._in_flight = 0
+        # Mantém referência às tasks para que não sejam coletadas antes de terminar
+        self._tasks = set()
+
+    async def predict(self, features):
+        """Enfileira uma predição e aguarda o resultado do lote em que ela entrou"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((features, future, time.perf_counter()))
+
+        if self._in_flight == 0 or len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch = self._pending[: self.max_batch_size]
+        self._pending = self._pending[self.max_batch_size :]
+        self._in_flight += 1
+
+        dispatched_at = time.perf_counter()
+        MICRO_BATCH_SIZE.observe(len(batch))
+        for _, _, enqueued_at in batch:
+            MICRO_BATCH_QUEUE_SECONDS.observe(dispatched_at - enqueued_at)
+
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        if self._pending and self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.max_wait, self._flush
+            )
+
+    async def _run(self, batch):
+        try:
+            results = await run_in_thread(self._score, [f for f, _, _ in batch])
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._in_flight -= 1
+            # Quem chegou durante o lote já esperou o suficiente
+            if self._pending:
+                self._flush()
+
+    def _score(self, records):
+        # Um único registro segue o caminho individual (cache e tabela pré-calculada)
+        if len(records) == 1:
+            return [self.predict_one(records[0])]
+        predictions, probabilities = self.predict_batch(records)
+        return list(zip(predictions, probabilities))
@@ -0,0 +1,99 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from src.jobs import run_with_progress
+
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", "4"))
+PIPELINE_PROCESSES = int(os.getenv("PIPELINE_PROCESSES", "1"))
+
+_thread_executor = None
+_process_executor = None
+
+
+def get_thread_executor():
+    """Retorna o pool de threads usado para inferência e leituras rápidas"""
+    global _thread_executor
+    if _thread_executor is None:
+        _thread_executor = ThreadPoolExecutor(
+            max_workers=INFERENCE_THREADS, thread_name_prefix="inference"
+        )
+    return _thread_executor
+
+
+def get_process_executor():
+    """Retorna o pool de processos usado para coleta, processamento e treinamento"""
+    global _process_executor
+    if _process_executor is None:
+        # "spawn" evita herdar locks das threads do servidor via fork
+        _process_executor = ProcessPoolExecutor(
+            max_workers=PIPELINE_PROCESSES,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _process_executor
+
+
+async def run_in_thread(fn, *args, **kwargs):
+    """Executa uma função bloqueante no pool de threads sem travar o event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_thread_executor(), partial(fn, *args, **kwargs)
+    )
+
+
+async def run_in_process(fn, *args, **kwargs):
+    """Executa uma função CPU-bound em um processo separado"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_process_executor(), partial(fn, *args, **kwargs)
+    )
+
+
+def shutdown_executors():
+    """Encerra os pools de execução"""
+    global _thread_executor, _process_executor
+    if _thread_executor is not None:
+        _thread_executor.shutdown(wait=False, cancel_futures=True)
+        _thread_executor = None
+    if _process_executor is not None:
+        _process_executor.shutdown(wait=False, cancel_futures=True)
+        _process_executor = None
+
+
+# Tarefas executadas no pool de processos. Precisam ser funções de módulo para
+# serem serializáveis e devolvem apenas resumos, evitando trafegar DataFrames.
+# A duração de cada etapa volta no resumo (stage_seconds), ou no erro se o job
+# falhar ou for cancelado, para ser registrada nas métricas do processo da API.
+
+
+def collect_data_task(job_id):
+    """Coleta os dados do Kaggle e retorna um resumo"""
+    from src.data_collector import DataCollector
+
+    return run_with_progress(
+        job_id, lambda progress: DataCollector().load_and_store_data(progress=progress)
+    )
+
+
+def process_data_task(job_id):
+    """Processa os dados brutos e retorna um resumo"""
+    from src.data_processor import DataProcessor
+
+    def work(progress):
+        df = DataProcessor().process_data(progress=progress)
+        return {"processed_records": len(df), "features": list(df.columns)}
+
+    return run_with_progress(job_id, work)
+
+
+def train_model_task(job_id, table_mode=False, compress_level=0):
+    """Treina e salva o modelo, retornando as métricas"""
+    from src.ml.diabetes_model import DiabetesMLModel
+
+    def work(progress):
+        model = DiabetesMLModel(table_mode=table_mode, compress_level=compress_level)
+        metrics, _, _ = model.train_model(progress=progress)
+        return {name: float(value) for name, value in metrics.items()}
+
+    return run_with_progress(job_id, work)
@@ -0,0 +1,74 @@
+import asyncio
+import time
+import uuid
+
+from src.api.execution import run_in_thread, run_in_process
+from src.database import get_or_create_job, update_job
+from src.jobs import JobCancelledError
+from src.metrics import observe_pipeline_stages
+
+# Mantém referência às tasks para que não sejam coletadas antes de terminar
+_running_tasks = set()
+
+
+async def submit_job(kind, task, on_success=None):
+    """Enfileira um job em segundo plano, reaproveitando um job idêntico em andamento
+
+    A checagem e o registro do job são uma única transação no banco, então o
+    reaproveitamento vale também entre workers da API. Só o worker que registrou
+    o job o executa. Retorna o job registrado e se ele foi reaproveitado (coalescido).
+    """
+    job, created = await run_in_thread(get_or_create_job, uuid.uuid4().hex, kind)
+    if created:
+        job_task = asyncio.create_task(_run_job(job["id"], kind, task, on_success))
+        _running_tasks.add(job_task)
+        job_task.add_done_callback(_running_tasks.discard)
+    return job, not created
+
+
+async def _run_job(job_id, kind, task, on_success):
+    """Executa o job no pool de processos e registra o estado final
+
+    As durações das etapas vão para as métricas em qualquer estado final,
+    rotuladas com o estado (completed, failed ou cancelled).
+    """
+    stage_seconds = None
+    try:
+        result = await run_in_process(task, job_id)
+        stage_seconds = result.get("stage_seconds")
+        if on_success is not None:
+            await on_success()
+    except JobCancelledError as e:
+        observe_pipeline_stages(kind, e.stage_seconds, "cancelled")
+        await run_in_thread(
+            update_job,
+            job_id,
+            state="cancelled",
+            error=str(e),
+            result={"stage_seconds": e.stage_seconds},
+            finished_at=time.time(),
+        )
+    except Exception as e:
+        print(f"Erro no job {job_id}: {e}")
+        # Sem stage_seconds no erro (ex.: processo do pool encerrado), usa o do
+        # resultado, se o job terminou e a falha foi no on_success
+        stage_seconds = getattr(e, "stage_seconds", None) or stage_seconds
+        observe_pipeline_stages(kind, stage_seconds, "failed")
+        await run_in_thread(
+            update_job,
+            job_id,
+            state="failed",
+            error=str(e),
+            result={"stage_seconds": stage_seconds},
+            finished_at=time.time(),
+        )
+    else:
+        observe_pipeline_stages(kind, stage_seconds, "completed")
+        await run_in_thread(
+            update_job,
+            job_id,
+            state="completed",
+            stage="done",
+            result=result,
+            finished_at=time.time(),
+        )
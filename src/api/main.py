@@ -1,22 +1,67 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, UploadFile, File, Query, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from pydantic import BaseModel
 from typing import List, Dict
+import csv
+import os
 import sys
+from functools import partial
 from pathlib import Path
 
 # Adicionar o diretório raiz ao path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from src.data_collector import DataCollector
-from src.data_processor import DataProcessor
 from src.ml.diabetes_model import DiabetesMLModel
-from src.database import get_raw_data, get_processed_data
+from src.ml.prediction_cache import PredictionCache
+from src.ml.model_holder import ModelHolder
+from src.database import (
+    init_database,
+    count_rows,
+    get_class_distribution,
+    get_job,
+    request_job_cancel,
+    fail_interrupted_jobs,
+)
+from src.api.execution import (
+    run_in_thread,
+    shutdown_executors,
+    collect_data_task,
+    process_data_task,
+    train_model_task,
+)
+from src.api.jobs import submit_job
+from src.api.batcher import MicroBatcher
+from src.metrics import registry, MetricsMiddleware, mark_stage
+from src.api.responses import (
+    COLUMNAR_MEDIA_TYPE,
+    FastJSONResponse,
+    render_predictions,
+)
+from src.api.scoring import (
+    age_to_category,
+    risk_level,
+    open_csv_reader,
+    read_header,
+    read_chunk,
+    score_chunk,
+    format_ndjson,
+    format_csv,
+)
 
 app = FastAPI(
     title="Diabetes Prediction API",
     description="API para coleta, processamento e predição de diabetes usando Machine Learning",
     version="1.0.0",
+    default_response_class=FastJSONResponse,
+)
+# Compressão negociada pelo Accept-Encoding, só acima de GZIP_MIN_SIZE bytes
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=int(os.getenv("GZIP_MIN_SIZE", "1024")),
+    compresslevel=int(os.getenv("GZIP_LEVEL", "1")),
 )
+app.add_middleware(MetricsMiddleware)
 
 
 class DiabetesFeatures(BaseModel):
@@ -39,9 +84,72 @@ class PredictionResponse(BaseModel):
     risk_level: str
 
 
-data_collector = DataCollector()
-data_processor = DataProcessor()
-ml_model = DiabetesMLModel()
+class BatchPredictionRequest(BaseModel):
+    records: List[DiabetesFeatures]
+
+
+class BatchPredictionResponse(BaseModel):
+    predictions: List[PredictionResponse]
+    count: int
+
+
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_TABLE = os.getenv("PREDICTION_TABLE", "0") == "1"
+MODEL_COMPRESS_LEVEL = int(os.getenv("MODEL_COMPRESS_LEVEL", "0"))
+FILE_SCORING_CHUNK_SIZE = int(os.getenv("FILE_SCORING_CHUNK_SIZE", "5000"))
+
+prediction_cache = (
+    PredictionCache(
+        max_size=PREDICTION_CACHE_SIZE,
+        ttl_seconds=float(os.getenv("PREDICTION_CACHE_TTL", "3600")),
+        bmi_step=float(os.getenv("PREDICTION_CACHE_BMI_STEP", "0")),
+    )
+    if PREDICTION_CACHE_SIZE > 0
+    else None
+)
+model_holder = ModelHolder(
+    lambda: DiabetesMLModel(
+        inference_mode=os.getenv("INFERENCE_MODE", "sklearn"),
+        prediction_cache=prediction_cache,
+        table_mode=PREDICTION_TABLE,
+    ),
+    warmup_predictions=int(os.getenv("MODEL_WARMUP_PREDICTIONS", "10")),
+    reload_check_seconds=float(os.getenv("MODEL_RELOAD_CHECK_SECONDS", "1")),
+)
+
+# Micro-batching opcional para /predict sob alta concorrência
+micro_batcher = (
+    MicroBatcher(
+        model_holder.predict,
+        model_holder.predict_batch,
+        max_batch_size=int(os.getenv("PREDICT_BATCH_MAX_SIZE", "32")),
+        max_wait_ms=float(os.getenv("PREDICT_BATCH_WAIT_MS", "2")),
+    )
+    if os.getenv("PREDICT_BATCHING", "0") == "1"
+    else None
+)
+
+
+@app.on_event("startup")
+async def startup():
+    """Prepara o banco, encerra jobs órfãos e carrega e aquece o modelo
+
+    O servidor só passa a aceitar conexões depois deste hook, então a primeira
+    requisição já encontra o modelo pronto.
+    """
+    await run_in_thread(init_database)
+    await run_in_thread(fail_interrupted_jobs)
+    try:
+        await run_in_thread(model_holder.refresh)
+    except Exception as e:
+        # Sem modelo válido a API continua no ar para coletar dados e treinar
+        print(f"Erro ao carregar o modelo na inicialização: {e}")
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Encerra os pools de execução ao desligar a API"""
+    shutdown_executors()
 
 
 @app.get("/")
@@ -51,116 +159,229 @@ async def root():
         "message": "API de Predição de Diabetes",
         "version": "1.0.0",
         "endpoints": {
-            "/collect-data": "Coleta dados do Kaggle",
-            "/process-data": "Processa dados brutos",
-            "/train-model": "Treina modelo ML",
+            "/collect-data": "Coleta dados do Kaggle (job em segundo plano)",
+            "/process-data": "Processa dados brutos (job em segundo plano)",
+            "/train-model": "Treina modelo ML (job em segundo plano)",
+            "/jobs/{job_id}": "Status de um job em segundo plano",
             "/predict": "Faz predição de diabetes",
+            "/predict/batch": "Faz predição de diabetes em lote",
+            "/predict/file": "Faz predição para um arquivo CSV (resultado em streaming)",
             "/model-info": "Informações do modelo",
+            "/prediction-cache": "Contadores do cache de predições",
             "/data-stats": "Estatísticas dos dados",
+            "/metrics": "Histogramas de latência no formato do Prometheus",
         },
     }
 
 
-@app.post("/collect-data")
+def job_response(message, job, coalesced):
+    """Monta a resposta padrão de criação de job"""
+    return {
+        "message": message,
+        "job_id": job["id"],
+        "state": job["state"],
+        "coalesced": coalesced,
+    }
+
+
+async def reload_model():
+    """Recarrega na API o modelo salvo pelo job de treinamento"""
+    await run_in_thread(model_holder.refresh)
+
+
+@app.post("/collect-data", status_code=202)
 async def collect_data():
-    """Coleta dados do dataset de diabetes do Kaggle"""
+    """Inicia a coleta do dataset de diabetes do Kaggle em segundo plano"""
     try:
-        df = data_collector.load_and_store_data()
-        return {
-            "message": "Dados coletados com sucesso",
-            "records_count": len(df),
-            "columns": list(df.columns),
-        }
+        job, coalesced = await submit_job("collect-data", collect_data_task)
+        return job_response("Coleta de dados iniciada", job, coalesced)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao coletar dados: {str(e)}")
 
 
-@app.post("/process-data")
+@app.post("/process-data", status_code=202)
 async def process_data():
-    """Processa os dados brutos"""
+    """Inicia o processamento dos dados brutos em segundo plano"""
     try:
-        df = data_processor.process_data()
-        return {
-            "message": "Dados processados com sucesso",
-            "processed_records": len(df),
-            "features": list(df.columns),
-        }
+        job, coalesced = await submit_job("process-data", process_data_task)
+        return job_response("Processamento de dados iniciado", job, coalesced)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Erro ao processar dados: {str(e)}"
         )
 
 
-@app.post("/train-model")
+@app.post("/train-model", status_code=202)
 async def train_model():
-    """Treina o modelo de machine learning"""
+    """Inicia o treinamento do modelo de machine learning em segundo plano"""
     try:
-        metrics, _, _ = ml_model.train_model()
-        return {"message": "Modelo treinado com sucesso", "metrics": metrics}
+        job, coalesced = await submit_job(
+            "train-model",
+            partial(
+                train_model_task,
+                table_mode=PREDICTION_TABLE,
+                compress_level=MODEL_COMPRESS_LEVEL,
+            ),
+            on_success=reload_model,
+        )
+        return job_response("Treinamento do modelo iniciado", job, coalesced)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao treinar modelo: {str(e)}")
 
 
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """Retorna estado, etapa, progresso e resultado de um job"""
+    job = await run_in_thread(get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
+
+
+@app.post("/jobs/{job_id}/cancel", status_code=202)
+async def cancel_job(job_id: str):
+    """Solicita o cancelamento cooperativo de um job"""
+    job = await run_in_thread(get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    if job["state"] in ("queued", "running"):
+        await run_in_thread(request_job_cancel, job_id)
+        job = await run_in_thread(get_job, job_id)
+    return job
+
+
+def features_to_dict(features: DiabetesFeatures):
+    """Prepara o dicionário de features no formato esperado pelo modelo"""
+    return {
+        "highbp": features.highbp,
+        "highchol": features.highchol,
+        "bmi": features.bmi,
+        "smoker": features.smoker,
+        "stroke": features.stroke,
+        "heartdiseaseorattack": features.heartdiseaseorattack,
+        "physactivity": features.physactivity,
+        "genhlth": features.genhlth,
+        "age": age_to_category(features.age),
+        "sex": features.sex,
+        "diffwalk": features.diffwalk,
+    }
+
+
+def build_prediction_response(prediction, probability):
+    """Monta a resposta de predição com o nível de risco"""
+    prob_diabetes = float(probability[1]) if len(probability) > 1 else 0.0
+
+    return {
+        "prediction": int(prediction),
+        "probability": {
+            "não_diabético": float(probability[0]),
+            "diabético": prob_diabetes,
+        },
+        "risk_level": risk_level(prob_diabetes),
+    }
+
+
 @app.post("/predict", response_model=PredictionResponse)
 async def predict_diabetes(features: DiabetesFeatures):
     """Faz predição de diabetes baseada nas características fornecidas"""
+    mark_stage("validate")
     try:
-        # Converter idade real para categoria (aproximação)
-        age_category = min(13, max(1, (features.age - 18) // 5 + 1))
-
-        # Preparar dados para predição
-        feature_dict = {
-            "highbp": features.highbp,
-            "highchol": features.highchol,
-            "bmi": features.bmi,
-            "smoker": features.smoker,
-            "stroke": features.stroke,
-            "heartdiseaseorattack": features.heartdiseaseorattack,
-            "physactivity": features.physactivity,
-            "genhlth": features.genhlth,
-            "age": age_category,
-            "sex": features.sex,
-            "diffwalk": features.diffwalk,
-        }
-
-        prediction, probability = ml_model.predict(feature_dict)
+        feature_dict = features_to_dict(features)
+        mark_stage("feature_build")
 
-        # Determinar nível de risco
-        prob_diabetes = probability[1] if len(probability) > 1 else 0
-        if prob_diabetes < 0.3:
-            risk_level = "Baixo"
-        elif prob_diabetes < 0.7:
-            risk_level = "Moderado"
+        if micro_batcher is not None:
+            prediction, probability = await micro_batcher.predict(feature_dict)
         else:
-            risk_level = "Alto"
-
-        return PredictionResponse(
-            prediction=int(prediction),
-            probability={
-                "não_diabético": float(probability[0]),
-                "diabético": float(probability[1]) if len(probability) > 1 else 0.0,
-            },
-            risk_level=risk_level,
+            prediction, probability = await run_in_thread(
+                model_holder.predict, feature_dict
+            )
+        mark_stage("inference")
+
+        # Retornar a resposta pronta evita a revalidação pelo response_model
+        return FastJSONResponse(build_prediction_response(prediction, probability))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro na predição: {str(e)}")
+
+
+@app.post(
+    "/predict/batch",
+    response_model=BatchPredictionResponse,
+    responses={200: {"content": {COLUMNAR_MEDIA_TYPE: {}}}},
+)
+async def predict_diabetes_batch(batch: BatchPredictionRequest, request: Request):
+    """Faz predição de diabetes para vários pacientes em uma única chamada
+
+    Com `Accept: application/vnd.diabetes.columnar+json` a resposta vem em colunas
+    (uma lista por campo) em vez de uma lista de objetos.
+    """
+    mark_stage("validate")
+    try:
+        records = [features_to_dict(features) for features in batch.records]
+        mark_stage("feature_build")
+
+        predictions, probabilities = await run_in_thread(
+            model_holder.predict_batch, records
+        )
+        mark_stage("inference")
+
+        return render_predictions(request, predictions, probabilities)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Erro na predição em lote: {str(e)}"
         )
+
+
+FILE_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+@app.post("/predict/file")
+async def predict_diabetes_file(
+    file: UploadFile = File(...),
+    output_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    chunk_size: int = Query(FILE_SCORING_CHUNK_SIZE, ge=1, le=100000),
+):
+    """Pontua um CSV em blocos e devolve os resultados em streaming (NDJSON ou CSV)"""
+    reader = open_csv_reader(file.file)
+    try:
+        header = await run_in_thread(read_header, reader)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"CSV inválido: {str(e)}")
+
+    try:
+        # Um único modelo para o arquivo inteiro, mesmo que haja recarga no meio
+        model = await run_in_thread(model_holder.get)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro na predição: {str(e)}")
 
+    formatter = format_csv if output_format == "csv" else format_ndjson
+
+    async def stream_results():
+        if output_format == "csv":
+            yield formatter([], include_header=True)
+        while True:
+            try:
+                rows = await run_in_thread(read_chunk, reader, chunk_size)
+            except (UnicodeDecodeError, csv.Error) as e:
+                # O restante do arquivo não pode ser lido; reporta e encerra
+                yield formatter([{"line": reader.line_num, "error": str(e)}])
+                break
+            if not rows:
+                break
+            results = await run_in_thread(score_chunk, model, header, rows)
+            yield formatter(results)
+
+    return StreamingResponse(
+        stream_results(), media_type=FILE_MEDIA_TYPES[output_format]
+    )
+
 
 @app.get("/model-info")
 async def get_model_info():
     """Retorna informações sobre o modelo"""
     try:
-        if ml_model.load_model():
-            feature_importance = ml_model.get_feature_importance()
-            return {
-                "model_type": "Random Forest Classifier",
-                "features": ml_model.feature_names,
-                "feature_importance": (
-                    feature_importance.to_dict("records")
-                    if feature_importance is not None
-                    else None
-                ),
-            }
+        model_info = await run_in_thread(model_holder.get_info)
+        if model_info is not None:
+            return model_info
         else:
             return {"message": "Modelo não encontrado. Treine o modelo primeiro."}
     except Exception as e:
@@ -169,22 +390,27 @@ async def get_model_info():
         )
 
 
+@app.get("/prediction-cache")
+async def get_prediction_cache_stats():
+    """Retorna os contadores do cache de predições"""
+    if prediction_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **prediction_cache.get_stats()}
+
+
 @app.get("/data-stats")
 async def get_data_stats():
     """Retorna estatísticas dos dados"""
     try:
-        # Dados brutos
-        raw_data = get_raw_data()
-        processed_data = get_processed_data()
-
         stats = {
-            "raw_data_count": len(raw_data),
-            "processed_data_count": len(processed_data),
+            "raw_data_count": await run_in_thread(count_rows, "raw_data"),
+            "processed_data_count": await run_in_thread(count_rows, "processed_data"),
         }
 
-        if not processed_data.empty:
-            diabetes_distribution = processed_data["diabetes"].value_counts().to_dict()
-            stats["diabetes_distribution"] = diabetes_distribution
+        if stats["processed_data_count"] > 0:
+            stats["diabetes_distribution"] = await run_in_thread(
+                get_class_distribution, "processed_data"
+            )
 
         return stats
     except Exception as e:
@@ -193,13 +419,38 @@ async def get_data_stats():
         )
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Expõe os histogramas de latência no formato texto do Prometheus"""
+    if not registry.enabled:
+        raise HTTPException(status_code=404, detail="Métricas desabilitadas")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/health")
 async def health_check():
-    """Endpoint para verificação de saúde da API"""
-    return {"status": "healthy", "message": "API funcionando normalmente"}
+    """Endpoint para verificação de saúde da API, com o estado de prontidão do modelo"""
+    ready = model_holder.is_ready()
+    return {
+        "status": "healthy",
+        "message": (
+            "API funcionando normalmente"
+            if ready
+            else "API no ar, mas sem modelo carregado. Treine o modelo primeiro."
+        ),
+        "ready": ready,
+        "model_load_seconds": model_holder.load_seconds,
+        "warmup_seconds": model_holder.warmup_seconds,
+    }
 
 
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Com mais de um worker o uvicorn precisa da aplicação como string de import
+    uvicorn.run(
+        "src.api.main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.getenv("API_WORKERS", "1")),
+    )
@@ -0,0 +1,96 @@
+import json
+
+import numpy as np
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # sem orjson as respostas usam o json da biblioteca padrão
+    orjson = None
+
+# Formato colunar: listas paralelas em vez de uma lista de objetos
+COLUMNAR_MEDIA_TYPE = "application/vnd.diabetes.columnar+json"
+
+RISK_THRESHOLDS = [0.3, 0.7]
+RISK_LEVELS = np.array(["Baixo", "Moderado", "Alto"])
+
+
+def dumps(content):
+    """Serializa content em JSON (bytes UTF-8), com orjson quando disponível"""
+    if orjson is not None:
+        # Chaves não-string aparecem em /data-stats (distribuição por classe)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode(
+        "utf-8"
+    )
+
+
+class FastJSONResponse(Response):
+    """Resposta JSON que serializa direto, sem passar pelo jsonable_encoder"""
+
+    media_type = "application/json"
+
+    def render(self, content):
+        return dumps(content)
+
+
+def risk_levels(prob_diabetes):
+    """Versão vetorizada de scoring.risk_level"""
+    return RISK_LEVELS[np.searchsorted(RISK_THRESHOLDS, prob_diabetes, side="right")]
+
+
+def _split_probabilities(probabilities):
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    prob_no = probabilities[:, 0]
+    if probabilities.shape[1] > 1:
+        prob_yes = probabilities[:, 1]
+    else:
+        prob_yes = np.zeros(len(probabilities))
+    return prob_no, prob_yes
+
+
+def prediction_rows(predictions, probabilities):
+    """Uma entrada por paciente, no mesmo formato de PredictionResponse"""
+    prob_no, prob_yes = _split_probabilities(probabilities)
+    return [
+        {
+            "prediction": prediction,
+            "probability": {"não_diabético": no, "diabético": yes},
+            "risk_level": level,
+        }
+        for prediction, no, yes, level in zip(
+            np.asarray(predictions).astype(int).tolist(),
+            prob_no.tolist(),
+            prob_yes.tolist(),
+            risk_levels(prob_yes).tolist(),
+        )
+    ]
+
+
+def prediction_columns(predictions, probabilities):
+    """Uma lista por campo, com os nomes de coluna da saída CSV de /predict/file"""
+    prob_no, prob_yes = _split_probabilities(probabilities)
+    return {
+        "prediction": np.asarray(predictions).astype(int).tolist(),
+        "prob_nao_diabetico": prob_no.tolist(),
+        "prob_diabetico": prob_yes.tolist(),
+        "risk_level": risk_levels(prob_yes).tolist(),
+    }
+
+
+def wants_columnar(request):
+    """Verifica se o cliente pediu o formato colunar no cabeçalho Accept"""
+    return COLUMNAR_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def render_predictions(request, predictions, probabilities):
+    """Monta a resposta de predição em lote no formato negociado pelo Accept"""
+    count = len(predictions)
+    if wants_columnar(request):
+        return FastJSONResponse(
+            {**prediction_columns(predictions, probabilities), "count": count},
+            media_type=COLUMNAR_MEDIA_TYPE,
+        )
+    return FastJSONResponse(
+        {"predictions": prediction_rows(predictions, probabilities), "count": count}
+    )
@@ -0,0 +1,189 @@
+import csv
+import io
+
+import numpy as np
+import pandas as pd
+
+from src.api.responses import dumps
+
+INT_COLUMNS = [
+    "highbp",
+    "highchol",
+    "smoker",
+    "stroke",
+    "heartdiseaseorattack",
+    "physactivity",
+    "genhlth",
+    "age",
+    "sex",
+    "diffwalk",
+]
+FLOAT_COLUMNS = ["bmi"]
+FEATURE_COLUMNS = INT_COLUMNS + FLOAT_COLUMNS
+
+# Coluna opcional devolvida junto do resultado para o parceiro casar as linhas
+ID_COLUMN = "id"
+
+CSV_OUTPUT_COLUMNS = [
+    "line",
+    ID_COLUMN,
+    "prediction",
+    "prob_nao_diabetico",
+    "prob_diabetico",
+    "risk_level",
+    "error",
+]
+
+
+def age_to_category(age):
+    """Converte idade real para categoria (aproximação)"""
+    return min(13, max(1, (age - 18) // 5 + 1))
+
+
+def age_to_category_array(ages):
+    """Versão vetorizada de age_to_category"""
+    return np.clip((ages - 18) // 5 + 1, 1, 13)
+
+
+def risk_level(prob_diabetes):
+    """Classifica a probabilidade de diabetes em nível de risco"""
+    if prob_diabetes < 0.3:
+        return "Baixo"
+    elif prob_diabetes < 0.7:
+        return "Moderado"
+    return "Alto"
+
+
+def open_csv_reader(binary_file):
+    """Lê o upload como texto sem carregá-lo inteiro em memória"""
+    text = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    return csv.reader(text)
+
+
+def read_header(reader):
+    """Lê o cabeçalho e valida que todas as features estão presentes"""
+    header = next(reader, None)
+    if header is None:
+        raise ValueError("Arquivo CSV vazio")
+
+    header = [name.strip().lower() for name in header]
+    missing = [name for name in FEATURE_COLUMNS if name not in header]
+    if missing:
+        raise ValueError(f"Colunas ausentes no CSV: {', '.join(missing)}")
+    return header
+
+
+def read_chunk(reader, chunk_size):
+    """Lê até chunk_size linhas de dados, ignorando linhas em branco"""
+    rows = []
+    for values in reader:
+        if not values or (len(values) == 1 and not values[0].strip()):
+            continue
+        rows.append((reader.line_num, values))
+        if len(rows) >= chunk_size:
+            break
+    return rows
+
+
+def parse_chunk(header, rows):
+    """Converte um bloco de linhas em matriz de features e mensagens de erro por linha
+
+    A conversão é feita por coluna com pandas, então o custo por linha fica fora
+    do Python; apenas as linhas inválidas são examinadas individualmente.
+    """
+    n_columns = len(header)
+    errors = [None] * len(rows)
+    well_formed = []
+    for position, (_, values) in enumerate(rows):
+        if len(values) == n_columns:
+            well_formed.append(position)
+        else:
+            errors[position] = f"esperado {n_columns} campos, encontrado {len(values)}"
+
+    frame = pd.DataFrame(
+        [rows[position][1] for position in well_formed], columns=header
+    )
+    X = np.empty((len(well_formed), len(FEATURE_COLUMNS)), dtype=np.float64)
+    invalid = np.zeros(X.shape, dtype=bool)
+    for column, name in enumerate(FEATURE_COLUMNS):
+        values = pd.to_numeric(frame[name], errors="coerce").to_numpy(
+            dtype=np.float64, na_value=np.nan
+        )
+        X[:, column] = values
+        invalid[:, column] = ~np.isfinite(values)
+        if name in INT_COLUMNS:
+            invalid[:, column] |= values != np.floor(values)
+
+    for row in np.flatnonzero(invalid.any(axis=1)):
+        names = [FEATURE_COLUMNS[column] for column in np.flatnonzero(invalid[row])]
+        errors[well_formed[row]] = f"valores inválidos em: {', '.join(names)}"
+
+    valid = ~invalid.any(axis=1)
+    valid_positions = [well_formed[row] for row in np.flatnonzero(valid)]
+    return X[valid], valid_positions, errors
+
+
+def score_chunk(model, header, rows):
+    """Valida e pontua um bloco de linhas em uma única chamada vetorizada"""
+    id_position = header.index(ID_COLUMN) if ID_COLUMN in header else None
+
+    results = []
+    for line_number, values in rows:
+        result = {"line": line_number}
+        if id_position is not None and id_position < len(values):
+            result[ID_COLUMN] = values[id_position]
+        results.append(result)
+
+    X, valid_positions, errors = parse_chunk(header, rows)
+    for result, error in zip(results, errors):
+        if error is not None:
+            result["error"] = error
+
+    if valid_positions:
+        age_position = FEATURE_COLUMNS.index("age")
+        X[:, age_position] = age_to_category_array(X[:, age_position])
+
+        # Reordena as colunas na ordem usada no treino do modelo
+        order = [FEATURE_COLUMNS.index(name) for name in model.feature_names]
+        predictions, probabilities = model.predict_batch(X[:, order])
+
+        for position, prediction, probability in zip(
+            valid_positions, predictions.tolist(), probabilities.tolist()
+        ):
+            prob_diabetes = probability[1] if len(probability) > 1 else 0.0
+            result = results[position]
+            result["prediction"] = int(prediction)
+            result["probability"] = {
+                "não_diabético": probability[0],
+                "diabético": prob_diabetes,
+            }
+            result["risk_level"] = risk_level(prob_diabetes)
+
+    return results
+
+
+def format_ndjson(results):
+    """Serializa os resultados como NDJSON (um objeto JSON por linha)"""
+    return b"".join(dumps(result) + b"\n" for result in results)
+
+
+def format_csv(results, include_header=False):
+    """Serializa os resultados como CSV com colunas fixas"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if include_header:
+        writer.writerow(CSV_OUTPUT_COLUMNS)
+    for result in results:
+        probability = result.get("probability", {})
+        writer.writerow(
+            [
+                result["line"],
+                result.get(ID_COLUMN, ""),
+                result.get("prediction", ""),
+                probability.get("não_diabético", ""),
+                probability.get("diabético", ""),
+                result.get("risk_level", ""),
+                result.get("error", ""),
+            ]
+        )
+    return buffer.getvalue()
@@ -0,0 +1,55 @@
+"""Publicação atômica de arquivos e diretórios
+
+O conteúdo é montado em um temporário no mesmo diretório do destino e renomeado
+com os.replace no final, então quem lê o destino vê a versão anterior inteira ou
+a nova inteira. Se a escrita falhar, o temporário é apagado e o destino não muda.
+"""
+
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+# mkstemp/mkdtemp criam com 0600/0700; os volumes de modelos e dados são lidos
+# por outros serviços
+FILE_MODE = 0o644
+DIRECTORY_MODE = 0o755
+
+
+@contextmanager
+def atomic_file(path, mode="wb"):
+    """Abre um temporário que substitui path ao sair do bloco sem erro"""
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, mode) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.chmod(tmp_path, FILE_MODE)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+@contextmanager
+def atomic_directory(directory):
+    """Cria um diretório temporário publicado como directory ao sair do bloco
+
+    Falha se directory já existir com arquivos, em vez de sobrescrevê-lo.
+    """
+    directory = Path(directory)
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(dir=directory.parent, prefix=f".{directory.name}."))
+    try:
+        yield tmp_dir
+        os.chmod(tmp_dir, DIRECTORY_MODE)
+        os.replace(tmp_dir, directory)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
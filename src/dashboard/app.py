@@ -4,11 +4,12 @@ import plotly.express as px
 import plotly.graph_objects as go
 import requests
 import sys
+import time
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-from src.database import get_raw_data, get_processed_data
+from src.database import get_raw_data, get_processed_data, count_rows
 from src.ml.diabetes_model import DiabetesMLModel
 
 st.set_page_config(
@@ -30,7 +31,7 @@ def call_api_endpoint(endpoint, method="GET", data=None):
         else:
             response = requests.get(url)
 
-        if response.status_code == 200:
+        if response.status_code in (200, 202):
             return response.json()
         else:
             st.error(f"Erro na API: {response.status_code}")
@@ -40,6 +41,28 @@ def call_api_endpoint(endpoint, method="GET", data=None):
         return None
 
 
+def wait_for_job(job, poll_interval=1.0):
+    """Acompanha um job em segundo plano da API até que ele termine"""
+    if job.get("coalesced"):
+        st.info("Já existe uma execução em andamento; acompanhando o mesmo job.")
+
+    status = st.empty()
+    while True:
+        job = call_api_endpoint(f"jobs/{job['job_id']}")
+        if job is None:
+            return None
+
+        if job["state"] not in ("queued", "running"):
+            status.empty()
+            return job
+
+        status.info(
+            f"⏳ {job['state']} · etapa: {job['stage'] or '-'} · "
+            f"{job['rows_processed']} registros · {job['elapsed_seconds']:.0f}s"
+        )
+        time.sleep(poll_interval)
+
+
 def main():
     st.title("🩺 Dashboard - Predição de Diabetes")
     st.markdown("---")
@@ -78,7 +101,9 @@ def show_overview():
     api_status = call_api_endpoint("health")
 
     with col1:
-        if api_status:
+        if api_status and not api_status.get("ready", True):
+            st.warning("⚠️ API Online, sem modelo carregado")
+        elif api_status:
             st.success("✅ API Online")
         else:
             st.error("❌ API Offline")
@@ -88,15 +113,13 @@ def show_overview():
         if stats:
             st.metric("Registros Brutos", stats.get("raw_data_count", 0))
         else:
-            raw_data = get_raw_data()
-            st.metric("Registros Brutos", len(raw_data))
+            st.metric("Registros Brutos", count_rows("raw_data"))
 
     with col3:
         if stats:
             st.metric("Registros Processados", stats.get("processed_data_count", 0))
         else:
-            processed_data = get_processed_data()
-            st.metric("Registros Processados", len(processed_data))
+            st.metric("Registros Processados", count_rows("processed_data"))
 
     st.markdown("---")
 
@@ -136,23 +159,27 @@ def show_data_collection():
 
     with col1:
         if st.button("🔄 Coletar Dados do Kaggle", type="primary"):
-            with st.spinner("Coletando dados..."):
-                result = call_api_endpoint("collect-data", "POST")
-                if result:
-                    st.success("Dados coletados com sucesso!")
-                    st.json(result)
-                else:
-                    st.error("Erro ao coletar dados via API. Tentando localmente...")
+            job = call_api_endpoint("collect-data", "POST")
+            job = wait_for_job(job) if job else None
+            if job and job["state"] == "completed":
+                st.success("Dados coletados com sucesso!")
+                st.json(job["result"])
+            else:
+                st.error("Erro ao coletar dados via API.")
+                if job:
+                    st.write(job.get("error"))
 
     with col2:
         if st.button("⚙️ Processar Dados", type="secondary"):
-            with st.spinner("Processando dados..."):
-                result = call_api_endpoint("process-data", "POST")
-                if result:
-                    st.success("Dados processados com sucesso!")
-                    st.json(result)
-                else:
-                    st.error("Erro ao processar dados via API.")
+            job = call_api_endpoint("process-data", "POST")
+            job = wait_for_job(job) if job else None
+            if job and job["state"] == "completed":
+                st.success("Dados processados com sucesso!")
+                st.json(job["result"])
+            else:
+                st.error("Erro ao processar dados via API.")
+                if job:
+                    st.write(job.get("error"))
 
     st.subheader("📊 Status dos Dados")
 
@@ -257,24 +284,26 @@ def show_model_info():
 
     with col1:
         if st.button("🚀 Treinar Modelo", type="primary"):
-            with st.spinner("Treinando modelo Random Forest..."):
-                result = call_api_endpoint("train-model", "POST")
-                if result:
-                    st.success("Modelo treinado com sucesso!")
-
-                    metrics = result.get("metrics", {})
-                    col_a, col_b, col_c, col_d = st.columns(4)
-
-                    with col_a:
-                        st.metric("Acurácia", f"{metrics.get('accuracy', 0):.4f}")
-                    with col_b:
-                        st.metric("Precisão", f"{metrics.get('precision', 0):.4f}")
-                    with col_c:
-                        st.metric("Recall", f"{metrics.get('recall', 0):.4f}")
-                    with col_d:
-                        st.metric("F1-Score", f"{metrics.get('f1', 0):.4f}")
-                else:
-                    st.error("Erro ao treinar modelo via API.")
+            job = call_api_endpoint("train-model", "POST")
+            job = wait_for_job(job) if job else None
+            if job and job["state"] == "completed":
+                st.success("Modelo treinado com sucesso!")
+
+                metrics = job.get("result") or {}
+                col_a, col_b, col_c, col_d = st.columns(4)
+
+                with col_a:
+                    st.metric("Acurácia", f"{metrics.get('accuracy', 0):.4f}")
+                with col_b:
+                    st.metric("Precisão", f"{metrics.get('precision', 0):.4f}")
+                with col_c:
+                    st.metric("Recall", f"{metrics.get('recall', 0):.4f}")
+                with col_d:
+                    st.metric("F1-Score", f"{metrics.get('f1', 0):.4f}")
+            else:
+                st.error("Erro ao treinar modelo via API.")
+                if job:
+                    st.write(job.get("error"))
 
     with col2:
         st.write("**Configurações do Modelo:**")
@@ -1,30 +1,55 @@
-import requests
 import zipfile
 import pandas as pd
 import os
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from src.database import insert_raw_data, init_database
+from src.data_schema import RAW_DATA_COLUMNS, detect_layout, read_options, to_raw_data
+from src.database import (
+    fingerprint_migration_pending,
+    get_source_batch,
+    init_database,
+    insert_raw_data_chunks,
+    migrate_raw_data_fingerprints,
+)
+from src.download_cache import DownloadCache, file_sha256
+from src.synthetic_data import SYNTHETIC_CHUNK_SIZE, SYNTHETIC_WORKERS
+from src.synthetic_data import write_csv as write_synthetic_csv
+
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "50000"))
+# 1: lê o CSV direto de dentro do ZIP; 0: extrai para data/ antes de ler
+INGEST_FROM_ZIP = os.getenv("INGEST_FROM_ZIP", "1") == "1"
+# Nome do CSV dentro do ZIP; vazio usa a regra de select_csv_member
+DATASET_CSV_MEMBER = os.getenv("DATASET_CSV_MEMBER", "")
+DATASET_URL = os.getenv(
+    "KAGGLE_DATASET_URL",
+    "https://www.kaggle.com/api/v1/datasets/download/mohankrishnathalla/diabetes-health-indicators-dataset",
+)
 
 
 class DataCollector:
-    def __init__(self):
-        self.dataset_url = "https://www.kaggle.com/api/v1/datasets/download/mohankrishnathalla/diabetes-health-indicators-dataset"
+    def __init__(
+        self,
+        chunk_size=INGEST_CHUNK_SIZE,
+        from_zip=INGEST_FROM_ZIP,
+        csv_member=DATASET_CSV_MEMBER,
+    ):
+        self.dataset_url = DATASET_URL
         self.data_dir = Path("data")
         self.data_dir.mkdir(exist_ok=True)
+        self.download_cache = DownloadCache(self.data_dir / "cache")
+        # Linhas do CSV lidas por vez na ingestão (0 lê o arquivo inteiro)
+        self.chunk_size = chunk_size
+        self.from_zip = from_zip
+        self.csv_member = csv_member
 
     def download_dataset(self):
-        """Baixa o dataset do Kaggle"""
+        """Baixa o dataset do Kaggle, reaproveitando o cache se nada mudou"""
         try:
             print("Baixando dataset do Kaggle...")
-            response = requests.get(self.dataset_url, stream=True)
-            response.raise_for_status()
-
-            zip_path = self.data_dir / "diabetes_dataset.zip"
-            with open(zip_path, "wb") as file:
-                for chunk in response.iter_content(chunk_size=8192):
-                    file.write(chunk)
-
-            print("Dataset baixado com sucesso!")
+            zip_path, changed = self.download_cache.fetch(self.dataset_url, ".zip")
+            if changed:
+                print("Dataset baixado com sucesso!")
             return zip_path
         except Exception as e:
             print(f"Erro ao baixar dataset: {e}")
@@ -32,159 +57,203 @@ class DataCollector:
             # return self.create_sample_data()
 
     def extract_csv(self, zip_path):
-        """Extrai o arquivo CSV do ZIP"""
+        """Extrai o arquivo CSV do ZIP, se este mesmo ZIP ainda não foi extraído"""
         try:
+            cached = self.download_cache.get_metadata()
+            if cached is None or cached["file"] != Path(zip_path).name:
+                cached = None
+            elif "csv_file" in cached:
+                csv_path = self.data_dir / cached["csv_file"]
+                if csv_path.exists() and csv_path.stat().st_size == cached["csv_size"]:
+                    print("CSV deste arquivo já extraído; pulando a extração")
+                    return csv_path
+
             with zipfile.ZipFile(zip_path, "r") as zip_ref:
-                zip_ref.extractall(self.data_dir)
+                member = self.select_csv_member(zip_ref)
+                csv_path = Path(zip_ref.extract(member, self.data_dir))
 
-            csv_files = list(self.data_dir.glob("*.csv"))
-            if csv_files:
-                return csv_files[0]
-            else:
-                raise FileNotFoundError("Nenhum arquivo CSV encontrado no ZIP")
+            if cached is not None:
+                self.download_cache.update_metadata(
+                    csv_file=member, csv_size=csv_path.stat().st_size
+                )
+            return csv_path
         except Exception as e:
             print(f"Erro ao extrair CSV: {e}")
             raise e
             # return self.create_sample_data()
 
-    def create_sample_data(self):
-        """Cria dados de exemplo para demonstração"""
-        print("Criando dados de exemplo...")
-        import numpy as np
-
-        n_samples = 1000
-        np.random.seed(42)
-
-        data = {
-            "Diabetes_012": np.random.choice([0, 1, 2], n_samples, p=[0.7, 0.2, 0.1]),
-            "HighBP": np.random.choice([0, 1], n_samples, p=[0.6, 0.4]),
-            "HighChol": np.random.choice([0, 1], n_samples, p=[0.6, 0.4]),
-            "CholCheck": np.random.choice([0, 1], n_samples, p=[0.2, 0.8]),
-            "BMI": np.random.normal(25, 5, n_samples).clip(15, 50),
-            "Smoker": np.random.choice([0, 1], n_samples, p=[0.7, 0.3]),
-            "Stroke": np.random.choice([0, 1], n_samples, p=[0.9, 0.1]),
-            "HeartDiseaseorAttack": np.random.choice([0, 1], n_samples, p=[0.8, 0.2]),
-            "PhysActivity": np.random.choice([0, 1], n_samples, p=[0.4, 0.6]),
-            "Fruits": np.random.choice([0, 1], n_samples, p=[0.5, 0.5]),
-            "Veggies": np.random.choice([0, 1], n_samples, p=[0.3, 0.7]),
-            "HvyAlcoholConsump": np.random.choice([0, 1], n_samples, p=[0.9, 0.1]),
-            "AnyHealthcare": np.random.choice([0, 1], n_samples, p=[0.1, 0.9]),
-            "NoDocbcCost": np.random.choice([0, 1], n_samples, p=[0.8, 0.2]),
-            "GenHlth": np.random.choice([1, 2, 3, 4, 5], n_samples),
-            "MentHlth": np.random.randint(0, 31, n_samples),
-            "PhysHlth": np.random.randint(0, 31, n_samples),
-            "DiffWalk": np.random.choice([0, 1], n_samples, p=[0.8, 0.2]),
-            "Sex": np.random.choice([0, 1], n_samples, p=[0.5, 0.5]),
-            "Age": np.random.choice(range(1, 14), n_samples),
-            "Education": np.random.choice(range(1, 7), n_samples),
-            "Income": np.random.choice(range(1, 9), n_samples),
-        }
+    def select_csv_member(self, zip_ref):
+        """Escolhe o CSV do ZIP: csv_member, se definido, ou o maior CSV do arquivo"""
+        if self.csv_member:
+            if self.csv_member not in zip_ref.namelist():
+                raise FileNotFoundError(f"{self.csv_member} não encontrado no ZIP")
+            return self.csv_member
+
+        # Ignora diretórios e metadados do macOS (__MACOSX/._arquivo.csv)
+        candidates = [
+            info
+            for info in zip_ref.infolist()
+            if not info.is_dir()
+            and info.filename.lower().endswith(".csv")
+            and not info.filename.startswith("__MACOSX/")
+        ]
+        if not candidates:
+            raise FileNotFoundError("Nenhum arquivo CSV encontrado no ZIP")
+        member = max(candidates, key=lambda info: info.file_size).filename
+        if len(candidates) > 1:
+            print(f"ZIP com {len(candidates)} CSVs; usando o maior: {member}")
+        return member
+
+    @contextmanager
+    def open_csv(self, source):
+        """Abre o CSV para leitura: arquivo em disco ou membro do ZIP, sem extrair"""
+        if not str(source).endswith(".zip"):
+            yield source
+            return
 
-        df = pd.DataFrame(data)
-        csv_path = self.data_dir / "diabetes_health_indicators.csv"
-        df.to_csv(csv_path, index=False)
+        with zipfile.ZipFile(source, "r") as zip_ref:
+            with zip_ref.open(self.select_csv_member(zip_ref)) as csv_file:
+                yield csv_file
+
+    def create_sample_data(self, n_samples=1000, seed=42, schema="Diabetes_012"):
+        """Cria dados de exemplo para demonstração (ver src/synthetic_data.py)"""
+        print("Criando dados de exemplo...")
+        csv_path = write_synthetic_csv(
+            self.data_dir / "diabetes_health_indicators.csv",
+            n_samples,
+            seed=seed,
+            schema=schema,
+            workers=1 if n_samples <= SYNTHETIC_CHUNK_SIZE else SYNTHETIC_WORKERS,
+        )
         print(f"Dados de exemplo salvos em: {csv_path}")
         return csv_path
 
-    def load_and_store_data(self):
-        """Processo completo: baixar, extrair e armazenar dados"""
+    def read_chunks(self, source, layout, columns):
+        """Lê o CSV (ou o CSV dentro do ZIP) em blocos, já no formato de raw_data
+
+        Das colunas do arquivo (columns), só as usadas pelo layout são lidas, com
+        dtypes compactos.
+        """
+        options = read_options(layout, columns)
+
+        with self.open_csv(source) as csv_file:
+            if not self.chunk_size:
+                yield to_raw_data(pd.read_csv(csv_file, **options), layout)
+                return
+
+            with pd.read_csv(csv_file, chunksize=self.chunk_size, **options) as reader:
+                for chunk in reader:
+                    yield to_raw_data(chunk, layout)
+
+    def source_sha256(self, path):
+        """SHA-256 do arquivo de origem, reaproveitando o do cache de download"""
+        cached = self.download_cache.get_metadata()
+        if cached is not None and cached["file"] == Path(path).name:
+            return cached["sha256"]
+        return file_sha256(path)
+
+    def load_and_store_data(self, progress=None):
+        """Processo completo: baixar, extrair e armazenar dados
+
+        O CSV é lido e inserido em blocos, então a memória usada não depende do
+        tamanho do arquivo. Com from_zip, os blocos saem direto do ZIP, sem uma
+        cópia descompactada em disco. A ingestão é idempotente: um arquivo de
+        origem já registrado em source_batches não é lido de novo, e de um arquivo
+        alterado só entram as linhas que ainda não estão em raw_data. Retorna um
+        resumo da ingestão.
+        """
         init_database()
 
+        if progress:
+            progress("download")
         zip_path = self.download_dataset()
-        if str(zip_path).endswith(".zip"):
-            csv_path = self.extract_csv(zip_path)
-        else:
-            csv_path = zip_path
-
-        df = pd.read_csv(csv_path)
-        print(f"Dataset carregado com {len(df)} registros e {len(df.columns)} colunas")
-        print(f"🔍 Colunas disponíveis: {list(df.columns)}")
-
-        if "diagnosed_diabetes" in df.columns:
-            column_mapping = {
-                "diagnosed_diabetes": "diabetes",
-                "hypertension_history": "highbp",
-                "cholesterol_total": "highchol",
-                "bmi": "bmi",
-                "smoking_status": "smoker",
-                "cardiovascular_history": "stroke",
-                "cardiovascular_history": "heartdiseaseorattack",
-                "physical_activity_minutes_per_week": "physactivity",
-                "diet_score": "genhlth",
-                "age": "age",
-                "gender": "sex",
+        source_sha256 = self.source_sha256(zip_path)
+        batch = get_source_batch(source_sha256)
+        if batch is not None:
+            print(
+                f"♻️ Arquivo de origem já ingerido em {batch['loaded_at']} "
+                f"(lote {batch['id']}); nada a inserir"
+            )
+            return {
+                "records_count": 0,
+                "rows_read": 0,
+                "source_sha256": source_sha256,
+                "source_batch_id": batch["id"],
+                "unchanged_source": True,
+                "columns": RAW_DATA_COLUMNS,
+                "rows_per_second": 0.0,
             }
 
-            for old_col, new_col in column_mapping.items():
-                if old_col in df.columns:
-                    df[new_col] = df[old_col]
-
-            if "diabetes" in df.columns:
-                df["diabetes"] = df["diabetes"].astype(int)
-            if "smoker" in df.columns:
-                df["smoker"] = (df["smoker"] == "current_smoker").astype(int)
-            if "physactivity" in df.columns:
-                df["physactivity"] = (df["physactivity"] > 150).astype(int)
-            if "genhlth" in df.columns:
-                # Normalizar diet_score (0-10) para genhlth (1-5)
-                df["genhlth"] = ((df["genhlth"] / 2) + 1).clip(1, 5).round().astype(int)
-            if "sex" in df.columns:
-                df["sex"] = (df["sex"] == "male").astype(int)
-
-            # Criar colunas ausentes com valores derivados ou padrão
-            if "cholcheck" not in df.columns:
-                df["cholcheck"] = 1
-            if "diffwalk" not in df.columns:
-                df["diffwalk"] = 0
-
+        if str(zip_path).endswith(".zip") and not self.from_zip:
+            if progress:
+                progress("extract")
+            source = self.extract_csv(zip_path)
         else:
-            original_mapping = {
-                "Diabetes_012": "diabetes",
-                "HighBP": "highbp",
-                "HighChol": "highchol",
-                "CholCheck": "cholcheck",
-                "BMI": "bmi",
-                "Smoker": "smoker",
-                "Stroke": "stroke",
-                "HeartDiseaseorAttack": "heartdiseaseorattack",
-                "PhysActivity": "physactivity",
-                "GenHlth": "genhlth",
-                "Sex": "sex",
-                "Age": "age",
-                "DiffWalk": "diffwalk",
-            }
+            # CSV em disco, ou ZIP lido direto pelo parser em blocos
+            source = zip_path
 
-            for old_col, new_col in original_mapping.items():
-                if old_col in df.columns:
-                    df[new_col] = df[old_col]
-
-        required_columns = [
-            "diabetes",
-            "highbp",
-            "highchol",
-            "bmi",
-            "smoker",
-            "stroke",
-            "heartdiseaseorattack",
-            "physactivity",
-            "genhlth",
-            "age",
-            "sex",
-            "diffwalk",
-        ]
+        if fingerprint_migration_pending():
+            # raw_data anterior às impressões digitais: migrado uma única vez, aqui
+            # no job de coleta, e não na inicialização da API
+            if progress:
+                progress("migrate")
+            migrate_raw_data_fingerprints()
 
-        for col in required_columns:
-            # Se a coluna não existir, cria com valor zerado
-            if col not in df.columns:
-                df[col] = 0
+        if progress:
+            progress("read_csv", rows_processed=0)
+        with self.open_csv(source) as csv_file:
+            columns = pd.read_csv(csv_file, nrows=0).columns
+        print(f"🔍 Colunas disponíveis: {list(columns)}")
+        layout = detect_layout(columns)
+        print(f"🧩 Layout do dataset: {layout}")
 
-        df_final = df[required_columns + ["cholcheck"]].copy()
+        started = time.perf_counter()
 
-        print(
-            f"✅ Dataset final: {len(df_final)} registros com {len(df_final.columns)} colunas"
+        def report(rows):
+            rate = rows / (time.perf_counter() - started)
+            print(f"📥 {rows} registros lidos ({rate:.0f} linhas/s)")
+            if progress:
+                progress("to_sql", rows_processed=rows)
+
+        def staged(chunks):
+            # Leitura e inserção se alternam a cada bloco: o parse de um bloco conta
+            # em read_csv e a gravação dele (e a cópia final) em to_sql
+            chunks = iter(chunks)
+            while True:
+                progress("read_csv")
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                progress("to_sql")
+                yield chunk
+            progress("to_sql")
+
+        chunks = self.read_chunks(source, layout, columns)
+        result = insert_raw_data_chunks(
+            staged(chunks) if progress else chunks,
+            on_chunk=report,
+            source={
+                "sha256": source_sha256,
+                "name": Path(zip_path).name,
+                "layout": layout,
+            },
         )
+        elapsed = time.perf_counter() - started
+        rows_read = result["rows_read"]
+        rows_per_second = rows_read / elapsed if elapsed > 0 else 0.0
 
-        insert_raw_data(df_final)
+        print(
+            f"✅ Dataset final: {rows_read} registros lidos em {elapsed:.1f} s "
+            f"({rows_per_second:.0f} linhas/s), {result['rows_inserted']} novos"
+        )
         print("Dados brutos inseridos no banco de dados!")
 
-        return df_final
+        return {
+            "records_count": result["rows_inserted"],
+            "rows_read": rows_read,
+            "source_sha256": source_sha256,
+            "source_batch_id": result["source_batch_id"],
+            "unchanged_source": False,
+            "columns": RAW_DATA_COLUMNS,
+            "rows_per_second": rows_per_second,
+        }
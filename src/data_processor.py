@@ -1,27 +1,37 @@
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import StandardScaler
-from src.database import get_raw_data, insert_processed_data
+from src.database import get_raw_data, insert_processed_data, get_class_means
+from src.feature_store import FeatureStore
 
 
 class DataProcessor:
-    def __init__(self):
+    def __init__(self, feature_store=None):
         self.scaler = StandardScaler()
+        self.feature_store = feature_store or FeatureStore()
 
-    def process_data(self):
+    def process_data(self, progress=None):
         """Processa os dados brutos e salva os dados processados"""
+        if progress:
+            progress("load")
         df = get_raw_data()
 
         if df.empty:
             raise ValueError("Nenhum dado bruto encontrado no banco de dados")
 
         print(f"Processando {len(df)} registros...")
+        if progress:
+            progress("process", rows_processed=len(df))
 
         if "id" in df.columns:
             df = df.drop("id", axis=1)
         if "created_at" in df.columns:
             df = df.drop("created_at", axis=1)
 
+        # Sem o rótulo a linha não serve para o treino; a comparação abaixo
+        # transformaria o nulo em 0 (não diabético) antes do dropna
+        df = df.dropna(subset=["diabetes"])
+
         # Converter diabetes para binário (0: não diabético, 1: diabético/pré-diabético)
         df["diabetes"] = (df["diabetes"] > 0).astype(int)
 
@@ -80,26 +90,36 @@ class DataProcessor:
             f"Dados processados: {len(df_processed)} registros com {len(df_processed.columns)} features"
         )
 
+        if progress:
+            progress("to_sql", rows_processed=len(df_processed))
         insert_processed_data(df_processed)
+
+        # Snapshot colunar lido pelo treino (processed_data continua para as estatísticas)
+        if progress:
+            progress("feature_store", rows_processed=len(df_processed))
+        manifest = self.feature_store.write(df_processed, source={"raw_rows": len(df)})
+        print(f"Feature store: versão {manifest['version']}")
         return df_processed
 
     def get_feature_importance_data(self):
         """Retorna dados formatados para análise de importância das features"""
-        df = get_raw_data()
-        if df.empty:
+        class_means = get_class_means(
+            ["bmi", "age", "highbp", "highchol", "smoker"], table="raw_data"
+        )
+        if not class_means:
             return None
 
         stats = {}
         for diabetes_class in [0, 1, 2]:
-            class_data = df[df["diabetes"] == diabetes_class]
-            if not class_data.empty:
+            class_data = class_means.get(diabetes_class)
+            if class_data:
                 stats[f"diabetes_{diabetes_class}"] = {
-                    "count": len(class_data),
-                    "avg_bmi": class_data["bmi"].mean(),
-                    "avg_age": class_data["age"].mean(),
-                    "highbp_rate": class_data["highbp"].mean(),
-                    "highchol_rate": class_data["highchol"].mean(),
-                    "smoker_rate": class_data["smoker"].mean(),
+                    "count": class_data["count"],
+                    "avg_bmi": class_data["bmi"],
+                    "avg_age": class_data["age"],
+                    "highbp_rate": class_data["highbp"],
+                    "highchol_rate": class_data["highchol"],
+                    "smoker_rate": class_data["smoker"],
                 }
 
         return stats
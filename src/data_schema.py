@@ -0,0 +1,166 @@
+"""Layouts de origem do dataset e a conversão de cada um para raw_data
+
+Cada layout declara as colunas do CSV que interessam, com um dtype compacto, e
+como cada coluna de raw_data sai delas. O read_csv recebe usecols e dtype a
+partir daqui, então as demais colunas do arquivo nunca são materializadas.
+"""
+
+import pandas as pd
+
+RAW_DATA_COLUMNS = [
+    "diabetes",
+    "highbp",
+    "highchol",
+    "bmi",
+    "smoker",
+    "stroke",
+    "heartdiseaseorattack",
+    "physactivity",
+    "genhlth",
+    "age",
+    "sex",
+    "diffwalk",
+    "cholcheck",
+]
+
+# float32 guarda ~7 dígitos significativos: arredondar ao converter de volta
+# para float64 devolve o valor escrito no CSV (ex.: 27.3, e não 27.299999)
+FLOAT32_DECIMALS = 5
+
+
+def _equals(value):
+    """Flag 0/1 que indica se a coluna é igual a value"""
+    return lambda column: (column == value).astype("int8")
+
+
+def _greater_than(threshold):
+    """Flag 0/1 que indica se a coluna passa de threshold"""
+    return lambda column: (column > threshold).astype("int8")
+
+
+def _to_int8(column):
+    """Inteiros lidos como float (ex.: 1.0); com nulos, mantém o float"""
+    return column if column.hasnans else column.astype("int8")
+
+
+def _to_int16(column):
+    """Como _to_int8, para inteiros que não cabem em int8"""
+    return column if column.hasnans else column.astype("int16")
+
+
+def _diet_score_to_genhlth(column):
+    """Normaliza diet_score (0-10) para genhlth (1-5)"""
+    return _to_int8(((column / 2) + 1).clip(1, 5).round())
+
+
+SOURCE_LAYOUTS = {
+    # Dataset atual do Kaggle (diagnosed_diabetes, hypertension_history, ...)
+    "diagnosed_diabetes": {
+        # Inteiros lidos como float32 (exato até 2**24) para que uma célula vazia
+        # vire NaN em vez de abortar o read_csv; a conversão para inteiro é feita
+        # depois, só nas colunas sem nulos, e o processamento descarta as linhas
+        # com NaN (dropna).
+        "dtypes": {
+            "diagnosed_diabetes": "float32",
+            "hypertension_history": "float32",
+            "cholesterol_total": "float32",
+            "bmi": "float32",
+            "smoking_status": "category",
+            "cardiovascular_history": "float32",
+            "physical_activity_minutes_per_week": "float32",
+            # float64: o arredondamento para genhlth é sensível à precisão
+            "diet_score": "float64",
+            "age": "float32",
+            "gender": "category",
+        },
+        # coluna de raw_data: (coluna do CSV, conversão) ou valor fixo; colunas
+        # ausentes aqui ou no arquivo ficam com 0. stroke não tem origem neste
+        # layout (cardiovascular_history alimenta heartdiseaseorattack).
+        "columns": {
+            "diabetes": ("diagnosed_diabetes", _to_int8),
+            "highbp": ("hypertension_history", _to_int8),
+            "highchol": ("cholesterol_total", _to_int16),
+            "bmi": ("bmi", None),
+            "smoker": ("smoking_status", _equals("current_smoker")),
+            "heartdiseaseorattack": ("cardiovascular_history", _to_int8),
+            "physactivity": (
+                "physical_activity_minutes_per_week",
+                _greater_than(150),
+            ),
+            "genhlth": ("diet_score", _diet_score_to_genhlth),
+            "age": ("age", _to_int8),
+            "sex": ("gender", _equals("male")),
+            "diffwalk": 0,
+            "cholcheck": 1,
+        },
+    },
+    # Formato original do BRFSS (Diabetes_012, HighBP, ...), com valores como 1.0
+    "Diabetes_012": {
+        "dtypes": {
+            "Diabetes_012": "float32",
+            "HighBP": "float32",
+            "HighChol": "float32",
+            "CholCheck": "float32",
+            "BMI": "float32",
+            "Smoker": "float32",
+            "Stroke": "float32",
+            "HeartDiseaseorAttack": "float32",
+            "PhysActivity": "float32",
+            "GenHlth": "float32",
+            "Sex": "float32",
+            "Age": "float32",
+            "DiffWalk": "float32",
+        },
+        "columns": {
+            "diabetes": ("Diabetes_012", _to_int8),
+            "highbp": ("HighBP", _to_int8),
+            "highchol": ("HighChol", _to_int8),
+            "cholcheck": ("CholCheck", _to_int8),
+            "bmi": ("BMI", None),
+            "smoker": ("Smoker", _to_int8),
+            "stroke": ("Stroke", _to_int8),
+            "heartdiseaseorattack": ("HeartDiseaseorAttack", _to_int8),
+            "physactivity": ("PhysActivity", _to_int8),
+            "genhlth": ("GenHlth", _to_int8),
+            "sex": ("Sex", _to_int8),
+            "age": ("Age", _to_int8),
+            "diffwalk": ("DiffWalk", _to_int8),
+        },
+    },
+}
+
+
+def detect_layout(columns):
+    """Identifica o layout pelo cabeçalho do CSV"""
+    if "diagnosed_diabetes" in columns:
+        return "diagnosed_diabetes"
+    return "Diabetes_012"
+
+
+def read_options(layout, columns):
+    """Argumentos usecols e dtype do read_csv para um arquivo com estas colunas"""
+    dtypes = {
+        name: dtype
+        for name, dtype in SOURCE_LAYOUTS[layout]["dtypes"].items()
+        if name in columns
+    }
+    return {"usecols": list(dtypes), "dtype": dtypes}
+
+
+def to_raw_data(df, layout):
+    """Converte um bloco lido com read_options para as colunas de raw_data"""
+    spec = SOURCE_LAYOUTS[layout]["columns"]
+    raw = pd.DataFrame(index=df.index)
+    for column in RAW_DATA_COLUMNS:
+        source = spec.get(column, 0)
+        if isinstance(source, tuple):
+            name, convert = source
+            if name in df.columns:
+                raw[column] = convert(df[name]) if convert else df[name]
+                continue
+            source = 0
+        raw[column] = source
+
+    for column in raw.columns[raw.dtypes == "float32"]:
+        raw[column] = raw[column].astype("float64").round(FLOAT32_DECIMALS)
+    return raw
@@ -1,14 +1,58 @@
-import sqlite3
+import os
+import json
+import time
+from itertools import chain
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from src.data_schema import RAW_DATA_COLUMNS
+from src.db_connections import ConnectionManager
 
-DATABASE_PATH = Path("data/diabetes_db.sqlite")
+DATABASE_PATH = Path(os.getenv("DATABASE_PATH", "data/diabetes_db.sqlite"))
+# 1: abre o banco somente para leitura (dashboard)
+DATABASE_READONLY = os.getenv("DATABASE_READONLY", "0") == "1"
+
+connections = ConnectionManager(DATABASE_PATH, readonly=DATABASE_READONLY)
+
+DATA_TABLES = ("raw_data", "processed_data")
+# Linhas por lote de executemany na carga em massa
+BULK_INSERT_BATCH_SIZE = int(os.getenv("BULK_INSERT_BATCH_SIZE", "100000"))
+# Linhas por INSERT ... VALUES (...), (...); limitado a 999 parâmetros por
+# statement, o máximo das versões antigas do SQLite
+BULK_INSERT_ROWS_PER_STATEMENT = 32
+SQLITE_MAX_VARIABLES = 999
+# Índice único das impressões digitais; em um raw_data anterior a elas, só é
+# criado quando a migração termina (ver migrate_raw_data_fingerprints)
+FINGERPRINT_INDEX = "idx_raw_data_fingerprint"
+CREATE_FINGERPRINT_INDEX = (
+    f"CREATE UNIQUE INDEX IF NOT EXISTS {FINGERPRINT_INDEX} "
+    "ON raw_data (row_hash, row_occurrence)"
+)
 
 
 def init_database():
     """Inicializa o banco de dados com as tabelas necessárias"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    connections.write(_create_tables)
+
+
+def _index_exists(conn, name):
+    """Indica se o índice existe no banco"""
+    return (
+        conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)
+        ).fetchone()
+        is not None
+    )
+
+
+def _create_tables(conn):
     cursor = conn.cursor()
+    new_raw_data = (
+        conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'raw_data'"
+        ).fetchone()
+        is None
+    )
 
     # Tabela para raw_data
     cursor.execute(
@@ -37,7 +81,28 @@ def init_database():
             age INTEGER,
             education INTEGER,
             income INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            row_hash INTEGER,
+            row_occurrence INTEGER,
+            source_batch_id INTEGER
+        )
+    """
+    )
+    _add_raw_data_fingerprint_columns(conn)
+    if new_raw_data:
+        cursor.execute(CREATE_FINGERPRINT_INDEX)
+
+    # Tabela para os arquivos de origem já ingeridos em raw_data
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS source_batches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source_sha256 TEXT NOT NULL UNIQUE,
+            source_name TEXT,
+            layout TEXT,
+            rows_read INTEGER,
+            rows_inserted INTEGER,
+            loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     """
     )
@@ -78,55 +143,528 @@ def init_database():
     """
     )
 
-    conn.commit()
-    conn.close()
+    # Tabela para jobs em segundo plano (coleta, processamento e treinamento)
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            state TEXT NOT NULL,
+            stage TEXT,
+            rows_processed INTEGER DEFAULT 0,
+            result TEXT,
+            error TEXT,
+            cancel_requested INTEGER DEFAULT 0,
+            created_at REAL,
+            started_at REAL,
+            finished_at REAL
+        )
+    """
+    )
 
 
 def get_connection():
-    """Retorna uma conexão com o banco de dados"""
-    return sqlite3.connect(DATABASE_PATH)
+    """Abre uma conexão nova com os pragmas do banco (o chamador fecha)"""
+    return connections.connect()
+
+
+def _bindable(values):
+    """Array da coluna com valores que o sqlite3 grava direto após tolist()
+
+    Colunas numéricas ficam como estão (NaN vira NULL no SQLite); as demais
+    viram object, com None nos valores ausentes.
+    """
+    series = pd.Series(values, copy=False)
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in "biuf":
+        return series.to_numpy()
+    return series.astype(object).where(series.notna(), None).to_numpy()
+
+
+def _insert_rows(conn, table, data, batch_size=BULK_INSERT_BATCH_SIZE):
+    """Insere as colunas de data (DataFrame ou dict de arrays) com executemany
+
+    Converte cada coluna para valores Python uma vez por lote (tolist) e grava
+    várias linhas por statement, o que reduz o custo por linha do sqlite3.
+    Não abre transação: rode dentro de uma. Retorna o número de linhas.
+    """
+    names = list(data.keys())
+    if not names:
+        return 0
+    arrays = [_bindable(data[name]) for name in names]
+    n_rows = len(arrays[0]) if arrays else 0
+    row = f"({', '.join('?' * len(names))})"
+    insert = f"INSERT INTO {table} ({', '.join(names)}) VALUES "
+    per_statement = max(
+        1, min(BULK_INSERT_ROWS_PER_STATEMENT, SQLITE_MAX_VARIABLES // len(names))
+    )
+    width = per_statement * len(names)
+    statement = insert + ", ".join([row] * per_statement)
+
+    for start in range(0, n_rows, batch_size):
+        columns = [values[start : start + batch_size].tolist() for values in arrays]
+        flat = list(chain.from_iterable(zip(*columns)))
+        full = len(flat) - len(flat) % width
+        conn.executemany(
+            statement, (flat[i : i + width] for i in range(0, full, width))
+        )
+        if full < len(flat):
+            tail_rows = (len(flat) - full) // len(names)
+            conn.execute(insert + ", ".join([row] * tail_rows), flat[full:])
+    return n_rows
+
+
+def _drop_indexes(conn, table):
+    """Remove os índices criados para a tabela e retorna o SQL para recriá-los"""
+    indexes = conn.execute(
+        "SELECT name, sql FROM sqlite_master "
+        "WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table,),
+    ).fetchall()
+    for name, _ in indexes:
+        conn.execute(f"DROP INDEX {name}")
+    return [sql for _, sql in indexes]
+
 
+def _create_indexes(conn, indexes):
+    """Recria os índices com a ordenação em arquivo temporário, fora da memória"""
+    if not indexes:
+        return
+    temp_store = conn.execute("PRAGMA temp_store").fetchone()[0]
+    conn.execute("PRAGMA temp_store = FILE")
+    try:
+        for sql in indexes:
+            conn.execute(sql)
+    finally:
+        conn.execute(f"PRAGMA temp_store = {temp_store}")
 
-def insert_raw_data(df):
+
+def bulk_insert(table, data, rebuild_indexes=False, batch_size=BULK_INSERT_BATCH_SIZE):
+    """Insere colunas NumPy (DataFrame ou dict de arrays) em uma única transação
+
+    Com rebuild_indexes=True, os índices da tabela são removidos antes da carga e
+    recriados no final, na mesma transação. Construir o índice de uma vez, com as
+    linhas ordenadas, sai mais barato que mantê-lo a cada linha quando a carga é
+    grande em relação à tabela. Retorna o número de linhas inseridas.
+    """
+    if table not in DATA_TABLES:
+        raise ValueError(f"Tabela inválida: {table}")
+
+    def load(conn):
+        indexes = _drop_indexes(conn, table) if rebuild_indexes else []
+        n_rows = _insert_rows(conn, table, data, batch_size)
+        _create_indexes(conn, indexes)
+        return n_rows
+
+    return connections.write(load)
+
+
+def insert_raw_data(df, rebuild_indexes=False):
     """Insere dados brutos no banco"""
+    return bulk_insert("raw_data", df, rebuild_indexes=rebuild_indexes)
+
+
+def row_hashes(df):
+    """Hash de 64 bits do conteúdo de cada linha nas colunas de raw_data
+
+    Os valores são normalizados para float64, então 1 (int8) e 1.0 (float) geram
+    o mesmo hash. Linhas idênticas têm o mesmo hash; a impressão digital da linha
+    é o par (row_hash, row_occurrence), em que row_occurrence numera as repetições
+    dentro do arquivo de origem.
+    """
+    values = df[RAW_DATA_COLUMNS].astype("float64")
+    return pd.util.hash_pandas_object(values, index=False).to_numpy().view("int64")
+
+
+def _add_raw_data_fingerprint_columns(conn):
+    """Adiciona as colunas de impressão digital a um raw_data criado antes delas
+
+    ALTER TABLE ADD COLUMN só altera o schema, então a inicialização continua
+    rápida. As linhas existentes recebem os valores depois, na próxima ingestão
+    (migrate_raw_data_fingerprints), e não no startup de cada worker da API.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(raw_data)")}
+    for column in ("row_hash", "row_occurrence", "source_batch_id"):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE raw_data ADD COLUMN {column} INTEGER")
+
+
+def fingerprint_migration_pending():
+    """Indica se raw_data ainda não passou por migrate_raw_data_fingerprints"""
+    return not _index_exists(connections.reader(), FINGERPRINT_INDEX)
+
+
+def migrate_raw_data_fingerprints(batch_size=BULK_INSERT_BATCH_SIZE):
+    """Calcula a impressão digital das linhas de um raw_data anterior a ela
+
+    Sem o índice único, nenhuma linha foi ingerida com impressão digital, então
+    todas são numeradas aqui, como se viessem de um único arquivo. Os hashes e a
+    numeração ficam em tabelas temporárias da própria conexão (em arquivo), e
+    raw_data é atualizado em transações de batch_size linhas, para não segurar o
+    banco: a API continua gravando jobs durante a migração. O índice é criado no
+    final e marca a migração como concluída; se ela for interrompida, a próxima
+    ingestão recomeça do zero.
+    """
+    if not fingerprint_migration_pending():
+        return
+
+    print("Migrando raw_data: calculando a impressão digital das linhas...")
     conn = get_connection()
-    df.to_sql("raw_data", conn, if_exists="append", index=False)
-    conn.close()
+    try:
+        conn.execute("PRAGMA temp_store = FILE")
+        conn.execute(
+            "CREATE TEMP TABLE raw_data_hashes "
+            "(id INTEGER PRIMARY KEY, row_hash INTEGER)"
+        )
+        query = f"SELECT id, {', '.join(RAW_DATA_COLUMNS)} FROM raw_data ORDER BY id"
+        for chunk in pd.read_sql_query(query, conn, chunksize=batch_size):
+            _insert_rows(
+                conn,
+                "raw_data_hashes",
+                {"id": chunk["id"].to_numpy(), "row_hash": row_hashes(chunk)},
+            )
+        conn.execute(
+            "CREATE INDEX temp.idx_raw_data_hashes_hash "
+            "ON raw_data_hashes (row_hash)"
+        )
+        conn.execute(
+            "CREATE TEMP TABLE raw_data_fingerprints "
+            "(id INTEGER PRIMARY KEY, row_hash INTEGER, row_occurrence INTEGER)"
+        )
+        conn.execute(
+            "INSERT INTO raw_data_fingerprints SELECT id, row_hash, ROW_NUMBER() "
+            "OVER (PARTITION BY row_hash ORDER BY id) FROM raw_data_hashes "
+            "ORDER BY id"
+        )
+        low, high = conn.execute(
+            "SELECT MIN(id), MAX(id) FROM raw_data_fingerprints"
+        ).fetchone()
+        conn.commit()
 
+        def update_batch(start):
+            return lambda conn: conn.execute(
+                "UPDATE raw_data SET (row_hash, row_occurrence) = "
+                "(SELECT row_hash, row_occurrence FROM raw_data_fingerprints f "
+                "WHERE f.id = raw_data.id) WHERE id >= ? AND id < ?",
+                (start, start + batch_size),
+            )
 
-def insert_processed_data(df):
-    """Insere dados processados no banco"""
+        if low is not None:
+            for start in range(low, high + 1, batch_size):
+                connections.write(update_batch(start), conn=conn)
+        connections.write(
+            lambda conn: _create_indexes(conn, [CREATE_FINGERPRINT_INDEX]), conn=conn
+        )
+    finally:
+        conn.close()
+    print("Migração de raw_data concluída")
+
+
+def _fetch_dict(cursor):
+    """Próxima linha do cursor como dict, ou None
+
+    A conexão de leitura é compartilhada pela thread, então o row_factory dela
+    não é alterado.
+    """
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return dict(zip([column[0] for column in cursor.description], row))
+
+
+def get_source_batch(source_sha256):
+    """Retorna o registro de source_batches de um arquivo já ingerido, ou None"""
+    cursor = connections.reader().execute(
+        "SELECT * FROM source_batches WHERE source_sha256 = ?", (source_sha256,)
+    )
+    return _fetch_dict(cursor)
+
+
+def insert_raw_data_chunks(
+    chunks, on_chunk=None, source=None, deduplicate=True, rebuild_indexes=False
+):
+    """Insere blocos de dados brutos em raw_data em uma única transação
+
+    Os blocos vão primeiro para uma tabela temporária (em arquivo temporário do
+    SQLite, fora da memória) e são copiados para raw_data de uma vez no final:
+    a tabela recebe tudo ou nada, e o banco principal não fica bloqueado durante
+    a leitura, o que permite atualizar o job a cada bloco. on_chunk recebe o total
+    de linhas lidas até o momento.
+
+    A cópia ignora as linhas cuja impressão digital (row_hash, row_occurrence) já
+    está em raw_data, então reingerir um arquivo só acrescenta as linhas novas.
+    source (sha256, name, layout) é registrado em source_batches na mesma
+    transação. Retorna as linhas lidas, as inseridas e o id do lote.
+
+    Com deduplicate=False as linhas entram sem impressão digital (para fontes já
+    identificadas só pelo source, como os dados sintéticos). Nesse caso,
+    rebuild_indexes=True remove os índices de raw_data durante a cópia e os recria
+    no final (ver bulk_insert); com deduplicate=True o índice único é necessário na
+    cópia e fica.
+    """
+    migrate_raw_data_fingerprints()
     conn = get_connection()
-    df.to_sql("processed_data", conn, if_exists="append", index=False)
-    conn.close()
+    try:
+        conn.execute("PRAGMA temp_store = FILE")
+        # Cache maior para o índice único de raw_data, que recebe hashes fora de
+        # ordem na cópia final
+        conn.execute("PRAGMA cache_size = -65536")
+        total = 0
+        names = None
+        for chunk in chunks:
+            if names is None:
+                columns = list(chunk.columns)
+                names = ", ".join(columns)
+                conn.execute(
+                    f"CREATE TEMP TABLE raw_data_staging AS "
+                    f"SELECT {names}, row_hash FROM raw_data WHERE 0"
+                )
+            rows = chunk[columns]
+            if deduplicate:
+                rows = rows.assign(row_hash=row_hashes(chunk))
+            _insert_rows(conn, "raw_data_staging", rows)
+            total += len(chunk)
+            if on_chunk:
+                on_chunk(total)
+
+        if names is not None and deduplicate:
+            # Só as linhas repetidas no arquivo precisam de row_occurrence > 1. O
+            # índice em arquivo temporário acha os hashes repetidos e entrega cada
+            # grupo já em ordem de rowid, sem guardar os hashes do arquivo em memória
+            conn.execute(
+                "CREATE INDEX temp.idx_raw_data_staging_hash "
+                "ON raw_data_staging (row_hash)"
+            )
+            conn.execute(
+                "CREATE TEMP TABLE raw_data_occurrences "
+                "(staging_id INTEGER PRIMARY KEY, row_occurrence INTEGER)"
+            )
+            conn.execute(
+                "INSERT INTO raw_data_occurrences SELECT rowid, ROW_NUMBER() OVER "
+                "(PARTITION BY row_hash ORDER BY rowid) FROM raw_data_staging "
+                "WHERE row_hash IN (SELECT row_hash FROM raw_data_staging "
+                "GROUP BY row_hash HAVING COUNT(*) > 1) "
+                "ORDER BY rowid"
+            )
+        # As tabelas temporárias sobrevivem ao commit; a cópia abre a própria transação
+        conn.commit()
+
+        def copy_to_raw_data(conn):
+            batch_id = None
+            inserted = 0
+            if source is not None:
+                batch_id = conn.execute(
+                    "INSERT INTO source_batches (source_sha256, source_name, layout, "
+                    "rows_read) VALUES (?, ?, ?, ?)",
+                    (source["sha256"], source.get("name"), source.get("layout"), total),
+                ).lastrowid
+            if names is not None and not deduplicate:
+                indexes = _drop_indexes(conn, "raw_data") if rebuild_indexes else []
+                inserted = conn.execute(
+                    f"INSERT INTO raw_data ({names}, source_batch_id) "
+                    f"SELECT {names}, ? FROM raw_data_staging ORDER BY rowid",
+                    (batch_id,),
+                ).rowcount
+                _create_indexes(conn, indexes)
+            elif names is not None:
+                inserted = conn.execute(
+                    f"INSERT OR IGNORE INTO raw_data "
+                    f"({names}, row_hash, row_occurrence, source_batch_id) "
+                    f"SELECT {names}, row_hash, COALESCE(o.row_occurrence, 1), ? "
+                    f"FROM raw_data_staging s "
+                    f"LEFT JOIN raw_data_occurrences o ON o.staging_id = s.rowid "
+                    f"ORDER BY s.rowid",
+                    (batch_id,),
+                ).rowcount
+            if batch_id is not None:
+                conn.execute(
+                    "UPDATE source_batches SET rows_inserted = ? WHERE id = ?",
+                    (inserted, batch_id),
+                )
+            return batch_id, inserted
+
+        batch_id, inserted = connections.write(copy_to_raw_data, conn=conn)
+    finally:
+        conn.close()
+    return {"rows_read": total, "rows_inserted": inserted, "source_batch_id": batch_id}
+
+
+def insert_processed_data(df, rebuild_indexes=False):
+    """Insere dados processados no banco"""
+    return bulk_insert("processed_data", df, rebuild_indexes=rebuild_indexes)
 
 
 def get_raw_data():
     """Recupera dados brutos do banco"""
-    conn = get_connection()
-    df = pd.read_sql_query("SELECT * FROM raw_data", conn)
-    conn.close()
-    return df
+    return pd.read_sql_query("SELECT * FROM raw_data", connections.reader())
 
 
 def get_processed_data():
     """Recupera dados processados do banco"""
-    conn = get_connection()
-    df = pd.read_sql_query("SELECT * FROM processed_data", conn)
-    conn.close()
-    return df
+    return pd.read_sql_query("SELECT * FROM processed_data", connections.reader())
+
+
+def count_rows(table):
+    """Conta os registros de uma tabela de dados sem carregá-la em memória"""
+    if table not in DATA_TABLES:
+        raise ValueError(f"Tabela inválida: {table}")
+    return connections.reader().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def get_class_distribution(table="processed_data"):
+    """Retorna a contagem de registros por classe de diabetes"""
+    if table not in DATA_TABLES:
+        raise ValueError(f"Tabela inválida: {table}")
+    rows = (
+        connections.reader()
+        .execute(
+            f"SELECT diabetes, COUNT(*) AS n FROM {table} "
+            "GROUP BY diabetes ORDER BY n DESC"
+        )
+        .fetchall()
+    )
+    return {diabetes: count for diabetes, count in rows}
+
+
+def get_class_means(columns, table="raw_data"):
+    """Retorna contagem e médias das colunas por classe de diabetes"""
+    if table not in DATA_TABLES:
+        raise ValueError(f"Tabela inválida: {table}")
+    conn = connections.reader()
+    valid_columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    invalid = [column for column in columns if column not in valid_columns]
+    if invalid:
+        raise ValueError(f"Colunas inválidas: {invalid}")
+
+    averages = ", ".join(f"AVG({column})" for column in columns)
+    rows = conn.execute(
+        f"SELECT diabetes, COUNT(*), {averages} FROM {table} "
+        "GROUP BY diabetes ORDER BY diabetes"
+    ).fetchall()
+    return {row[0]: {"count": row[1], **dict(zip(columns, row[2:]))} for row in rows}
 
 
 def save_model_metrics(metrics):
     """Salva métricas do modelo no banco"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        """
-        INSERT INTO model_metrics (accuracy, precision_score, recall, f1_score)
-        VALUES (?, ?, ?, ?)
-    """,
-        (metrics["accuracy"], metrics["precision"], metrics["recall"], metrics["f1"]),
+    connections.write(
+        lambda conn: conn.execute(
+            """
+            INSERT INTO model_metrics (accuracy, precision_score, recall, f1_score)
+            VALUES (?, ?, ?, ?)
+        """,
+            (
+                metrics["accuracy"],
+                metrics["precision"],
+                metrics["recall"],
+                metrics["f1"],
+            ),
+        )
+    )
+
+
+JOB_ACTIVE_STATES = ("queued", "running")
+ACTIVE_JOB_QUERY = (
+    "SELECT * FROM jobs WHERE kind = ? AND state IN (?, ?) "
+    "ORDER BY created_at DESC LIMIT 1"
+)
+
+
+def _insert_job(conn, job_id, kind):
+    conn.execute(
+        "INSERT INTO jobs (id, kind, state, created_at) VALUES (?, ?, 'queued', ?)",
+        (job_id, kind, time.time()),
+    )
+
+
+def create_job(job_id, kind):
+    """Registra um novo job na fila"""
+    connections.write(lambda conn: _insert_job(conn, job_id, kind))
+
+
+def get_or_create_job(job_id, kind):
+    """Retorna o job em andamento do tipo ou registra um novo com job_id
+
+    A consulta e a inserção rodam na mesma transação BEGIN IMMEDIATE, então
+    requisições simultâneas, mesmo em workers diferentes da API, nunca criam
+    dois jobs do mesmo tipo. Retorna (job, criado).
+    """
+
+    def claim(conn):
+        job = _fetch_dict(conn.execute(ACTIVE_JOB_QUERY, (kind, *JOB_ACTIVE_STATES)))
+        if job is not None:
+            return job, False
+        _insert_job(conn, job_id, kind)
+        return (
+            _fetch_dict(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))),
+            True,
+        )
+
+    job, created = connections.write(claim)
+    return _row_to_job(job), created
+
+
+def update_job(job_id, **fields):
+    """Atualiza campos de um job (state, stage, rows_processed, result, error...)"""
+    if "result" in fields:
+        fields["result"] = json.dumps(fields["result"])
+    assignments = ", ".join(f"{name} = ?" for name in fields)
+    connections.write(
+        lambda conn: conn.execute(
+            f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id)
+        )
+    )
+
+
+def _row_to_job(job):
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    job["cancel_requested"] = bool(job["cancel_requested"])
+    if job["started_at"] is None:
+        job["elapsed_seconds"] = 0.0
+    else:
+        job["elapsed_seconds"] = (job["finished_at"] or time.time()) - job["started_at"]
+    return job
+
+
+def get_job(job_id):
+    """Recupera um job pelo id"""
+    job = _fetch_dict(
+        connections.reader().execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+    )
+    return _row_to_job(job) if job else None
+
+
+def get_active_job(kind):
+    """Retorna o job ainda em andamento de um tipo, se houver"""
+    job = _fetch_dict(
+        connections.reader().execute(ACTIVE_JOB_QUERY, (kind, *JOB_ACTIVE_STATES))
+    )
+    return _row_to_job(job) if job else None
+
+
+def request_job_cancel(job_id):
+    """Marca um job para cancelamento cooperativo"""
+    connections.write(
+        lambda conn: conn.execute(
+            "UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,)
+        )
+    )
+
+
+def is_job_cancel_requested(job_id):
+    """Indica se o cancelamento do job foi solicitado"""
+    row = (
+        connections.reader()
+        .execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,))
+        .fetchone()
+    )
+    return bool(row and row[0])
+
+
+def fail_interrupted_jobs():
+    """Marca como falhos os jobs que estavam em andamento quando a API parou"""
+    connections.write(
+        lambda conn: conn.execute(
+            "UPDATE jobs SET state = 'failed', error = ?, finished_at = ? "
+            "WHERE state IN (?, ?)",
+            ("Interrompido por reinício da API", time.time(), *JOB_ACTIVE_STATES),
+        )
     )
-    conn.commit()
-    conn.close()
@@ -0,0 +1,146 @@
+"""Conexões reaproveitadas e ajustadas com o banco SQLite
+
+O banco roda em modo WAL: leitores não bloqueiam o escritor nem são bloqueados
+por ele, o que permite ao dashboard ler enquanto a API ingere dados. Cada thread
+tem a sua conexão de leitura; as escritas do processo passam por uma única
+conexão, serializada por um lock, em transações BEGIN IMMEDIATE que são repetidas
+com backoff se outro processo estiver com o banco bloqueado.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "16384"))
+SQLITE_MMAP_SIZE_MB = int(os.getenv("SQLITE_MMAP_SIZE_MB", "256"))
+SQLITE_WRITE_RETRIES = int(os.getenv("SQLITE_WRITE_RETRIES", "5"))
+# Espera antes da primeira nova tentativa; dobra a cada tentativa
+SQLITE_RETRY_BACKOFF_MS = int(os.getenv("SQLITE_RETRY_BACKOFF_MS", "50"))
+
+BUSY_MESSAGES = ("database is locked", "database is busy")
+
+
+def is_busy_error(error):
+    """Indica se o erro é de banco bloqueado por outra conexão"""
+    return isinstance(error, sqlite3.OperationalError) and any(
+        message in str(error) for message in BUSY_MESSAGES
+    )
+
+
+class ConnectionManager:
+    """Conexões por thread para leitura e um escritor serializado por processo
+
+    Com readonly=True (ex.: o dashboard) as conexões são abertas com mode=ro e
+    write() não é permitido. As conexões são refeitas se o processo for um fork
+    ou se o caminho do banco mudar (ex.: outro diretório de trabalho).
+    """
+
+    def __init__(
+        self,
+        path,
+        readonly=False,
+        busy_timeout_ms=SQLITE_BUSY_TIMEOUT_MS,
+        synchronous=SQLITE_SYNCHRONOUS,
+        cache_size_kb=SQLITE_CACHE_SIZE_KB,
+        mmap_size_mb=SQLITE_MMAP_SIZE_MB,
+        retries=SQLITE_WRITE_RETRIES,
+        backoff_ms=SQLITE_RETRY_BACKOFF_MS,
+    ):
+        self.path = Path(path)
+        self.readonly = readonly
+        self.busy_timeout_ms = busy_timeout_ms
+        self.synchronous = synchronous
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size_mb = mmap_size_mb
+        self.retries = retries
+        self.backoff_ms = backoff_ms
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        self._writer = None
+        self._writer_key = None
+
+    def _key(self):
+        return os.getpid(), os.path.abspath(self.path)
+
+    def connect(self, readonly=None, check_same_thread=True):
+        """Abre uma conexão nova com os pragmas ajustados (o chamador fecha)"""
+        readonly = self.readonly if readonly is None else readonly
+        timeout = self.busy_timeout_ms / 1000
+        if readonly:
+            conn = sqlite3.connect(
+                f"{self.path.resolve().as_uri()}?mode=ro",
+                uri=True,
+                timeout=timeout,
+                check_same_thread=check_same_thread,
+            )
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                self.path, timeout=timeout, check_same_thread=check_same_thread
+            )
+            # Persistente no arquivo; em um banco já em WAL não faz nada
+            conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        conn.execute(f"PRAGMA cache_size = -{self.cache_size_kb}")
+        conn.execute(f"PRAGMA mmap_size = {self.mmap_size_mb * 1024 * 1024}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    def reader(self):
+        """Conexão de leitura desta thread, aberta na primeira chamada"""
+        key = self._key()
+        if getattr(self._local, "key", None) != key:
+            self._local.conn = self.connect()
+            # Conexões de leitura nunca escrevem, nem por engano
+            self._local.conn.execute("PRAGMA query_only = ON")
+            self._local.key = key
+        return self._local.conn
+
+    def writer(self):
+        """Conexão de escrita do processo; use só dentro de write()"""
+        if self.readonly:
+            raise sqlite3.OperationalError(
+                f"Banco aberto somente para leitura: {self.path}"
+            )
+        key = self._key()
+        if self._writer_key != key:
+            self._writer = self.connect(check_same_thread=False)
+            self._writer_key = key
+        return self._writer
+
+    def write(self, operation, conn=None):
+        """Executa operation(conn) em uma transação de escrita e retorna o resultado
+
+        As escritas do processo são serializadas pelo lock. Se o banco estiver
+        bloqueado por outro processo além do busy_timeout, a transação inteira é
+        desfeita e repetida até retries vezes, com backoff exponencial; por isso
+        operation não deve ter efeitos fora do banco. conn permite usar uma
+        conexão própria (ex.: a da ingestão, com tabelas temporárias).
+        """
+        with self._write_lock:
+            conn = conn or self.writer()
+            for attempt in range(self.retries + 1):
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    try:
+                        result = operation(conn)
+                        # to_sql do pandas pode já ter feito o commit
+                        if conn.in_transaction:
+                            conn.commit()
+                    except BaseException:
+                        if conn.in_transaction:
+                            conn.rollback()
+                        raise
+                    return result
+                except sqlite3.OperationalError as error:
+                    if not is_busy_error(error) or attempt == self.retries:
+                        raise
+                    print(
+                        f"⏳ Banco bloqueado; nova tentativa de escrita "
+                        f"({attempt + 1}/{self.retries})"
+                    )
+                    time.sleep(self.backoff_ms / 1000 * 2**attempt)
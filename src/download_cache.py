@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import requests
+
+from src.atomic_files import atomic_file
+
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(1024 * 1024)))
+DOWNLOAD_RETRIES = int(os.getenv("DOWNLOAD_RETRIES", "3"))
+
+
+class IncompleteDownloadError(IOError):
+    """Levantada quando a transferência termina antes do tamanho anunciado"""
+
+
+# Falhas de rede que deixam o arquivo parcial para ser retomado com Range
+TRANSFER_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.Timeout,
+    IncompleteDownloadError,
+)
+
+
+def _write_json(path, content):
+    """Grava JSON de forma atômica (arquivo temporário + os.replace)"""
+    with atomic_file(path, "w") as file:
+        json.dump(content, file, indent=2)
+
+
+def file_sha256(path, chunk_size=DOWNLOAD_CHUNK_SIZE):
+    """SHA-256 (hex) de um arquivo, lido em blocos"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_json(path):
+    try:
+        return json.loads(path.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+class DownloadCache:
+    """Cache em disco de um download HTTP, endereçado pelo SHA-256 do conteúdo
+
+    Guarda o arquivo como <sha256><sufixo> junto de ETag/Last-Modified em
+    cache.json. Novas chamadas enviam requisições condicionais e reaproveitam o
+    arquivo quando o servidor responde 304. Uma transferência interrompida fica em
+    download.part e é retomada com Range/If-Range.
+    """
+
+    def __init__(
+        self,
+        cache_dir,
+        chunk_size=DOWNLOAD_CHUNK_SIZE,
+        retries=DOWNLOAD_RETRIES,
+        timeout=60,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self.timeout = timeout
+        self.metadata_path = self.cache_dir / "cache.json"
+        self.part_path = self.cache_dir / "download.part"
+        self.part_metadata_path = self.cache_dir / "download.part.json"
+
+    def get_metadata(self, url=None):
+        """Retorna os metadados do arquivo em cache (de url, se informada) ou None"""
+        metadata = _read_json(self.metadata_path)
+        if metadata is None or (url is not None and metadata["url"] != url):
+            return None
+        if not (self.cache_dir / metadata["file"]).exists():
+            return None
+        return metadata
+
+    def update_metadata(self, **fields):
+        """Acrescenta campos aos metadados do arquivo em cache"""
+        _write_json(self.metadata_path, {**self.get_metadata(), **fields})
+
+    def fetch(self, url, suffix=""):
+        """Baixa url se mudou desde a última vez
+
+        Retorna o caminho do arquivo em cache e se o conteúdo mudou.
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                return self._fetch_once(url, suffix)
+            except TRANSFER_ERRORS as e:
+                if attempt == self.retries:
+                    raise
+                print(f"Download interrompido ({e}); retomando...")
+
+    def _fetch_once(self, url, suffix):
+        cached = self.get_metadata(url)
+        partial = _read_json(self.part_metadata_path)
+        if partial is None or partial["url"] != url or not self.part_path.exists():
+            partial = None
+            self.part_path.unlink(missing_ok=True)
+
+        # Sem compressão de transporte: os bytes gravados são os do arquivo remoto
+        headers = {"Accept-Encoding": "identity"}
+        offset = self.part_path.stat().st_size if partial else 0
+        if offset:
+            # If-Range: o servidor só continua de onde parou se o arquivo não mudou
+            headers["Range"] = f"bytes={offset}-"
+            validator = partial.get("etag") or partial.get("last_modified")
+            if validator:
+                headers["If-Range"] = validator
+        elif cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        with requests.get(
+            url, headers=headers, stream=True, timeout=self.timeout
+        ) as response:
+            if response.status_code == 304 and cached:
+                print("Dataset inalterado no servidor; usando o cache")
+                return self.cache_dir / cached["file"], False
+            if response.status_code == 416:
+                # O parcial não corresponde mais ao arquivo remoto: recomeça
+                self._discard_partial()
+                raise IncompleteDownloadError("Faixa inválida; reiniciando o download")
+            response.raise_for_status()
+
+            resumed = response.status_code == 206
+            if not resumed:
+                offset = 0
+            total_size = self._total_size(response, offset)
+            _write_json(
+                self.part_metadata_path,
+                {
+                    "url": url,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                },
+            )
+
+            digest = self._hash_partial() if resumed else hashlib.sha256()
+            with open(self.part_path, "ab" if resumed else "wb") as file:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    file.write(chunk)
+                    digest.update(chunk)
+
+            size = self.part_path.stat().st_size
+            if total_size is not None and size != total_size:
+                raise IncompleteDownloadError(
+                    f"Download incompleto: {size} de {total_size} bytes"
+                )
+
+            return self._store(url, response, digest.hexdigest(), size, suffix), True
+
+    def _total_size(self, response, offset):
+        """Tamanho final esperado, a partir de Content-Range ou Content-Length"""
+        content_range = response.headers.get("Content-Range", "")
+        if response.status_code == 206:
+            start = int(content_range.split()[1].split("-")[0])
+            if start != offset:
+                self._discard_partial()
+                raise IncompleteDownloadError(
+                    f"Servidor retomou do byte {start}, esperado {offset}"
+                )
+            total = content_range.rsplit("/", 1)[-1]
+            return int(total) if total.isdigit() else None
+        length = response.headers.get("Content-Length")
+        return int(length) if length is not None else None
+
+    def _hash_partial(self):
+        digest = hashlib.sha256()
+        with open(self.part_path, "rb") as file:
+            for block in iter(lambda: file.read(self.chunk_size), b""):
+                digest.update(block)
+        return digest
+
+    def _store(self, url, response, sha256, size, suffix):
+        """Move o download concluído para o nome endereçado pelo conteúdo"""
+        previous = self.get_metadata()
+        file_name = f"{sha256}{suffix}"
+        os.replace(self.part_path, self.cache_dir / file_name)
+        self.part_metadata_path.unlink(missing_ok=True)
+        _write_json(
+            self.metadata_path,
+            {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "sha256": sha256,
+                "size": size,
+                "file": file_name,
+            },
+        )
+        if previous and previous["file"] != file_name:
+            (self.cache_dir / previous["file"]).unlink(missing_ok=True)
+        print(f"Download concluído: {size / 1e6:.1f} MB (sha256 {sha256[:12]})")
+        return self.cache_dir / file_name
+
+    def _discard_partial(self):
+        self.part_path.unlink(missing_ok=True)
+        self.part_metadata_path.unlink(missing_ok=True)
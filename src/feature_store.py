@@ -0,0 +1,134 @@
+"""Feature store colunar dos dados processados
+
+Cada execução do processamento grava uma versão nova em FEATURE_STORE_DIR: um
+arquivo .npy por coluna, no menor dtype que guarda os valores sem perda, e um
+manifest.json. A versão é montada em um diretório temporário e renomeada no
+final; depois o arquivo CURRENT passa a apontar para ela. Versões publicadas
+nunca mudam, então o treino abre as colunas com np.load(mmap_mode="r") e lê um
+snapshot consistente mesmo se outro processamento terminar no meio do caminho.
+"""
+
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from src.atomic_files import atomic_directory, atomic_file
+
+FEATURE_STORE_DIR = os.getenv("FEATURE_STORE_DIR", "data/features")
+# Versões mantidas no disco, contando a atual (as mais antigas são apagadas)
+FEATURE_STORE_KEEP = int(os.getenv("FEATURE_STORE_KEEP", "3"))
+FORMAT_VERSION = 1
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+
+# Candidatos em ordem de tamanho; o primeiro que devolve os mesmos valores vence
+COMPACT_DTYPES = ("int8", "int16", "int32", "float32", "int64", "float64")
+
+
+def compact_dtype(values):
+    """Menor dtype de COMPACT_DTYPES que representa values sem perda"""
+    values = np.asarray(values)
+    if values.dtype == bool:
+        return np.dtype("int8")
+    if values.dtype.kind not in "iuf":
+        return values.dtype
+    for dtype in COMPACT_DTYPES:
+        with np.errstate(invalid="ignore", over="ignore"):
+            converted = values.astype(dtype)
+        if np.array_equal(converted, values, equal_nan=values.dtype.kind == "f"):
+            return np.dtype(dtype)
+    return values.dtype
+
+
+class FeatureStore:
+    """Versões imutáveis dos dados processados, uma coluna por arquivo .npy"""
+
+    def __init__(self, root=FEATURE_STORE_DIR, keep=FEATURE_STORE_KEEP):
+        self.root = Path(root)
+        self.keep = keep
+
+    def write(self, df, source=None):
+        """Grava df como uma nova versão e a torna a atual; retorna o manifesto"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        created_at = datetime.now()
+        version = f"{created_at:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        with atomic_directory(self.root / version) as tmp_dir:
+            columns = {}
+            for name in df.columns:
+                values = df[name].to_numpy()
+                dtype = compact_dtype(values)
+                np.save(tmp_dir / f"{name}.npy", values.astype(dtype, copy=False))
+                columns[name] = dtype.name
+
+            manifest = {
+                "format_version": FORMAT_VERSION,
+                "version": version,
+                "created_at": created_at.isoformat(),
+                "n_rows": len(df),
+                "columns": columns,
+                "source": source or {},
+            }
+            (tmp_dir / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+
+        self._set_current(version)
+        self._prune(version)
+        return manifest
+
+    def _set_current(self, version):
+        """Troca o ponteiro CURRENT de forma atômica"""
+        with atomic_file(self.root / CURRENT_FILE, "w") as file:
+            file.write(version)
+
+    def _prune(self, current):
+        """Apaga as versões mais antigas além de keep (nunca a atual)"""
+        versions = self.versions()
+        for version in versions[: max(len(versions) - self.keep, 0)]:
+            if version != current:
+                shutil.rmtree(self.root / version, ignore_errors=True)
+
+    def versions(self):
+        """Versões publicadas, da mais antiga para a mais recente"""
+        if not self.root.exists():
+            return []
+        return sorted(
+            path.name
+            for path in self.root.iterdir()
+            if path.is_dir()
+            and not path.name.startswith(".")
+            and (path / MANIFEST_FILE).exists()
+        )
+
+    def current_version(self):
+        """Versão atual, ou None se nada foi gravado ainda"""
+        try:
+            version = (self.root / CURRENT_FILE).read_text().strip()
+        except FileNotFoundError:
+            return None
+        return version if (self.root / version / MANIFEST_FILE).exists() else None
+
+    def read_manifest(self, version=None):
+        """Manifesto de uma versão (por padrão, a atual), ou None"""
+        version = version or self.current_version()
+        if version is None:
+            return None
+        return json.loads((self.root / version / MANIFEST_FILE).read_text())
+
+    def load(self, version=None, mmap_mode="r"):
+        """Abre as colunas de uma versão (por padrão, a atual) com mmap
+
+        Retorna (manifesto, {coluna: array}) ou (None, None) se não há versão.
+        """
+        manifest = self.read_manifest(version)
+        if manifest is None:
+            return None, None
+        version_dir = self.root / manifest["version"]
+        columns = {
+            name: np.load(version_dir / f"{name}.npy", mmap_mode=mmap_mode)
+            for name in manifest["columns"]
+        }
+        return manifest, columns
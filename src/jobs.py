@@ -0,0 +1,85 @@
+import time
+from src.database import update_job, is_job_cancel_requested
+
+
+class JobCancelledError(Exception):
+    """Levantada quando um job em segundo plano tem o cancelamento solicitado
+
+    stage_seconds traz a duração das etapas executadas até o cancelamento.
+    """
+
+    def __init__(self, message, stage_seconds=None):
+        super().__init__(message)
+        self.stage_seconds = stage_seconds
+
+
+class JobFailedError(Exception):
+    """Erro de um job em segundo plano, com a duração das etapas até a falha"""
+
+    def __init__(self, message, stage_seconds=None):
+        super().__init__(message)
+        self.stage_seconds = stage_seconds
+
+
+class JobProgress:
+    """Callback de progresso que registra etapa e linhas processadas de um job"""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.stage = None
+        self.stage_started_at = None
+        self.stage_seconds = {}
+
+    def start(self):
+        """Marca o job como em execução"""
+        self.check_cancelled()
+        update_job(self.job_id, state="running", started_at=time.time())
+
+    def __call__(self, stage, rows_processed=None):
+        """Registra a etapa atual e verifica se o job deve ser cancelado"""
+        self.check_cancelled()
+        if stage != self.stage:
+            self._close_stage()
+            self.stage = stage
+        fields = {"stage": stage}
+        if rows_processed is not None:
+            fields["rows_processed"] = int(rows_processed)
+        update_job(self.job_id, **fields)
+
+    def check_cancelled(self):
+        """Interrompe o job se o cancelamento foi solicitado"""
+        if is_job_cancel_requested(self.job_id):
+            raise JobCancelledError(f"Job {self.job_id} cancelado")
+
+    def finish(self):
+        """Encerra a última etapa e retorna a duração de cada etapa em segundos"""
+        self._close_stage()
+        self.stage = None
+        return dict(self.stage_seconds)
+
+    def _close_stage(self):
+        now = time.perf_counter()
+        if self.stage is not None:
+            self.stage_seconds[self.stage] = (
+                self.stage_seconds.get(self.stage, 0.0) + now - self.stage_started_at
+            )
+        self.stage_started_at = now
+
+
+def run_with_progress(job_id, work):
+    """Executa work(progress) como o job job_id e devolve o resumo com stage_seconds
+
+    As durações das etapas também acompanham um cancelamento ou uma falha (em
+    JobCancelledError ou JobFailedError), para que jobs interrompidos apareçam
+    nas métricas.
+    """
+    progress = JobProgress(job_id)
+    try:
+        progress.start()
+        summary = work(progress)
+    except JobCancelledError as e:
+        e.stage_seconds = progress.finish()
+        raise
+    except Exception as e:
+        raise JobFailedError(str(e), progress.finish()) from e
+    return {**summary, "stage_seconds": progress.finish()}
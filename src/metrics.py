@@ -0,0 +1,266 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+# Limites em segundos; cobrem de 100µs (predição em cache) até alguns segundos
+LATENCY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+PIPELINE_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+# Requisições por lote do micro-batcher (PREDICT_BATCH_MAX_SIZE padrão: 32)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_number(value):
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+
+class Histogram:
+    """Histograma com limites fixos no formato do Prometheus, uma série por rótulos
+
+    Cada thread grava em seu próprio shard, sem lock; os shards só são somados
+    ao gerar o texto de /metrics.
+    """
+
+    def __init__(
+        self, name, documentation, label_names=(), buckets=LATENCY_BUCKETS, enabled=True
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(float(bound) for bound in buckets)
+        self.enabled = enabled
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+
+    def observe(self, seconds, *label_values):
+        """Registra uma observação (uma busca binária e duas somas)"""
+        if not self.enabled:
+            return
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        series = shard.get(label_values)
+        if series is None:
+            # Contagem por faixa (não cumulativa) seguida da soma das observações
+            series = shard[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, seconds)] += 1
+        series[-1] += seconds
+
+    def _new_shard(self):
+        shard = {}
+        self._local.shard = shard
+        with self._shards_lock:
+            self._shards.append(shard)
+        return shard
+
+    def clear(self):
+        """Descarta todas as observações"""
+        with self._shards_lock:
+            for shard in self._shards:
+                shard.clear()
+
+    def collect(self):
+        """Soma os shards de todas as threads: {rótulos: (contagens, soma)}"""
+        with self._shards_lock:
+            shards = list(self._shards)
+
+        merged = {}
+        for shard in shards:
+            for label_values, series in list(shard.items()):
+                series = list(series)
+                if label_values in merged:
+                    series = [a + b for a, b in zip(merged[label_values], series)]
+                merged[label_values] = series
+        return {
+            label_values: (series[:-1], series[-1])
+            for label_values, series in sorted(merged.items())
+        }
+
+    def render(self):
+        """Retorna as linhas do histograma no formato texto do Prometheus"""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for label_values, (counts, total) in self.collect().items():
+            labels = [
+                f'{name}="{_escape(value)}"'
+                for name, value in zip(self.label_names, label_values)
+            ]
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                bucket_labels = ",".join(labels + [f'le="{_format_number(bound)}"'])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            suffix = "{" + ",".join(labels) + "}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {total}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Conjunto de histogramas expostos em /metrics"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._histograms = {}
+
+    def histogram(self, name, documentation, label_names=(), buckets=LATENCY_BUCKETS):
+        """Retorna o histograma com o nome dado, criando-o se necessário"""
+        if name not in self._histograms:
+            self._histograms[name] = Histogram(
+                name, documentation, label_names, buckets, enabled=self.enabled
+            )
+        return self._histograms[name]
+
+    def render(self):
+        """Gera o texto completo no formato de exposição do Prometheus"""
+        lines = []
+        for histogram in self._histograms.values():
+            lines.extend(histogram.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry(enabled=METRICS_ENABLED)
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds",
+    "Duração das requisições HTTP por rota",
+    ("method", "path", "status"),
+)
+REQUEST_STAGE_SECONDS = registry.histogram(
+    "request_stage_duration_seconds",
+    "Duração das etapas internas de uma requisição (validate, feature_build, inference, serialize)",
+    ("path", "stage"),
+)
+MODEL_STAGE_SECONDS = registry.histogram(
+    "model_stage_duration_seconds",
+    "Duração das etapas de predição dentro do DiabetesMLModel",
+    ("engine", "stage"),
+)
+MICRO_BATCH_SIZE = registry.histogram(
+    "predict_micro_batch_size",
+    "Requisições de /predict agrupadas em cada lote do micro-batcher",
+    buckets=BATCH_SIZE_BUCKETS,
+)
+MICRO_BATCH_QUEUE_SECONDS = registry.histogram(
+    "predict_micro_batch_queue_seconds",
+    "Espera de cada requisição na fila do micro-batcher até o lote ser despachado",
+)
+PIPELINE_STAGE_SECONDS = registry.histogram(
+    "pipeline_stage_duration_seconds",
+    "Duração das etapas dos jobs do pipeline, por estado final do job",
+    ("job", "stage", "state"),
+    PIPELINE_BUCKETS,
+)
+
+
+class RequestTimer:
+    """Marca o fim de cada etapa de uma requisição em relação à marca anterior"""
+
+    __slots__ = ("start", "mark", "stages")
+
+    def __init__(self, start):
+        self.start = start
+        self.mark = start
+        self.stages = []
+
+    def stage(self, name):
+        now = time.perf_counter()
+        self.stages.append((name, now - self.mark))
+        self.mark = now
+
+
+_request_timer = ContextVar("request_timer", default=None)
+
+
+def mark_stage(name):
+    """Encerra a etapa atual da requisição em andamento (no-op fora do middleware)"""
+    timer = _request_timer.get()
+    if timer is not None:
+        timer.stage(name)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que mede cada requisição e registra as etapas marcadas
+
+    A rota é resolvida depois da resposta pelo endpoint que o roteador colocou no
+    scope, então caminhos com parâmetros (ex.: /jobs/{job_id}) viram uma única série.
+    Quando o handler marcou etapas, o tempo entre a última marca e o início da
+    resposta é registrado como "serialize".
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._paths = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not registry.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        timer = RequestTimer(time.perf_counter())
+        token = _request_timer.set(timer)
+        status = 500
+
+        async def send_with_metrics(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if timer.stages:
+                    timer.stage("serialize")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            _request_timer.reset(token)
+            elapsed = time.perf_counter() - timer.start
+            path = self._route_path(scope)
+            HTTP_REQUEST_SECONDS.observe(elapsed, scope["method"], path, str(status))
+            for name, seconds in timer.stages:
+                REQUEST_STAGE_SECONDS.observe(seconds, path, name)
+
+    def _route_path(self, scope):
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if self._paths is None:
+            self._paths = {
+                route.endpoint: route.path
+                for route in scope["app"].routes
+                if hasattr(route, "endpoint")
+            }
+        return self._paths.get(endpoint, "unmatched")
+
+
+def observe_pipeline_stages(job_kind, stage_seconds, state="completed"):
+    """Registra as durações de etapa de um job do pipeline que chegou a state"""
+    for stage, seconds in (stage_seconds or {}).items():
+        PIPELINE_STAGE_SECONDS.observe(seconds, job_kind, stage, state)
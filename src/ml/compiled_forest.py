@@ -0,0 +1,176 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+from src.atomic_files import atomic_directory
+
+
+class CompiledForest:
+    """Floresta aleatória achatada em arrays NumPy contíguos para inferência vetorizada"""
+
+    ARRAYS = ("feature", "threshold", "left", "right", "value", "roots")
+
+    def __init__(
+        self,
+        feature,
+        threshold,
+        left,
+        right,
+        value,
+        roots,
+        classes,
+        n_features,
+        max_depth,
+        feature_importances=None,
+        chunk_size=4096,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes_ = np.asarray(classes)
+        self.n_classes = len(self.classes_)
+        self.n_features = n_features
+        self.n_trees = len(roots)
+        self.max_depth = max_depth
+        self.feature_importances_ = feature_importances
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def from_estimator(cls, model, chunk_size=4096):
+        """Achata um RandomForestClassifier treinado"""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(n_nodes, dtype=np.int32) + offset
+            is_leaf = tree.children_left == -1
+
+            # Folhas apontam para si mesmas para que a travessia possa seguir
+            # um número fixo de passos em todas as árvores
+            left = np.where(is_leaf, node_ids, tree.children_left + offset)
+            right = np.where(is_leaf, node_ids, tree.children_right + offset)
+            feature = np.where(is_leaf, 0, tree.feature)
+
+            value = tree.value[:, 0, :]
+            totals = value.sum(axis=1, keepdims=True)
+            totals[totals == 0] = 1.0
+
+            features.append(feature.astype(np.int32))
+            thresholds.append(tree.threshold)
+            lefts.append(left.astype(np.int32))
+            rights.append(right.astype(np.int32))
+            values.append(value / totals)
+            roots.append(offset)
+
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features)),
+            threshold=cls._to_float32_thresholds(np.concatenate(thresholds)),
+            left=np.ascontiguousarray(np.concatenate(lefts)),
+            right=np.ascontiguousarray(np.concatenate(rights)),
+            value=np.ascontiguousarray(np.concatenate(values), dtype=np.float32),
+            roots=np.array(roots, dtype=np.int32),
+            classes=model.classes_,
+            n_features=model.n_features_in_,
+            max_depth=max_depth,
+            feature_importances=model.feature_importances_,
+            chunk_size=chunk_size,
+        )
+
+    def save(self, directory):
+        """Salva os arrays .npy (mapeáveis em memória) em um diretório novo
+
+        Os arquivos são montados em um diretório temporário renomeado no final, e
+        um diretório publicado nunca é regravado: workers podem estar com os arrays
+        mapeados, e reescrevê-los mudaria (ou invalidaria) as páginas em uso.
+        """
+        with atomic_directory(directory) as tmp_dir:
+            for name in self.ARRAYS:
+                np.save(tmp_dir / f"{name}.npy", getattr(self, name))
+            meta = {
+                "classes": self.classes_.tolist(),
+                "n_features": int(self.n_features),
+                "max_depth": int(self.max_depth),
+                "feature_importances": (
+                    np.asarray(self.feature_importances_).tolist()
+                    if self.feature_importances_ is not None
+                    else None
+                ),
+            }
+            (tmp_dir / "meta.json").write_text(json.dumps(meta))
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r", chunk_size=4096):
+        """Carrega os arrays com mmap, compartilhando o page cache entre processos"""
+        directory = Path(directory)
+        meta = json.loads((directory / "meta.json").read_text())
+        arrays = {
+            name: np.load(directory / f"{name}.npy", mmap_mode=mmap_mode)
+            for name in cls.ARRAYS
+        }
+        importances = meta["feature_importances"]
+        return cls(
+            **arrays,
+            classes=meta["classes"],
+            n_features=meta["n_features"],
+            max_depth=meta["max_depth"],
+            feature_importances=(
+                np.array(importances) if importances is not None else None
+            ),
+            chunk_size=chunk_size,
+        )
+
+    @staticmethod
+    def _to_float32_thresholds(thresholds):
+        """Converte thresholds para float32 preservando a decisão ``x <= t``"""
+        # O sklearn compara X em float32 com thresholds em float64. Arredondar
+        # o threshold para o maior float32 <= t mantém a comparação exata.
+        thresholds_32 = thresholds.astype(np.float32)
+        rounded_up = thresholds_32.astype(np.float64) > thresholds
+        thresholds_32[rounded_up] = np.nextafter(
+            thresholds_32[rounded_up], np.float32(-np.inf)
+        )
+        return np.ascontiguousarray(thresholds_32)
+
+    def _predict_proba_chunk(self, X):
+        n_rows = X.shape[0]
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+        rows = np.arange(n_rows)[:, None]
+
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        return self.value[nodes].mean(axis=1, dtype=np.float64)
+
+    def predict_proba(self, X):
+        """Retorna as probabilidades por classe para cada linha de X"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(
+                f"Esperadas {self.n_features} features, recebidas {X.shape[1]}"
+            )
+
+        if X.shape[0] <= self.chunk_size:
+            return self._predict_proba_chunk(X)
+
+        return np.concatenate(
+            [
+                self._predict_proba_chunk(X[start : start + self.chunk_size])
+                for start in range(0, X.shape[0], self.chunk_size)
+            ]
+        )
+
+    def predict(self, X):
+        """Retorna a classe prevista para cada linha de X"""
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
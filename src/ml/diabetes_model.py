@@ -1,37 +1,124 @@
+import shutil
+import time
+import uuid
+import warnings
+from datetime import datetime
 import pandas as pd
 import numpy as np
 import joblib
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import (
-    accuracy_score,
-    precision_score,
-    recall_score,
-    f1_score,
-    classification_report,
-    confusion_matrix,
-)
-from sklearn.preprocessing import StandardScaler
 from pathlib import Path
 from src.database import get_processed_data, save_model_metrics
+from src.feature_store import FeatureStore
+from src.ml.compiled_forest import CompiledForest
+from src.ml.prediction_table import PredictionTable
+from src.ml.model_bundle import save_bundle, load_bundle, read_bundle_header
+from src.metrics import MODEL_STAGE_SECONDS
+
+INFERENCE_MODES = ("sklearn", "compiled", "mmap")
+# Acima deste tamanho de lote o predict_proba do sklearn (Cython) volta a ser mais rápido
+COMPILED_MAX_ROWS = 256
+BUNDLE_FILE = "diabetes_model.bundle"
+# Formato anterior, ainda aceito na leitura
+LEGACY_MODEL_FILE = "diabetes_model.joblib"
+# Uma versão da floresta achatada por treino, referenciada pelo cabeçalho do bundle
+COMPILED_FOREST_DIR = "compiled_forest"
+# Versões mantidas no disco, contando a atual; a anterior fica para quem leu o
+# cabeçalho antigo e ainda vai abrir os arrays
+COMPILED_FOREST_KEEP = 2
+# Prefixo das versões da tabela de predições, também referenciadas pelo cabeçalho
+PREDICTION_TABLE_FILE = "prediction_table"
 
 
 class DiabetesMLModel:
-    def __init__(self):
-        self.model = RandomForestClassifier(
+    def __init__(
+        self,
+        inference_mode="sklearn",
+        prediction_cache=None,
+        table_mode=False,
+        table_grid=None,
+        compress_level=0,
+        feature_store=None,
+    ):
+        if inference_mode not in INFERENCE_MODES:
+            raise ValueError(
+                f"Modo de inferência inválido: {inference_mode}. Use um de {INFERENCE_MODES}"
+            )
+
+        # Criado só no treino ou carregado do disco; servir o modelo compilado
+        # (modo mmap) não precisa importar o scikit-learn
+        self.model = None
+        self.feature_names = None
+        self.model_path = Path("models")
+        self.model_path.mkdir(exist_ok=True)
+        self.inference_mode = inference_mode
+        self.compiled_model = None
+        self.prediction_cache = prediction_cache
+        self.model_version = None
+        self.table_mode = table_mode
+        self.table_grid = table_grid
+        self.prediction_table = None
+        self.compress_level = compress_level
+        self.bundle_header = None
+        self.feature_store = feature_store or FeatureStore()
+        # Versão do feature store usada no último prepare_data (None: processed_data)
+        self.feature_store_version = None
+
+    def create_estimator(self):
+        """Cria o RandomForestClassifier ainda não treinado"""
+        from sklearn.ensemble import RandomForestClassifier
+
+        return RandomForestClassifier(
             n_estimators=100,
             max_depth=10,
             min_samples_split=5,
             min_samples_leaf=2,
             random_state=42,
         )
-        self.scaler = StandardScaler()
-        self.feature_names = None
-        self.model_path = Path("models")
-        self.model_path.mkdir(exist_ok=True)
 
     def prepare_data(self):
-        """Prepara os dados para treinamento"""
+        """Prepara os dados para treinamento
+
+        Lê a versão atual do feature store com mmap: o split é feito sobre os
+        índices e só as linhas de treino e de teste são copiadas das colunas.
+        Sem versão gravada (dados processados antes do feature store), lê a
+        tabela processed_data.
+        """
+        from sklearn.model_selection import train_test_split
+
+        manifest, columns = self.feature_store.load()
+        if manifest is None:
+            return self._prepare_data_from_table()
+
+        if manifest["n_rows"] == 0:
+            raise ValueError(
+                "Nenhum dado processado encontrado. Execute o processamento primeiro."
+            )
+
+        y = columns.pop("diabetes")
+        self.feature_names = list(columns)
+        self.feature_store_version = manifest["version"]
+
+        train_index, test_index = train_test_split(
+            np.arange(manifest["n_rows"]),
+            test_size=0.2,
+            random_state=42,
+            stratify=y,
+        )
+
+        def take(index):
+            X = pd.DataFrame(
+                {name: values[index] for name, values in columns.items()}, index=index
+            )
+            return X, pd.Series(y[index], index=index, name="diabetes")
+
+        X_train, y_train = take(train_index)
+        X_test, y_test = take(test_index)
+        return X_train, X_test, y_train, y_test
+
+    def _prepare_data_from_table(self):
+        """Prepara os dados a partir da tabela processed_data"""
+        from sklearn.model_selection import train_test_split
+
         df = get_processed_data()
 
         if df.empty:
@@ -48,26 +135,41 @@ class DiabetesMLModel:
         y = df["diabetes"]
 
         self.feature_names = X.columns.tolist()
+        self.feature_store_version = None
 
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, test_size=0.2, random_state=42, stratify=y
         )
 
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
-
-        return X_train_scaled, X_test_scaled, y_train, y_test, X_train, X_test
+        return X_train, X_test, y_train, y_test
 
-    def train_model(self):
+    def train_model(self, progress=None):
         """Treina o modelo Random Forest"""
+        from sklearn.metrics import (
+            accuracy_score,
+            precision_score,
+            recall_score,
+            f1_score,
+        )
+
         print("Iniciando treinamento do modelo...")
 
-        X_train_scaled, X_test_scaled, y_train, y_test, X_train, X_test = (
-            self.prepare_data()
-        )
+        if progress:
+            progress("load")
+        X_train, X_test, y_train, y_test = self.prepare_data()
 
+        if progress:
+            progress("fit", rows_processed=len(X_train))
+        if self.model is None:
+            self.model = self.create_estimator()
         self.model.fit(X_train, y_train)
+        self.compiled_model = None
+        self.prediction_table = None
+        if self.prediction_cache is not None:
+            self.prediction_cache.clear()
 
+        if progress:
+            progress("evaluate", rows_processed=len(X_train) + len(X_test))
         y_pred = self.model.predict(X_test)
 
         metrics = {
@@ -83,37 +185,140 @@ class DiabetesMLModel:
         print(f"Recall: {metrics['recall']:.4f}")
         print(f"F1-Score: {metrics['f1']:.4f}")
 
+        if self.table_mode:
+            # A tabela é gravada antes do bundle que a referencia: um worker que
+            # carregar o bundle novo já encontra a tabela dele no disco
+            if progress:
+                progress("prediction_table")
+            self.build_prediction_table(X_train)
+
+        if progress:
+            progress("save")
         save_model_metrics(metrics)
-        self.save_model()
+        self.save_model(
+            metrics=metrics,
+            training_info={
+                "train_rows": len(X_train),
+                "test_rows": len(X_test),
+                "feature_store_version": self.feature_store_version,
+            },
+        )
+        self.model_version = self.get_model_version()
 
         return metrics, y_test, y_pred
 
-    def save_model(self):
-        """Salva o modelo treinado"""
-        model_file = self.model_path / "diabetes_model.joblib"
-        scaler_file = self.model_path / "scaler.joblib"
+    def save_model(self, metrics=None, training_info=None):
+        """Salva o modelo treinado em um único bundle versionado"""
+        import sklearn
+
+        bundle_file = self.model_path / BUNDLE_FILE
 
-        joblib.dump(self.model, model_file)
-        joblib.dump(self.scaler, scaler_file)
+        # Arrays da floresta sem compressão, para serem mapeados em memória pelos
+        # workers da API. Cada treino grava um diretório novo, antes do bundle que
+        # o referencia: workers com a versão anterior mapeada continuam lendo-a.
+        compiled_forest = (
+            f"{COMPILED_FOREST_DIR}/"
+            f"{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        )
+        CompiledForest.from_estimator(self.model).save(
+            self.model_path / compiled_forest
+        )
 
-        if self.feature_names:
-            features_file = self.model_path / "feature_names.joblib"
-            joblib.dump(self.feature_names, features_file)
+        header = {
+            "feature_names": list(self.feature_names or []),
+            "classes": self.model.classes_.tolist(),
+            "metadata": {
+                "model_type": type(self.model).__name__,
+                "params": {
+                    name: value
+                    for name, value in self.model.get_params().items()
+                    if value is None or isinstance(value, (bool, int, float, str))
+                },
+                "sklearn_version": sklearn.__version__,
+                "trained_at": datetime.now().isoformat(),
+                **(training_info or {}),
+            },
+            "metrics": {name: float(value) for name, value in (metrics or {}).items()},
+            "compiled_forest": compiled_forest,
+        }
+        table_manifest = (
+            self.prediction_table.manifest_file if self.prediction_table else None
+        )
+        if table_manifest is not None:
+            header["prediction_table"] = table_manifest
+        save_bundle(bundle_file, header, self.model, compress=self.compress_level)
+        self.bundle_header = read_bundle_header(bundle_file)
+        self._prune_compiled_forests(self.model_path / compiled_forest)
+        if table_manifest is not None:
+            PredictionTable.prune(
+                self.model_path / PREDICTION_TABLE_FILE, current=table_manifest
+            )
 
-        print(f"Modelo salvo em: {model_file}")
+        print(f"Modelo salvo em: {bundle_file}")
+
+    def _prune_compiled_forests(self, current):
+        """Apaga as versões da floresta achatada além de COMPILED_FOREST_KEEP
+
+        Workers que ainda têm uma versão apagada mapeada em memória continuam
+        lendo-a normalmente: o arquivo só sai do disco quando o mapeamento fecha.
+        """
+        versions = sorted(
+            (
+                path
+                for path in (self.model_path / COMPILED_FOREST_DIR).iterdir()
+                if path.is_dir() and not path.name.startswith(".")
+            ),
+            key=lambda path: path.stat().st_mtime_ns,
+        )
+        for path in versions[: max(len(versions) - COMPILED_FOREST_KEEP, 0)]:
+            if path != current:
+                shutil.rmtree(path, ignore_errors=True)
 
     def load_model(self):
         """Carrega o modelo treinado"""
-        model_file = self.model_path / "diabetes_model.joblib"
-        scaler_file = self.model_path / "scaler.joblib"
-        features_file = self.model_path / "feature_names.joblib"
-
-        if model_file.exists():
-            self.model = joblib.load(model_file)
-            self.scaler = joblib.load(scaler_file)
-
-            if features_file.exists():
-                self.feature_names = joblib.load(features_file)
+        model_file = self.get_model_file()
+        compiled_dir = self.model_path / COMPILED_FOREST_DIR
+
+        if model_file is not None:
+            self.model_version = self.get_model_version()
+            self.compiled_model = None
+            self.prediction_table = None
+            if self.prediction_cache is not None:
+                self.prediction_cache.clear()
+
+            if model_file.name == BUNDLE_FILE:
+                header = read_bundle_header(model_file)
+                # Bundles de antes do versionamento usam a raiz de compiled_forest
+                if "compiled_forest" in header:
+                    compiled_dir = self.model_path / header["compiled_forest"]
+                if (
+                    self.inference_mode == "mmap"
+                    and (compiled_dir / "meta.json").exists()
+                ):
+                    # Não desserializa a floresta: os arrays são compartilhados
+                    # entre processos através do page cache
+                    self.bundle_header = header
+                    self.compiled_model = CompiledForest.load(
+                        compiled_dir, mmap_mode="r"
+                    )
+                else:
+                    self.bundle_header, self.model = load_bundle(model_file)
+                self.feature_names = self.bundle_header["feature_names"]
+            else:
+                self._load_legacy_model(model_file, compiled_dir)
+
+            if self.table_mode:
+                table_manifest = (self.bundle_header or {}).get("prediction_table")
+                if table_manifest is not None:
+                    self.prediction_table = PredictionTable.load(
+                        self.model_path / table_manifest
+                    )
+                else:
+                    # Formato anterior: manifesto único, associado à versão do bundle
+                    self.prediction_table = PredictionTable.load(
+                        self.model_path / PREDICTION_TABLE_FILE,
+                        model_version=self.model_version,
+                    )
 
             print("Modelo carregado com sucesso!")
             return True
@@ -121,32 +326,238 @@ class DiabetesMLModel:
             print("Nenhum modelo encontrado. Treine o modelo primeiro.")
             return False
 
+    def _load_legacy_model(self, model_file, compiled_dir):
+        """Carrega o formato anterior (pickles separados de modelo e features)"""
+        self.bundle_header = None
+        if self.inference_mode == "mmap" and (compiled_dir / "meta.json").exists():
+            self.compiled_model = CompiledForest.load(compiled_dir, mmap_mode="r")
+        else:
+            self.model = joblib.load(model_file)
+
+        features_file = self.model_path / "feature_names.joblib"
+        if features_file.exists():
+            self.feature_names = joblib.load(features_file)
+
+    def get_model_file(self):
+        """Retorna o arquivo do modelo salvo (bundle ou formato anterior) ou None"""
+        for name in (BUNDLE_FILE, LEGACY_MODEL_FILE):
+            if (self.model_path / name).exists():
+                return self.model_path / name
+        return None
+
+    def read_metadata(self):
+        """Lê features, metadados e métricas do bundle sem carregar o modelo"""
+        model_file = self.get_model_file()
+        if model_file is None or model_file.name != BUNDLE_FILE:
+            return None
+        return read_bundle_header(model_file)
+
+    def is_loaded(self):
+        """Indica se há um modelo treinado pronto para predição"""
+        if self.inference_mode == "mmap":
+            return self.compiled_model is not None or hasattr(self.model, "classes_")
+        return hasattr(self.model, "classes_")
+
+    def get_classes(self):
+        """Retorna as classes do modelo carregado"""
+        if self.inference_mode == "mmap" and self.compiled_model is not None:
+            return self.compiled_model.classes_
+        return self.model.classes_
+
     def predict(self, features):
         """Faz predição para um conjunto de features"""
-        if not hasattr(self.model, "predict"):
+        if not self.is_loaded():
             if not self.load_model():
                 raise ValueError("Modelo não encontrado. Treine o modelo primeiro.")
 
+        if self.prediction_cache is None:
+            return self._predict_single(features)
+
+        if isinstance(features, list):
+            features = dict(zip(self.feature_names, features))
+        features = self.prediction_cache.normalize(features)
+        # A versão do modelo na chave impede que predições de um modelo antigo,
+        # ainda em andamento durante uma troca, sejam servidas para o novo
+        key = (self.model_version,) + tuple(
+            features[name] for name in (self.feature_names or sorted(features))
+        )
+
+        cached = self.prediction_cache.get(key)
+        if cached is not None:
+            return cached
+
+        prediction, probability = self._predict_single(features)
+        probability.flags.writeable = False
+        self.prediction_cache.put(key, (prediction, probability))
+        return prediction, probability
+
+    def _predict_single(self, features):
+        if self.prediction_table is not None:
+            if isinstance(features, list):
+                features = dict(zip(self.feature_names, features))
+            started = time.perf_counter()
+            probability = self.prediction_table.lookup(features)
+            if probability is not None:
+                probability = np.asarray(probability, dtype=np.float64)
+                MODEL_STAGE_SECONDS.observe(
+                    time.perf_counter() - started, "table", "inference"
+                )
+                return (
+                    self.prediction_table.classes[np.argmax(probability)],
+                    probability,
+                )
+
+        if self.inference_mode in ("compiled", "mmap"):
+            if isinstance(features, list):
+                features = dict(zip(self.feature_names, features))
+            predictions, probabilities = self.predict_batch([features])
+            return predictions[0], probabilities[0]
+
+        started = time.perf_counter()
         if isinstance(features, dict):
             features = pd.DataFrame([features])
         elif isinstance(features, list):
             features = pd.DataFrame([features], columns=self.feature_names)
+        built = time.perf_counter()
 
         prediction = self.model.predict(features)
         probability = self.model.predict_proba(features)
 
+        MODEL_STAGE_SECONDS.observe(built - started, "sklearn", "feature_build")
+        MODEL_STAGE_SECONDS.observe(time.perf_counter() - built, "sklearn", "inference")
         return prediction[0], probability[0]
 
+    def predict_batch(self, records):
+        """Faz predição vetorizada para vários registros em uma única passada"""
+        if not self.is_loaded() or self.feature_names is None:
+            if not self.load_model():
+                raise ValueError("Modelo não encontrado. Treine o modelo primeiro.")
+
+        started = time.perf_counter()
+        if isinstance(records, np.ndarray):
+            X = records.astype(np.float64, copy=False)
+        else:
+            X = np.array(
+                [[record[name] for name in self.feature_names] for record in records],
+                dtype=np.float64,
+            ).reshape(-1, len(self.feature_names))
+
+        if self.prediction_cache is not None:
+            # Mesma entrada que predict() passaria ao modelo para esses registros
+            X = self.prediction_cache.normalize_matrix(X, self.feature_names)
+
+        classes = self.get_classes()
+        if len(X) == 0:
+            return np.empty(0, dtype=classes.dtype), np.empty((0, len(classes)))
+
+        built = time.perf_counter()
+        probabilities = self._predict_proba_matrix(X)
+        predictions = classes[np.argmax(probabilities, axis=1)]
+
+        engine = self._matrix_engine(len(X))
+        MODEL_STAGE_SECONDS.observe(built - started, engine, "feature_build")
+        MODEL_STAGE_SECONDS.observe(time.perf_counter() - built, engine, "inference")
+        return predictions, probabilities
+
+    def _matrix_engine(self, n_rows):
+        """Nome do mecanismo usado por _predict_proba_matrix para n_rows linhas"""
+        if self.inference_mode == "mmap" or (
+            self.inference_mode == "compiled" and n_rows <= COMPILED_MAX_ROWS
+        ):
+            return "compiled"
+        return "sklearn"
+
+    def _predict_proba_matrix(self, X):
+        """Executa predict_proba em uma matriz já ordenada por feature_names"""
+        if self._matrix_engine(len(X)) == "compiled":
+            return self.get_compiled_model().predict_proba(X)
+
+        with warnings.catch_warnings():
+            # O modelo foi treinado com DataFrame; a matriz já segue feature_names
+            warnings.filterwarnings(
+                "ignore", message="X does not have valid feature names"
+            )
+            return self.model.predict_proba(X)
+
+    def warm_up(self, n_predictions=10):
+        """Executa predições sintéticas para aquecer os caminhos de inferência
+
+        Não passa pelo cache de predições, então não altera seus contadores.
+        """
+        if n_predictions <= 0 or self.feature_names is None:
+            return
+        record = {name: 0 for name in self.feature_names}
+        for _ in range(n_predictions):
+            self._predict_single(record)
+        self.predict_batch([record] * n_predictions)
+
+    def get_model_version(self):
+        """Identifica o artefato salvo do modelo (mtime e tamanho do arquivo)"""
+        model_file = self.get_model_file()
+        if model_file is None:
+            return None
+        stat = model_file.stat()
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    def build_prediction_table(self, X_train):
+        """Pré-calcula as probabilidades para toda a grade discreta de features"""
+        axes = PredictionTable.default_axes(
+            self.feature_names, X_train, self.table_grid
+        )
+        bmi_range = (
+            [float(X_train["bmi"].min()), float(X_train["bmi"].max())]
+            if "bmi" in X_train.columns
+            else None
+        )
+
+        start = time.perf_counter()
+        table = PredictionTable.build(
+            self._predict_proba_matrix,
+            self.model.classes_,
+            self.feature_names,
+            axes,
+            bmi_range,
+        )
+        build_seconds = time.perf_counter() - start
+
+        table.save(self.model_path / PREDICTION_TABLE_FILE)
+        max_abs_diff = table.check_exactness(self._predict_proba_matrix)
+        self.prediction_table = table
+
+        report = {
+            "rows": int(len(table.probabilities)),
+            "size_bytes": int(table.probabilities.nbytes),
+            "build_seconds": round(build_seconds, 3),
+            "max_abs_diff": max_abs_diff,
+        }
+        print(
+            f"Tabela de predições: {report['rows']} linhas, "
+            f"{report['size_bytes'] / 1e6:.1f} MB, {report['build_seconds']}s, "
+            f"diferença máxima vs modelo: {report['max_abs_diff']:.2e}"
+        )
+        return report
+
+    def get_compiled_model(self):
+        """Retorna a versão compilada (arrays NumPy) do modelo treinado"""
+        if self.compiled_model is None:
+            self.compiled_model = CompiledForest.from_estimator(self.model)
+        return self.compiled_model
+
     def get_feature_importance(self):
         """Retorna a importância das features"""
-        if not hasattr(self.model, "feature_importances_"):
+        if not self.is_loaded():
             if not self.load_model():
                 return None
 
+        if hasattr(self.model, "feature_importances_"):
+            importances = self.model.feature_importances_
+        else:
+            importances = self.compiled_model.feature_importances_
+
         importance_df = pd.DataFrame(
             {
                 "feature": self.feature_names,
-                "importance": self.model.feature_importances_,
+                "importance": importances,
             }
         ).sort_values("importance", ascending=False)
 
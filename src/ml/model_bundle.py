@@ -0,0 +1,51 @@
+import json
+import struct
+from pathlib import Path
+
+import joblib
+
+from src.atomic_files import atomic_file
+
+MAGIC = b"DMBUNDLE"
+FORMAT_VERSION = 1
+# magic, versão do formato e tamanho do cabeçalho JSON em bytes
+_PREFIX = struct.Struct("<8sII")
+
+
+def save_bundle(path, header, payload, compress=3):
+    """Grava cabeçalho JSON + payload joblib em um único arquivo, de forma atômica
+
+    O arquivo é escrito em um temporário no mesmo diretório e renomeado no final,
+    então um leitor vê a versão anterior inteira ou a nova inteira.
+    """
+    path = Path(path)
+    header = {**header, "format_version": FORMAT_VERSION, "compress": compress}
+    header_bytes = json.dumps(header).encode("utf-8")
+
+    with atomic_file(path) as file:
+        file.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        file.write(header_bytes)
+        joblib.dump(payload, file, compress=compress)
+
+
+def _read_header(file):
+    magic, version, header_size = _PREFIX.unpack(file.read(_PREFIX.size))
+    if magic != MAGIC:
+        raise ValueError(f"Arquivo não é um bundle de modelo: {file.name}")
+    if version > FORMAT_VERSION:
+        raise ValueError(f"Versão do bundle não suportada: {version}")
+    return json.loads(file.read(header_size).decode("utf-8"))
+
+
+def read_bundle_header(path):
+    """Lê só o cabeçalho (features, metadados e métricas), sem desserializar o modelo"""
+    with open(path, "rb") as file:
+        return _read_header(file)
+
+
+def load_bundle(path):
+    """Carrega cabeçalho e payload do bundle"""
+    with open(path, "rb") as file:
+        header = _read_header(file)
+        payload = joblib.load(file)
+    return header, payload
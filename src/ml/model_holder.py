@@ -0,0 +1,121 @@
+import threading
+import time
+from datetime import datetime
+
+
+class ModelHolder:
+    """Mantém o modelo carregado em memória e o recarrega só quando o artefato muda
+
+    A troca de modelo é atômica: um novo DiabetesMLModel é carregado por completo e
+    só então substitui o anterior, então predições em andamento nunca veem um
+    modelo parcialmente carregado. get() compara a versão do artefato no disco com
+    a carregada no máximo a cada reload_check_seconds: com vários workers, só o que
+    executou o treino recarrega na hora, e os demais percebem a troca por aqui.
+    """
+
+    def __init__(self, model_factory, warmup_predictions=0, reload_check_seconds=1.0):
+        self.model_factory = model_factory
+        self.warmup_predictions = warmup_predictions
+        self.reload_check_seconds = reload_check_seconds
+        self._next_check = 0.0
+        # Instância vazia usada apenas para consultar a versão do artefato no disco
+        self._probe = model_factory()
+        self._lock = threading.Lock()
+        # (modelo, metadados) trocados juntos em uma única atribuição
+        self._current = (None, None)
+        self.load_seconds = None
+        self.warmup_seconds = None
+
+    def refresh(self):
+        """Recarrega o modelo se a versão no disco for diferente da carregada"""
+        disk_version = self._probe.get_model_version()
+        model, _ = self._current
+        if disk_version is None:
+            return model is not None
+        if model is not None and model.model_version == disk_version:
+            return True
+
+        with self._lock:
+            model, _ = self._current
+            if model is not None and model.model_version == (
+                self._probe.get_model_version()
+            ):
+                return True
+
+            started = time.perf_counter()
+            new_model = self.model_factory()
+            if not new_model.load_model():
+                return model is not None
+            loaded = time.perf_counter()
+
+            # O modelo só é publicado depois de aquecido, então nenhuma requisição
+            # paga o custo das primeiras predições
+            new_model.warm_up(self.warmup_predictions)
+            info = self._build_info(new_model)
+            self.load_seconds = loaded - started
+            self.warmup_seconds = time.perf_counter() - loaded
+
+            self._current = (new_model, info)
+            return True
+
+    def is_ready(self):
+        """Indica se há um modelo carregado e aquecido pronto para servir"""
+        model, _ = self._current
+        return model is not None
+
+    def get(self):
+        """Retorna o modelo atual, recarregando-o se o artefato no disco mudou"""
+        model, _ = self._current
+        now = time.monotonic()
+        if model is None or now >= self._next_check:
+            # Só uma chamada por intervalo faz a checagem (dois stat do artefato)
+            self._next_check = now + self.reload_check_seconds
+            try:
+                self.refresh()
+            except Exception as e:
+                if model is None:
+                    raise
+                # Continua servindo o modelo atual; a próxima checagem tenta de novo
+                print(f"Erro ao recarregar o modelo: {e}")
+            model, _ = self._current
+            if model is None:
+                raise ValueError("Modelo não encontrado. Treine o modelo primeiro.")
+        return model
+
+    def get_info(self):
+        """Retorna os metadados do modelo atual, ou None se não houver modelo"""
+        if not self.refresh():
+            return None
+        _, info = self._current
+        return info
+
+    def predict(self, features):
+        """Faz predição com o modelo atual"""
+        return self.get().predict(features)
+
+    def predict_batch(self, records):
+        """Faz predição em lote com o modelo atual"""
+        return self.get().predict_batch(records)
+
+    def _build_info(self, model):
+        """Calcula uma única vez por versão os metadados expostos em /model-info"""
+        feature_importance = model.get_feature_importance()
+        mtime_ns, size_bytes = (int(part) for part in model.model_version.split("-"))
+        # O cabeçalho do bundle traz data de treino e métricas; o formato anterior não
+        header = model.bundle_header or {}
+        metadata = header.get("metadata", {})
+        return {
+            "model_type": "Random Forest Classifier",
+            "model_version": model.model_version,
+            "trained_at": metadata.get(
+                "trained_at", datetime.fromtimestamp(mtime_ns / 1e9).isoformat()
+            ),
+            "size_bytes": size_bytes,
+            "metrics": header.get("metrics"),
+            "features": list(model.feature_names or []),
+            "feature_importance": (
+                feature_importance.to_dict("records")
+                if feature_importance is not None
+                else None
+            ),
+        }
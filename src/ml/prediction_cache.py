@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def quantize(values, step):
+    """Arredonda values para o múltiplo de step mais próximo (escalar ou array)"""
+    return np.round(np.round(np.asarray(values, dtype=np.float64) / step) * step, 6)
+
+
+class PredictionCache:
+    """Cache LRU em memória para predições, com capacidade e TTL limitados
+
+    Por padrão a chave usa os valores exatos das features. Com bmi_step > 0 o BMI
+    é quantizado antes da predição para que entradas próximas compartilhem a
+    mesma entrada; isso muda a entrada do modelo, então o DiabetesMLModel aplica
+    a mesma quantização também nas predições em lote.
+    """
+
+    def __init__(self, max_size=10000, ttl_seconds=3600, bmi_step=0.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.bmi_step = bmi_step
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def normalize(self, features):
+        """Quantiza o BMI para que entradas próximas compartilhem a mesma entrada"""
+        if not self.bmi_step or "bmi" not in features:
+            return features
+        return {**features, "bmi": float(quantize(features["bmi"], self.bmi_step))}
+
+    def normalize_matrix(self, X, feature_names):
+        """Aplica a mesma quantização do BMI a uma matriz ordenada por feature_names"""
+        if not self.bmi_step or "bmi" not in feature_names:
+            return X
+        column = list(feature_names).index("bmi")
+        X = X.copy()
+        X[:, column] = quantize(X[:, column], self.bmi_step)
+        return X
+
+    def get(self, key):
+        """Retorna a predição em cache ou None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Armazena uma predição, removendo a entrada menos usada se necessário"""
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Invalida todas as entradas (ex.: quando um novo modelo é carregado)"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        """Retorna contadores de uso do cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "bmi_step": self.bmi_step,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,202 @@
+import json
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from src.atomic_files import atomic_file
+
+BINARY_FEATURES = [
+    "highbp",
+    "highchol",
+    "smoker",
+    "stroke",
+    "heartdiseaseorattack",
+    "physactivity",
+    "sex",
+    "diffwalk",
+]
+
+DEFAULT_GRID = {
+    **{feature: [0, 1] for feature in BINARY_FEATURES},
+    "genhlth": [1, 2, 3, 4, 5],
+    "age": list(range(1, 14)),
+}
+
+BMI_STEP = 0.1
+# Versões mantidas no disco, contando a atual; a anterior fica para workers que
+# ainda vão carregar o bundle antigo, que a referencia
+TABLE_KEEP = 2
+
+
+def _axis_key(value):
+    return round(float(value), 6)
+
+
+class PredictionTable:
+    """Tabela pré-calculada de probabilidades para o espaço discreto de features"""
+
+    def __init__(self, feature_names, axes, probabilities, classes, bmi_range=None):
+        self.feature_names = list(feature_names)
+        self.axes = [list(axes[name]) for name in self.feature_names]
+        self.probabilities = probabilities
+        self.classes = np.asarray(classes)
+        self.bmi_range = bmi_range
+        # Manifesto de onde a tabela foi lida ou em que foi salva
+        self.manifest_file = None
+        self.shape = tuple(len(axis) for axis in self.axes)
+        self.strides = np.cumprod((self.shape[1:] + (1,))[::-1])[::-1].tolist()
+        self._positions = [
+            {_axis_key(value): position for position, value in enumerate(axis)}
+            for axis in self.axes
+        ]
+
+    @staticmethod
+    def default_axes(feature_names, X_train, grid=None):
+        """Monta os eixos da grade, cobrindo o BMI observado no treino em passos fixos"""
+        grid = {**DEFAULT_GRID, **(grid or {})}
+        axes = {}
+        for name in feature_names:
+            if name in grid:
+                axes[name] = sorted(grid[name])
+            elif name == "bmi":
+                low, high = float(X_train["bmi"].min()), float(X_train["bmi"].max())
+                steps = np.arange(
+                    np.ceil(low / BMI_STEP), np.floor(high / BMI_STEP) + 1
+                )
+                values = np.round(steps * BMI_STEP, 1).tolist()
+                axes[name] = sorted({low, high, *values})
+            else:
+                axes[name] = sorted(X_train[name].unique().tolist())
+        return axes
+
+    @classmethod
+    def build(
+        cls,
+        predict_proba,
+        classes,
+        feature_names,
+        axes,
+        bmi_range=None,
+        chunk_size=500000,
+    ):
+        """Calcula predict_proba para toda a grade em blocos vetorizados"""
+        axis_values = [
+            np.asarray(axes[name], dtype=np.float64) for name in feature_names
+        ]
+        shape = tuple(len(values) for values in axis_values)
+        n_rows = int(np.prod(shape))
+
+        probabilities = np.empty((n_rows, len(classes)), dtype=np.float32)
+        for start in range(0, n_rows, chunk_size):
+            flat_index = np.arange(start, min(start + chunk_size, n_rows))
+            positions = np.unravel_index(flat_index, shape)
+            X = np.column_stack(
+                [values[pos] for values, pos in zip(axis_values, positions)]
+            )
+            probabilities[start : start + len(flat_index)] = predict_proba(X)
+
+        return cls(feature_names, axes, probabilities, classes, bmi_range)
+
+    def index_of(self, features):
+        """Retorna o índice da linha da tabela ou None se a entrada estiver fora da grade"""
+        index = 0
+        for name, positions, stride in zip(
+            self.feature_names, self._positions, self.strides
+        ):
+            value = features[name]
+            if name == "bmi" and self.bmi_range is not None:
+                # Acima/abaixo do intervalo de treino a floresta toma as mesmas decisões
+                value = min(max(value, self.bmi_range[0]), self.bmi_range[1])
+            position = positions.get(_axis_key(value))
+            if position is None:
+                return None
+            index += position * stride
+        return index
+
+    def lookup(self, features):
+        """Retorna as probabilidades pré-calculadas ou None"""
+        index = self.index_of(features)
+        if index is None:
+            return None
+        return self.probabilities[index]
+
+    def save(self, path):
+        """Salva a tabela em um .npy novo (mapeável em memória) e no manifesto da versão
+
+        Um .npy publicado nunca é regravado: a API pode estar com ele mapeado em
+        memória, e reescrevê-lo mudaria (ou invalidaria) as páginas em uso. Retorna
+        o nome do manifesto, que o bundle do modelo referencia.
+        """
+        path = Path(path)
+        version = f"{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        name = f"{path.name}-{version}"
+        with atomic_file(path.parent / f"{name}.npy") as file:
+            np.save(file, self.probabilities)
+        manifest = {
+            "feature_names": self.feature_names,
+            "axes": dict(zip(self.feature_names, self.axes)),
+            "classes": self.classes.tolist(),
+            "bmi_range": self.bmi_range,
+            "probabilities_file": f"{name}.npy",
+        }
+        with atomic_file(path.parent / f"{name}.json", "w") as file:
+            json.dump(manifest, file)
+        self.manifest_file = f"{name}.json"
+        return self.manifest_file
+
+    @staticmethod
+    def prune(path, keep=TABLE_KEEP, current=None):
+        """Apaga as versões mais antigas além de keep (nunca a atual)"""
+        path = Path(path)
+        files = list(path.parent.glob(f"{path.name}-*.npy"))
+        # Formato anterior, sem versão no nome
+        if path.with_suffix(".npy").exists():
+            files.append(path.with_suffix(".npy"))
+        files.sort(key=lambda file: file.stat().st_mtime_ns)
+        for file in files[: max(len(files) - keep, 0)]:
+            if file.with_suffix(".json").name != current:
+                file.unlink(missing_ok=True)
+                file.with_suffix(".json").unlink(missing_ok=True)
+
+    @classmethod
+    def load(cls, path, model_version=None):
+        """Carrega a tabela com mmap a partir do manifesto; None se ausente ou de outro modelo
+
+        model_version só é conferida no manifesto único do formato anterior
+        (prediction_table.json), que o bundle não referencia.
+        """
+        manifest_path = Path(path).with_suffix(".json")
+        if not manifest_path.exists():
+            return None
+
+        manifest = json.loads(manifest_path.read_text())
+        if model_version is not None and manifest.get("model_version") != model_version:
+            return None
+
+        probabilities_file = manifest_path.parent / manifest.get(
+            "probabilities_file", manifest_path.with_suffix(".npy").name
+        )
+        if not probabilities_file.exists():
+            return None
+        table = cls(
+            manifest["feature_names"],
+            manifest["axes"],
+            np.load(probabilities_file, mmap_mode="r"),
+            manifest["classes"],
+            manifest["bmi_range"],
+        )
+        table.manifest_file = manifest_path.name
+        return table
+
+    def check_exactness(self, predict_proba, n_samples=2000, seed=0):
+        """Compara uma amostra da tabela com o modelo ao vivo (maior diferença absoluta)"""
+        rng = np.random.default_rng(seed)
+        flat_index = rng.integers(0, len(self.probabilities), n_samples)
+        positions = np.unravel_index(flat_index, self.shape)
+        X = np.column_stack(
+            [np.asarray(axis)[pos] for axis, pos in zip(self.axes, positions)]
+        )
+        live = predict_proba(X)
+        return float(np.abs(live - self.probabilities[flat_index]).max())
@@ -0,0 +1,390 @@
+"""Gerador de datasets sintéticos grandes nos dois layouts de origem
+
+Gera as linhas em blocos vetorizados com numpy, cada um com uma semente derivada
+da semente principal (SeedSequence.spawn), então o resultado é o mesmo com
+qualquer número de processos. O alvo é sorteado a partir de um modelo logístico
+sobre as features, para que um modelo treinado nesses dados aprenda algo. A saída
+vai em streaming para um CSV, um CSV dentro de um ZIP ou direto para raw_data, com
+no máximo alguns blocos em memória.
+
+Execução: python -m src.synthetic_data --rows 1000000 --output data/synthetic.zip
+"""
+
+import argparse
+import hashlib
+import multiprocessing
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data_schema import to_raw_data
+from src.database import get_source_batch, init_database, insert_raw_data_chunks
+
+SCHEMA_VARIANTS = ("Diabetes_012", "diagnosed_diabetes")
+SYNTHETIC_CHUNK_SIZE = int(os.getenv("SYNTHETIC_CHUNK_SIZE", "100000"))
+SYNTHETIC_WORKERS = int(os.getenv("SYNTHETIC_WORKERS", "0"))
+
+# Faixas etárias do BRFSS (1: 18-24 ... 13: 80+), com a distribuição do dataset
+AGE_CATEGORY_P = np.array(
+    [2.2, 3.0, 4.4, 5.5, 6.4, 7.8, 10.4, 12.2, 13.1, 12.7, 9.3, 6.3, 6.7]
+)
+AGE_CATEGORY_P = AGE_CATEGORY_P / AGE_CATEGORY_P.sum()
+
+
+def _sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+
+def _flag(rng, p):
+    """Sorteia 0/1 com a probabilidade de cada linha"""
+    return (rng.random(p.shape) < p).astype(np.int8)
+
+
+def _brfss_chunk(rng, n):
+    """Bloco no formato original do BRFSS (Diabetes_012, HighBP, ...)"""
+    age = rng.choice(np.arange(1, 14), n, p=AGE_CATEGORY_P)
+    sex = _flag(rng, np.full(n, 0.44))
+    bmi = np.exp(rng.normal(np.log(27.5), 0.21, n)).clip(12, 98).round()
+    age_z = (age - 8) / 3
+    bmi_z = (bmi - 28) / 6
+
+    highbp = _flag(rng, _sigmoid(-0.4 + 0.9 * age_z + 0.6 * bmi_z))
+    highchol = _flag(rng, _sigmoid(-0.4 + 0.7 * age_z + 0.3 * bmi_z))
+    smoker = _flag(rng, np.full(n, 0.44))
+    stroke = _flag(rng, _sigmoid(-3.6 + 0.6 * age_z + 0.5 * highbp))
+    heart = _flag(
+        rng, _sigmoid(-2.8 + 0.8 * age_z + 0.5 * highbp + 0.3 * smoker + 0.4 * sex)
+    )
+    physactivity = _flag(rng, _sigmoid(1.3 - 0.3 * bmi_z - 0.2 * age_z))
+    # Saúde geral piora com idade, IMC e doenças
+    genhlth = (
+        (
+            2.5
+            + 0.35 * age_z
+            + 0.4 * bmi_z
+            + 0.5 * heart
+            + 0.3 * stroke
+            - 0.4 * physactivity
+            + rng.normal(0, 0.9, n)
+        )
+        .round()
+        .clip(1, 5)
+    )
+    diffwalk = _flag(
+        rng, _sigmoid(-2.2 + 0.6 * (genhlth - 2.5) + 0.4 * age_z + 0.3 * bmi_z)
+    )
+
+    logit = (
+        -2.85
+        + 0.8 * highbp
+        + 0.6 * highchol
+        + 0.45 * bmi_z
+        + 0.55 * (genhlth - 2.5)
+        + 0.35 * age_z
+        + 0.2 * heart
+        + 0.2 * diffwalk
+        - 0.15 * physactivity
+        + 0.2 * sex
+    )
+    p_diabetes = _sigmoid(logit)
+    u = rng.random(n)
+    # 2: diabetes, 1: pré-diabetes (~2%), 0: nenhum
+    diabetes = np.where(u < p_diabetes, 2, np.where(u < p_diabetes + 0.02, 1, 0))
+
+    columns = {
+        "Diabetes_012": diabetes,
+        "HighBP": highbp,
+        "HighChol": highchol,
+        "CholCheck": _flag(rng, np.full(n, 0.96)),
+        "BMI": bmi,
+        "Smoker": smoker,
+        "Stroke": stroke,
+        "HeartDiseaseorAttack": heart,
+        "PhysActivity": physactivity,
+        "Fruits": _flag(rng, np.full(n, 0.63)),
+        "Veggies": _flag(rng, np.full(n, 0.81)),
+        "HvyAlcoholConsump": _flag(rng, np.full(n, 0.06)),
+        "AnyHealthcare": _flag(rng, np.full(n, 0.95)),
+        "NoDocbcCost": _flag(rng, np.full(n, 0.08)),
+        "GenHlth": genhlth,
+        "MentHlth": np.where(rng.random(n) < 0.7, 0, rng.integers(1, 31, n)),
+        "PhysHlth": np.where(rng.random(n) < 0.63, 0, rng.integers(1, 31, n)),
+        "DiffWalk": diffwalk,
+        "Sex": sex,
+        "Age": age,
+        "Education": rng.choice(
+            np.arange(1, 7), n, p=[0.01, 0.02, 0.04, 0.25, 0.27, 0.41]
+        ),
+        "Income": rng.choice(
+            np.arange(1, 9), n, p=[0.04, 0.05, 0.06, 0.08, 0.10, 0.14, 0.17, 0.36]
+        ),
+    }
+    # Inteiros, como em create_sample_data: o arquivo do Kaggle grava 1.0, mas o
+    # schema lê os dois formatos e o CSV sai com metade do tamanho e 2.5x mais rápido
+    return pd.DataFrame(
+        {name: values.astype(np.int64) for name, values in columns.items()}
+    )
+
+
+def _diagnosed_chunk(rng, n):
+    """Bloco no formato atual do dataset (diagnosed_diabetes, 31 colunas)"""
+    age = rng.normal(50, 15, n).clip(18, 90).round().astype(np.int64)
+    age_z = (age - 50) / 15
+    gender = rng.choice(np.array(["male", "female", "other"]), n, p=[0.48, 0.48, 0.04])
+    smoking = rng.choice(
+        np.array(["never", "former", "current_smoker"]), n, p=[0.6, 0.2, 0.2]
+    )
+    activity = np.exp(rng.normal(np.log(110), 0.7, n)).clip(0, 900).round()
+    diet = rng.normal(6, 1.8, n).clip(0, 10).round(1)
+    family_history = _flag(rng, np.full(n, 0.22))
+    bmi = (rng.normal(25.6, 3.6, n) + 0.8 * age_z).clip(15, 45).round(1)
+    bmi_z = (bmi - 25.6) / 3.6
+    systolic = (115 + 8 * age_z + 4 * bmi_z + rng.normal(0, 12, n)).round()
+    hypertension = _flag(rng, _sigmoid(-1.3 + 0.04 * (systolic - 115) + 0.4 * age_z))
+    cardiovascular = _flag(rng, _sigmoid(-2.8 + 0.7 * age_z + 0.5 * hypertension))
+    cholesterol = (185 + 10 * age_z + rng.normal(0, 32, n)).clip(100, 350).round()
+
+    logit = (
+        -0.9
+        + 0.5 * age_z
+        + 0.45 * bmi_z
+        + 1.0 * family_history
+        + 0.5 * hypertension
+        + 0.3 * cardiovascular
+        - 0.35 * (activity > 150)
+        - 0.2 * (diet - 6)
+        + 0.3 * (smoking == "current_smoker")
+        + 0.004 * (cholesterol - 185)
+        + 0.1 * (gender == "male")
+    )
+    diagnosed = _flag(rng, _sigmoid(logit))
+    hba1c = (5.4 + 1.4 * diagnosed + 0.15 * bmi_z + rng.normal(0, 0.45, n)).round(2)
+    stage = np.where(
+        diagnosed == 1,
+        np.where(rng.random(n) < 0.95, "type_2", "type_1"),
+        np.where(hba1c >= 5.7, "pre-diabetes", "no_diabetes"),
+    )
+
+    return pd.DataFrame(
+        {
+            "age": age,
+            "gender": gender,
+            "ethnicity": rng.choice(
+                np.array(["white", "hispanic", "black", "asian", "other"]),
+                n,
+                p=[0.45, 0.2, 0.17, 0.12, 0.06],
+            ),
+            "education_level": rng.choice(
+                np.array(["no_formal", "highschool", "graduate", "postgraduate"]),
+                n,
+                p=[0.05, 0.45, 0.35, 0.15],
+            ),
+            "income_level": rng.choice(
+                np.array(["low", "lower-middle", "middle", "upper-middle", "high"]), n
+            ),
+            "employment_status": rng.choice(
+                np.array(["employed", "unemployed", "retired", "student"]),
+                n,
+                p=[0.6, 0.12, 0.2, 0.08],
+            ),
+            "smoking_status": smoking,
+            "alcohol_consumption_per_week": rng.poisson(2, n),
+            "physical_activity_minutes_per_week": activity.astype(np.int64),
+            "diet_score": diet,
+            "sleep_hours_per_day": rng.normal(7, 1.1, n).clip(3, 12).round(1),
+            "screen_time_hours_per_day": rng.normal(6, 2.5, n).clip(0.5, 16).round(1),
+            "family_history_diabetes": family_history,
+            "hypertension_history": hypertension,
+            "cardiovascular_history": cardiovascular,
+            "bmi": bmi,
+            "waist_to_hip_ratio": (0.86 + 0.03 * bmi_z + rng.normal(0, 0.04, n)).round(
+                2
+            ),
+            "systolic_bp": systolic.astype(np.int64),
+            "diastolic_bp": (75 + 0.4 * (systolic - 115) + rng.normal(0, 7, n))
+            .round()
+            .astype(np.int64),
+            "heart_rate": rng.normal(70, 9, n).round().astype(np.int64),
+            "cholesterol_total": cholesterol.astype(np.int64),
+            "hdl_cholesterol": rng.normal(54, 13, n)
+            .clip(20, 110)
+            .round()
+            .astype(np.int64),
+            "ldl_cholesterol": (cholesterol * 0.55 + rng.normal(0, 15, n))
+            .round()
+            .astype(np.int64),
+            "triglycerides": (120 + 25 * bmi_z + rng.normal(0, 35, n))
+            .clip(30, 500)
+            .round()
+            .astype(np.int64),
+            "glucose_fasting": (98 + 38 * diagnosed + rng.normal(0, 12, n))
+            .round()
+            .astype(np.int64),
+            "glucose_postprandial": (135 + 65 * diagnosed + rng.normal(0, 22, n))
+            .round()
+            .astype(np.int64),
+            "insulin_level": np.exp(rng.normal(np.log(9), 0.4, n)).round(2),
+            "hba1c": hba1c,
+            "diabetes_risk_score": (100 * _sigmoid(logit)).round(1),
+            "diabetes_stage": stage,
+            "diagnosed_diabetes": diagnosed,
+        }
+    )
+
+
+CHUNK_GENERATORS = {
+    "Diabetes_012": _brfss_chunk,
+    "diagnosed_diabetes": _diagnosed_chunk,
+}
+
+
+def generate_chunk(n_rows, seed=42, schema="Diabetes_012"):
+    """Gera um bloco de n_rows linhas no layout schema
+
+    seed pode ser um inteiro ou uma np.random.SeedSequence.
+    """
+    if schema not in CHUNK_GENERATORS:
+        raise ValueError(f"Schema inválido: {schema} (use um de {SCHEMA_VARIANTS})")
+    return CHUNK_GENERATORS[schema](np.random.default_rng(seed), n_rows)
+
+
+def chunk_plan(n_rows, seed=42, chunk_size=SYNTHETIC_CHUNK_SIZE):
+    """Tamanho e semente de cada bloco; não depende do número de processos"""
+    sizes = [min(chunk_size, n_rows - start) for start in range(0, n_rows, chunk_size)]
+    return list(zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))))
+
+
+def _build_chunk(task):
+    """Gera um bloco e o prepara para a saída (executa nos processos do pool)"""
+    n_rows, seed, schema, output, header = task
+    chunk = generate_chunk(n_rows, seed, schema)
+    if output == "csv":
+        return chunk.to_csv(index=False, header=header).encode()
+    if output == "raw_data":
+        return to_raw_data(chunk, schema)
+    return chunk
+
+
+def generate_chunks(
+    n_rows,
+    seed=42,
+    schema="Diabetes_012",
+    chunk_size=SYNTHETIC_CHUNK_SIZE,
+    workers=SYNTHETIC_WORKERS,
+    output="frame",
+):
+    """Produz os blocos em ordem: DataFrames, bytes de CSV ou blocos de raw_data
+
+    workers=0 usa um processo por núcleo; 1 gera no próprio processo. No máximo
+    2 blocos por processo ficam em andamento, o que limita a memória.
+    """
+    tasks = [
+        (size, chunk_seed, schema, output, i == 0)
+        for i, (size, chunk_seed) in enumerate(chunk_plan(n_rows, seed, chunk_size))
+    ]
+    workers = min(workers or os.cpu_count() or 1, len(tasks) or 1)
+    if workers == 1:
+        for task in tasks:
+            yield _build_chunk(task)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        pending = [executor.submit(_build_chunk, task) for task in tasks[: 2 * workers]]
+        for next_task in tasks[2 * workers :] + [None] * len(pending):
+            result = pending.pop(0).result()
+            if next_task is not None:
+                pending.append(executor.submit(_build_chunk, next_task))
+            yield result
+
+
+def write_csv(path, n_rows, seed=42, schema="Diabetes_012", **options):
+    """Grava o dataset em um CSV, ou em um CSV dentro do ZIP se path termina em .zip
+
+    Retorna o caminho gravado.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    chunks = generate_chunks(n_rows, seed, schema, output="csv", **options)
+    if path.suffix != ".zip":
+        with open(path, "wb") as file:
+            for data in chunks:
+                file.write(data)
+        return path
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        member = f"{path.stem}.csv"
+        with archive.open(member, "w", force_zip64=True) as file:
+            for data in chunks:
+                file.write(data)
+    return path
+
+
+def source_sha256(n_rows, seed, schema):
+    """Identificador do dataset sintético em source_batches"""
+    return hashlib.sha256(f"synthetic:{schema}:{n_rows}:{seed}".encode()).hexdigest()
+
+
+def write_raw_data(n_rows, seed=42, schema="Diabetes_012", on_chunk=None, **options):
+    """Insere o dataset direto em raw_data, uma vez por (n_rows, seed, schema)
+
+    Retorna o resultado de insert_raw_data_chunks, ou None se este dataset já
+    está em source_batches.
+    """
+    init_database()
+    sha256 = source_sha256(n_rows, seed, schema)
+    if get_source_batch(sha256) is not None:
+        print("♻️ Este dataset sintético já está em raw_data; nada a inserir")
+        return None
+
+    return insert_raw_data_chunks(
+        generate_chunks(n_rows, seed, schema, output="raw_data", **options),
+        on_chunk=on_chunk,
+        source={
+            "sha256": sha256,
+            "name": f"synthetic-{schema}-{n_rows}-{seed}",
+            "layout": schema,
+        },
+        deduplicate=False,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um dataset sintético")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--schema", choices=SCHEMA_VARIANTS, default="Diabetes_012")
+    parser.add_argument("--chunk-size", type=int, default=SYNTHETIC_CHUNK_SIZE)
+    parser.add_argument(
+        "--workers", type=int, default=SYNTHETIC_WORKERS, help="0: um por núcleo"
+    )
+    parser.add_argument(
+        "--output",
+        default="data/synthetic.csv",
+        help="arquivo .csv ou .zip, ou raw_data para inserir no banco",
+    )
+    args = parser.parse_args()
+
+    options = {"chunk_size": args.chunk_size, "workers": args.workers}
+    start = time.perf_counter()
+    if args.output == "raw_data":
+        write_raw_data(args.rows, args.seed, args.schema, **options)
+        target = "raw_data"
+    else:
+        path = write_csv(args.output, args.rows, args.seed, args.schema, **options)
+        target = f"{path} ({path.stat().st_size / 1e6:.1f} MB)"
+    elapsed = time.perf_counter() - start
+    print(
+        f"✅ {args.rows} linhas ({args.schema}) em {target}: {elapsed:.1f} s "
+        f"({args.rows / elapsed:.0f} linhas/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
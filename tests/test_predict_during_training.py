@@ -0,0 +1,110 @@
+"""/predict continua respondendo enquanto um treinamento está em andamento
+
+O treinamento é substituído por uma tarefa que fica presa no pool de processos
+até o teste liberá-la. Se o job rodasse no event loop, a própria chamada a
+/train-model só voltaria com o job já concluído e as asserções abaixo falhariam.
+O cache de predições fica desligado para que toda chamada passe pelo modelo.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Criado pelo teste para liberar o treinamento falso (relativo ao diretório temporário)
+RELEASE_FILE = "train.release"
+# Limite para o treinamento falso não ficar preso se o teste falhar antes de liberá-lo
+BLOCKED_TRAINING_SECONDS = 30
+REQUEST_TIMEOUT = 10
+
+
+def blocked_train_task(job_id, **kwargs):
+    """Treinamento falso: fica na etapa fit até o arquivo de liberação existir"""
+    from src.jobs import JobProgress
+
+    progress = JobProgress(job_id)
+    progress.start()
+    progress("fit")
+    deadline = time.monotonic() + BLOCKED_TRAINING_SECONDS
+    while not Path(RELEASE_FILE).exists() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return {"stage_seconds": progress.finish()}
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    """API com banco e modelo treinados em um diretório temporário, sem cache"""
+    monkeypatch.chdir(tmp_path)
+    Path("data").mkdir()
+
+    from benchmarks.common import make_training_data
+    from src.api import main
+    from src.api.execution import shutdown_executors
+    from src.database import init_database, insert_processed_data
+    from src.ml.diabetes_model import DiabetesMLModel
+    from src.ml.model_holder import ModelHolder
+
+    init_database()
+    X, y = make_training_data(2000)
+    insert_processed_data(X.assign(diabetes=y))
+    DiabetesMLModel().train_model()
+
+    monkeypatch.setattr(main, "prediction_cache", None)
+    monkeypatch.setattr(
+        main, "model_holder", ModelHolder(main.model_holder.model_factory)
+    )
+    monkeypatch.setattr(main, "train_model_task", blocked_train_task)
+    main.model_holder.refresh()
+    yield main
+    shutdown_executors()
+
+
+async def wait_for_state(client, job_id, states):
+    """Aguarda o job chegar a um dos estados dados e o retorna"""
+    deadline = time.monotonic() + REQUEST_TIMEOUT
+    while time.monotonic() < deadline:
+        job = (await client.get(f"/jobs/{job_id}")).json()
+        if job["state"] in states:
+            return job
+        await asyncio.sleep(0.05)
+    raise AssertionError(f"Job {job_id} não chegou a {states}: {job['state']}")
+
+
+async def predict_during_blocked_training(main):
+    import httpx
+
+    from benchmarks.common import SAMPLE_PATIENT
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await asyncio.wait_for(
+            client.post("/train-model"), timeout=REQUEST_TIMEOUT
+        )
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+        job = await wait_for_state(client, job_id, ("running", "completed", "failed"))
+        assert job["state"] == "running"
+
+        for _ in range(5):
+            response = await asyncio.wait_for(
+                client.post("/predict", json=SAMPLE_PATIENT), timeout=REQUEST_TIMEOUT
+            )
+            assert response.status_code == 200
+            assert set(response.json()["probability"]) == {"não_diabético", "diabético"}
+        response = await client.get("/health")
+        assert response.json()["ready"]
+
+        job = (await client.get(f"/jobs/{job_id}")).json()
+        assert job["state"] == "running"
+
+        Path(RELEASE_FILE).touch()
+        job = await wait_for_state(client, job_id, ("completed", "failed"))
+        assert job["state"] == "completed", job["error"]
+
+
+def test_predict_responds_while_training_runs(api):
+    asyncio.run(predict_during_blocked_training(api))